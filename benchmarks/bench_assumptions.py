@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Branch feasibility checks with the extra constraints asserted in a scope, and passed as assumptions.
+
+A solver gets the constraints of a path, and is then asked whether each of `--queries` branches is feasible, as a
+symbolic execution does at every conditional jump: satisfiable(extra_constraints=[guard]). Every guard is checked
+twice, as happens when the states that took both sides of a branch check it again. With push/pop, Z3 throws away
+what it learned at every pop; with assumptions, it keeps it.
+
+    python benchmarks/bench_assumptions.py [--constraints N] [--queries Q]
+"""
+
+import argparse
+import random
+import time
+
+def run(assume, constraints, guards):
+    import claripy
+    from claripy.backends import BackendZ3
+
+    s = claripy.frontends.FullFrontend(BackendZ3(assume_extra_constraints=assume))
+    s.add(constraints)
+    s.satisfiable()
+
+    start = time.time()
+    results = [ s.satisfiable(extra_constraints=(g,)) for g in guards ]
+    return time.time() - start, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--constraints', type=int, default=30, help="number of constraints of the path")
+    parser.add_argument('--queries', type=int, default=200, help="number of feasibility checks")
+    args = parser.parse_args()
+
+    import claripy
+
+    rng = random.Random(0)
+    xs = [ claripy.BVS('x%d' % i, 32) for i in range(8) ]
+    constraints = [ ]
+    for _ in range(args.constraints):
+        a, b, c = rng.sample(xs, 3)
+        constraints.append(claripy.ULT((a * 7 + b) ^ c, 0x40000000 + rng.getrandbits(28)))
+    guards = [ ]
+    for _ in range(args.queries // 2):
+        a, b = rng.sample(xs, 2)
+        g = claripy.ULT(a + b, rng.getrandbits(32))
+        guards += [ g, claripy.Not(g) ]
+    checks = guards + guards
+
+    pushed, pushed_results = run(False, constraints, checks)
+    assumed, assumed_results = run(True, constraints, checks)
+
+    assert pushed_results == assumed_results
+    print("%d checks  push/pop: %.3fs  assumptions: %.3fs  (%.1fx)" % (
+        len(checks), pushed, assumed, pushed / assumed
+    ))
+
+if __name__ == '__main__':
+    main()
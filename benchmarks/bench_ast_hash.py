@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Node-creation throughput of the hash-consing algorithms.
+
+Every hash mode is measured in a fresh interpreter, since ASTs hashed with different algorithms are never shared.
+
+    python benchmarks/bench_ast_hash.py [--nodes N] [--modes fast,md5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+def build(n):
+    import claripy
+
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    out = [ ]
+    for i in range(n):
+        e = (x + i) * y
+        out.append(e ^ (e >> 3))
+    return out
+
+def run_mode(n):
+    import claripy
+    from claripy.ast.base import Base
+
+    x = claripy.BVS('x', 32)
+    kwargs = { 'length': 32, 'variables': x.variables, 'symbolic': True, 'annotations': () }
+    start = time.time()
+    for i in range(n):
+        Base._calc_hash('__add__', (x, i), kwargs)
+    hash_time = time.time() - start
+
+    before = len(Base._hash_cache)
+    start = time.time()
+    keep = build(n)
+    miss_time = time.time() - start
+    created = len(Base._hash_cache) - before
+
+    start = time.time()
+    build(n)
+    hit_time = time.time() - start
+
+    print("%-5s  hash: %9.0f/s  create: %9.0f nodes/s  re-create: %9.0f nodes/s  (%d nodes)" % (
+        claripy.ast.base.HASH_MODE, n / hash_time, created / miss_time, created / hit_time, created
+    ))
+    return keep
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=20000, help="number of expressions to build")
+    parser.add_argument('--modes', default='fast,md5', help="comma-separated hash modes to compare")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_mode(args.nodes)
+        return
+
+    for mode in args.modes.split(','):
+        env = dict(os.environ, CLARIPY_HASH_MODE=mode)
+        subprocess.check_call([ sys.executable, os.path.abspath(__file__), '--worker', '--nodes', str(args.nodes) ],
+                              env=env)
+
+if __name__ == '__main__':
+    main()
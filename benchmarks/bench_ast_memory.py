@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Memory footprint of AST nodes.
+
+Builds a random expression DAG (every new node combines earlier nodes, so subexpressions are shared) and reports the
+traced memory per interned node.
+
+    python benchmarks/bench_ast_memory.py [--nodes N] [--variables V]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1000000, help="number of nodes to create")
+    parser.add_argument('--variables', type=int, default=32, help="number of symbolic variables")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    import claripy
+    from claripy.ast.base import Base
+
+    rng = random.Random(args.seed)
+    gc.collect()
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    start_nodes = len(Base._hash_cache)
+    start = time.time()
+
+    pool = [ claripy.BVS('v%d' % i, 32) for i in range(args.variables) ]
+    while len(Base._hash_cache) - start_nodes < args.nodes:
+        a = pool[rng.randrange(len(pool))]
+        b = pool[rng.randrange(len(pool))]
+        kind = rng.randrange(5)
+        if kind == 0:
+            e = a - b
+        elif kind == 1:
+            e = a * b
+        elif kind == 2:
+            e = claripy.LShR(a, rng.randrange(1, 32))
+        elif kind == 3:
+            e = claripy.If(claripy.ULT(a, b), a, b)
+        else:
+            e = a - rng.randrange(1 << 32)
+        pool.append(e)
+
+    elapsed = time.time() - start
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0] - start_memory - sys.getsizeof(pool)
+    nodes = len(Base._hash_cache) - start_nodes
+    tracemalloc.stop()
+
+    print("%d nodes in %.1fs (%.0f nodes/s, with tracemalloc)" % (nodes, elapsed, nodes / elapsed))
+    print("%.1f MiB traced, %.1f bytes/node" % (memory / 2.**20, memory / float(nodes)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Size and speed of the compact AST serialization against pickle.
+
+Builds a random expression DAG (like bench_ast_memory.py), writes it with claripy.ast.serialize and with pickle,
+and loads every file in a fresh interpreter, as when restoring a checkpoint.
+
+    python benchmarks/bench_ast_serialize.py [--nodes N] [--variables V]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+FORMATS = ('serialize', 'pickle')
+
+def build(n, variables, seed):
+    import claripy
+    from claripy.ast.base import Base
+
+    rng = random.Random(seed)
+    start_nodes = len(Base._hash_cache)
+    pool = [ claripy.BVS('v%d' % i, 32) for i in range(variables) ]
+    while len(Base._hash_cache) - start_nodes < n:
+        a = pool[rng.randrange(len(pool))]
+        b = pool[rng.randrange(len(pool))]
+        kind = rng.randrange(4)
+        if kind == 0:
+            e = a - b
+        elif kind == 1:
+            e = a * b
+        elif kind == 2:
+            e = claripy.If(claripy.ULT(a, b), a, b)
+        else:
+            e = a - rng.randrange(1 << 32)
+        pool.append(e)
+    # every AST is a root, like the constraints and registers of a set of states
+    return pool
+
+def dump(args):
+    from claripy.ast import serialize
+
+    roots = build(args.nodes, args.variables, args.seed)
+    for fmt in FORMATS:
+        path = os.path.join(args.dir, fmt)
+        start = time.time()
+        with open(path, 'wb') as f:
+            if fmt == 'pickle':
+                pickle.dump(roots, f, pickle.HIGHEST_PROTOCOL)
+            else:
+                serialize.dump(roots, f)
+        elapsed = time.time() - start
+        print("%-17s dump: %6.2fs  %8.1f KiB" % (fmt, elapsed, os.path.getsize(path) / 1024.))
+
+def load(args):
+    from claripy.ast import serialize
+    from claripy.ast.base import Base
+
+    path = os.path.join(args.dir, args.format)
+    start = time.time()
+    with open(path, 'rb') as f:
+        roots = pickle.load(f) if args.format == 'pickle' else serialize.load(f)
+    elapsed = time.time() - start
+    print("%-17s load: %6.2fs  (%d roots, %d nodes)" % (args.format, elapsed, len(roots), len(Base._hash_cache)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=200000, help="number of nodes to create")
+    parser.add_argument('--variables', type=int, default=32, help="number of symbolic variables")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--worker', choices=('dump', 'load'), help=argparse.SUPPRESS)
+    parser.add_argument('--format', help=argparse.SUPPRESS)
+    parser.add_argument('--dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker == 'dump':
+        dump(args)
+        return
+    if args.worker == 'load':
+        load(args)
+        return
+
+    worker = [ sys.executable, os.path.abspath(__file__), '--nodes', str(args.nodes), '--variables',
+               str(args.variables), '--seed', str(args.seed) ]
+    with tempfile.TemporaryDirectory() as d:
+        subprocess.check_call(worker + [ '--worker', 'dump', '--dir', d ])
+        for fmt in FORMATS:
+            subprocess.check_call(worker + [ '--worker', 'load', '--dir', d, '--format', fmt ])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Evaluation of constraints on cached models, by the concrete backend and by compiled functions.
+
+Every constraint is evaluated on every one of K models, as ModelCacheMixin does when it checks its cached models
+against new constraints: once by replacing the variables and evaluating the result with the concrete backend, and once
+with the functions compiled by claripy.ast.compile. The time to compile the functions is reported separately.
+
+    python benchmarks/bench_compiled_eval.py [--models K] [--constraints N] [--depth D]
+"""
+
+import argparse
+import random
+import time
+
+def make_constraint(xs, depth, rng):
+    import claripy
+
+    operations = [
+        lambda a, b: a + b,
+        lambda a, b: a - b,
+        lambda a, b: a * b,
+        lambda a, b: a & b,
+        lambda a, b: a | b,
+        lambda a, b: a ^ b,
+        lambda a, b: a << (b & 7),
+        lambda a, b: claripy.LShR(a, b & 7),
+        lambda a, b: claripy.If(claripy.ULT(a, b), a, b),
+        lambda a, b: claripy.Concat(a[15:0], b[31:16]),
+    ]
+
+    def expr(d):
+        if d == 0:
+            return rng.choice(xs) if rng.random() < 0.8 else claripy.BVV(rng.getrandbits(32), 32)
+        return rng.choice(operations)(expr(d - 1), expr(d - 1))
+
+    return claripy.ULT(expr(depth), expr(depth))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', type=int, default=200, help="number of models")
+    parser.add_argument('--constraints', type=int, default=20, help="number of constraints")
+    parser.add_argument('--depth', type=int, default=4, help="depth of the constraints")
+    args = parser.parse_args()
+
+    import claripy
+    from claripy.ast import compiler
+    from claripy.frontend_mixins.model_cache_mixin import ModelCache
+
+    rng = random.Random(0)
+    xs = [ claripy.BVS('x%d' % i, 32, explicit_name=True) for i in range(6) ]
+    constraints = [ make_constraint(xs, args.depth, rng) for _ in range(args.constraints) ]
+    models = [ { x.args[0]: rng.getrandbits(32) for x in xs } for _ in range(args.models) ]
+
+    start = time.time()
+    expected = [ ]
+    for m in models:
+        mc = ModelCache(m)
+        new = mc._replace_list(constraints)
+        expected.append([ claripy.backends.concrete.eval(c, 1)[0] for c in new ])
+    concrete = time.time() - start
+
+    compiler.clear_cache()
+    start = time.time()
+    functions = [ claripy.ast.compile(c) for c in constraints ]
+    compiling = time.time() - start
+
+    start = time.time()
+    results = [ [ f(m) for f in functions ] for m in models ]
+    compiled = time.time() - start
+
+    assert results == expected
+    print("%d constraints on %d models" % (len(constraints), len(models)))
+    print("  concrete backend: %.3fs" % concrete)
+    print("  compiled:         %.3fs (+ %.3fs to compile)  (%.1fx)" % (compiled, compiling, concrete / compiled))
+
+if __name__ == '__main__':
+    main()
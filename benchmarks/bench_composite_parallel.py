@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Latency of the satisfiability checks of a wide SolverComposite, with its children checked one after the other, and at
+once in threads and in worker processes (see ParallelChecker).
+
+The state has many independent symbolic inputs, each with constraints that take a while to solve: factoring a product
+of two primes. The first check is of the satisfiable state, and the second of a branch that has an unsatisfiable child
+on top, which the parallel checks settle as soon as that child is found unsatisfiable.
+
+    python benchmarks/bench_composite_parallel.py [--inputs N] [--threads N] [--processes N]
+"""
+
+import argparse
+import os
+import time
+
+# the factors, primes of 15 bits, which take Z3 a second or two
+PRIMES = [ 32749, 32719, 32717, 32713, 32707, 32693, 32687, 32653 ]
+
+def state(claripy, n, parallel):
+    s = claripy.SolverComposite(parallel=parallel)
+    for i in range(n):
+        x = claripy.BVS('x%d' % i, 32)
+        y = claripy.BVS('y%d' % i, 32)
+        p, q = PRIMES[i % len(PRIMES)], PRIMES[(i + 1) % len(PRIMES)]
+        s.add([ x * y == p * q, claripy.UGT(x, 1), claripy.UGT(y, 1), claripy.ULT(x, 2**16), claripy.ULT(y, 2**16) ])
+    return s
+
+def run(claripy, n, parallel):
+    s = state(claripy, n, parallel)
+    start = time.time()
+    sat = s.satisfiable()
+    sat_time = time.time() - start
+
+    b = state(claripy, n, parallel)
+    w = claripy.BVS('w', 32)
+    b.add(w * 2 == 1)
+    start = time.time()
+    unsat = b.satisfiable()
+    return sat, unsat, sat_time, time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--inputs', type=int, default=4, help="number of independent inputs")
+    parser.add_argument('--threads', type=int, default=os.cpu_count(), help="number of threads")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    import claripy
+    from claripy.frontends import ParallelChecker
+
+    threads = ParallelChecker(threads=args.threads)
+    processes = ParallelChecker(processes=args.processes)
+    # the workers start with the first solve
+    run(claripy, 1, processes)
+
+    for name, parallel in (('serial', None), ('%d threads' % args.threads, threads),
+                           ('%d processes' % args.processes, processes)):
+        sat, unsat, sat_time, unsat_time = run(claripy, args.inputs, parallel)
+        assert sat and not unsat
+        print("%-14s  satisfiable: %.3fs  with an unsatisfiable child: %.3fs" % (name, sat_time, unsat_time))
+
+    threads.shutdown()
+    processes.shutdown()
+
+if __name__ == '__main__':
+    main()
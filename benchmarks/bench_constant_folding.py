@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Throughput of operations on concrete ASTs, with and without the constant-folding fast path.
+
+Without it, every operation goes through the eager backends, as it used to. The values are drawn from a small pool so
+that, as in address arithmetic, most results already exist in the hash-consing cache.
+
+    python benchmarks/bench_constant_folding.py [--ops N] [--families arith,bitwise,...]
+"""
+
+import argparse
+import random
+import time
+
+def families():
+    import claripy
+
+    rm = claripy.fp.RM.default()
+    return {
+        'arith': lambda a, b, f, g: (a + b, a - b, a * b, a // (b | 1), a % (b | 1), claripy.SDiv(a, b | 1)),
+        'bitwise': lambda a, b, f, g: (a & b, a | b, a ^ b, ~a, -a),
+        'shift': lambda a, b, f, g: (a << (b & 31), a >> (b & 31), claripy.LShR(a, b & 31), claripy.RotateLeft(a, b)),
+        'compare': lambda a, b, f, g: (a == b, a != b, claripy.ULT(a, b), claripy.SLE(a, b)),
+        'bitmod': lambda a, b, f, g: (a[15:8], claripy.Concat(a, b), claripy.ZeroExt(32, a), claripy.SignExt(32, b),
+                                      a.reversed),
+        'bool': lambda a, b, f, g: (claripy.And(a == b, a != b), claripy.Or(a == b, a != b), claripy.Not(a == b)),
+        'fp': lambda a, b, f, g: (claripy.fpAdd(rm, f, g), claripy.fpMul(rm, f, g), claripy.fpNeg(f), f < g),
+        'address': lambda a, b, f, g: ((a + (b & 0xff) * 8 + 0x10) & 0xfffffff8,),
+    }
+
+def run(family, n, values, fvalues):
+    start = time.time()
+    for i in range(n):
+        family(values[i % len(values)], values[(i * 7 + 3) % len(values)],
+               fvalues[i % len(fvalues)], fvalues[(i * 5 + 1) % len(fvalues)])
+    return time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ops', type=int, default=20000, help="number of evaluations per family")
+    parser.add_argument('--families', default=None, help="comma-separated families to run (default: all)")
+    args = parser.parse_args()
+
+    import claripy
+    from claripy.ast import constant_folding
+
+    rng = random.Random(0)
+    values = [ claripy.BVV(rng.getrandbits(32), 32) for _ in range(64) ]
+    fvalues = [ claripy.FPV(rng.uniform(-1000, 1000), claripy.FSORT_DOUBLE) for _ in range(16) ]
+
+    fams = families()
+    names = args.families.split(',') if args.families else list(fams)
+    folders = dict(constant_folding.folders)
+    for name in names:
+        family = fams[name]
+        constant_folding.folders.clear()
+        backend_time = run(family, args.ops, values, fvalues)
+        constant_folding.folders.update(folders)
+        folded_time = run(family, args.ops, values, fvalues)
+        print("%-8s  backends: %.3fs  folded: %.3fs  (%.1fx)" % (
+            name, backend_time, folded_time, backend_time / folded_time
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Conversion of very wide and very deep ASTs into the Z3 and concrete backends.
+
+For every size N, converts a Concat and an And of N arguments, and a chain of N nested operations, with the object
+caches of the backends cleared before every conversion. The conversion itself takes the same time per node for any N,
+but the operations of the backends don't always: Z3 slows down on very deep terms, and the concrete Concat of N
+arguments builds N ever wider integers.
+
+    python benchmarks/bench_convert.py [--sizes N,N,...] [--rounds R]
+"""
+
+import argparse
+import time
+
+def build(n):
+    import claripy
+
+    xs = [ claripy.BVS('x%d' % i, 8) for i in range(n) ]
+    vs = [ claripy.BVV(i, 8) for i in range(n) ]
+    deep_z3 = claripy.BVS('x', 32)
+    deep_concrete = claripy.BVV(1, 32)
+    for i in range(n):
+        deep_z3 = (deep_z3 * 3) - xs[i].zero_extend(24)
+        # built without the eager backends, so that the concrete operations aren't folded away
+        deep_concrete = claripy.ast.BV('__sub__', (
+            claripy.ast.BV('__mul__', (deep_concrete, claripy.BVV(3, 32)), length=32, eager_backends=[ ]),
+            claripy.BVV(i, 32)
+        ), length=32, eager_backends=[ ])
+
+    return {
+        'z3': [
+            ('wide Concat', claripy.Concat(*xs)),
+            ('wide And', claripy.And(*[ x != 0 for x in xs ])),
+            ('deep chain', deep_z3),
+        ],
+        'concrete': [
+            ('wide Concat', claripy.ast.BV('Concat', tuple(vs), length=8 * n, eager_backends=[ ])),
+            ('deep chain', deep_concrete),
+        ],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,2000,4000', help="comma-separated numbers of arguments")
+    parser.add_argument('--rounds', type=int, default=3, help="number of conversions of every AST")
+    args = parser.parse_args()
+
+    import claripy
+
+    for n in map(int, args.sizes.split(',')):
+        for backend_name, exprs in build(n).items():
+            backend = getattr(claripy.backends, backend_name)
+            for name, e in exprs:
+                nodes = sum(1 for _ in e.children_asts()) + 1
+                start = time.time()
+                for _ in range(args.rounds):
+                    backend.downsize()
+                    backend.convert(e)
+                elapsed = (time.time() - start) / args.rounds
+                print("%6d  %-8s  %-11s  %8.3fs  %6.2f us/node" % (
+                    n, backend_name, name, elapsed, elapsed / nodes * 1e6
+                ))
+
+if __name__ == '__main__':
+    main()
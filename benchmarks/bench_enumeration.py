@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Solutions per second of batch_eval(), with point blocking and with the projected enumeration.
+
+Point blocking is how BackendZ3 used to enumerate: after every model, the values of the expressions are read one by
+one, and the tuple is blocked with Not(And(e == v, ...)). The projected enumeration reads and blocks a single
+concatenation of the expressions, and blocks whole cubes of solutions when the models leave bits free. The workloads
+are the resolution of a jump table (the target alone, and along with the index), and values with unconstrained bits.
+
+    python benchmarks/bench_enumeration.py [--entries N]
+"""
+
+import argparse
+import random
+import time
+
+import z3
+
+def point_blocking(backend, solver, exprs, n):
+    # the enumeration that BackendZ3 used to do
+    exprs = [ backend.convert(e) for e in exprs ]
+    results = [ ]
+    checks = 0
+    solver.push()
+    while len(results) < n:
+        checks += 1
+        if solver.check() != z3.sat:
+            break
+        model = solver.model()
+        r = tuple(backend._primitive_from_model(model, e) for e in exprs)
+        results.append(r)
+        if len(exprs) == 1:
+            solver.add(exprs[0] != r[0])
+        else:
+            solver.add(z3.Not(z3.And(*[ e == v for e, v in zip(exprs, r) ])))
+    solver.pop()
+    return results, checks
+
+def projected(backend, solver, exprs, n):
+    from claripy.backends import backend_z3
+
+    count = backend_z3.solve_count
+    results = list(backend.batch_eval_iter(exprs, n, solver=solver))
+    return results, backend_z3.solve_count - count
+
+def workloads(claripy, entries):
+    rng = random.Random(0)
+    index = claripy.BVS('index', 64)
+    table = [ 0x400000 + rng.getrandbits(20) * 4 for _ in range(entries) ]
+    target = claripy.BVV(0, 64)
+    for i in reversed(range(entries)):
+        target = claripy.If(index == i, claripy.BVV(table[i], 64), target)
+    jump = [ claripy.ULT(index, entries) ]
+
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    loose = [ claripy.ULT(x, 16) ]
+
+    return [
+        ('jump target', jump, [ target ], entries + 1),
+        ('jump index+target', jump, [ index, target ], entries + 1),
+        ('free bits', loose, [ claripy.Concat(x[3:0], y[5:0]) ], 1025),
+        ('free bits, 3 exprs', loose, [ x, y[2:0], y[5:3] ], 1025),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=64, help="number of entries of the jump table")
+    args = parser.parse_args()
+
+    import claripy
+    from claripy.backends import BackendZ3
+
+    for name, constraints, exprs, n in workloads(claripy, args.entries):
+        runs = [ ]
+        for engine in (point_blocking, projected):
+            backend = BackendZ3()
+            solver = z3.Solver()
+            solver.add(*[ backend.convert(c) for c in constraints ])
+            start = time.time()
+            results, checks = engine(backend, solver, exprs, n)
+            runs.append((time.time() - start, checks, sorted(results)))
+
+        assert runs[0][2] == runs[1][2], name
+        (point, point_checks, results), (proj, proj_checks, _) = runs
+        print("%-20s %5d solutions  points: %5d checks %8.0f/s  projected: %5d checks %8.0f/s  (%.1fx)" % (
+            name, len(results), point_checks, len(results) / point, proj_checks, len(results) / proj, point / proj
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Simplification along a deep path: a solver that gets a few constraints at every step and is simplified after each one.
+
+    python benchmarks/bench_incremental_simplify.py [--steps N] [--per-step N]
+"""
+
+import argparse
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--steps', type=int, default=300, help="number of steps of the path")
+    parser.add_argument('--per-step', type=int, default=2, help="number of constraints added at every step")
+    args = parser.parse_args()
+
+    import claripy
+
+    xs = [ claripy.BVS('x%d' % i, 32) for i in range(args.steps) ]
+    s = claripy.Solver()
+    start = time.time()
+    last = start
+    for i, x in enumerate(xs):
+        prev = xs[i - 1] if i else x
+        cs = [ claripy.ULT(x, prev + 0x100), x & 0xf != i & 0xf ][:args.per_step]
+        if i % 10 == 0:
+            cs.append(x == i)
+        s.add(cs)
+        s.simplify()
+        if (i + 1) % 50 == 0:
+            now = time.time()
+            print("steps %4d-%4d: %6.2f ms/step  (%d constraints)" % (
+                i - 48, i + 1, (now - last) * 1000 / 50, len(s.constraints)
+            ))
+            last = now
+    print("total: %.3fs" % (time.time() - start))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Solver calls and time of min() and max() on pointer and size constraints.
+
+A buffer of `size` 8-byte elements is allocated at an aligned, symbolic `base` in the upper half of the address space,
+and a symbolic index into it is bounded by the size, as in a symbolic execution that resolves a symbolic pointer: the
+bounds of the pointer, the index, the size and a signed offset are then queried. The plain binary search halves the
+range of values with one check per bit. The model-guided search moves its bounds to the values in the models that
+the solver returns, and the Optimize mode hands the objective over to Z3.
+
+    python benchmarks/bench_min_max.py [--buffers N]
+"""
+
+import argparse
+import time
+
+import z3
+
+def plain_extremum(solver, expr, maximize):
+    # the binary search that BackendZ3 used to do: one check for every bit of the value, and one more at the end
+    checks = 0
+    lo, hi = 0, 2**expr.size() - 1
+    while hi - lo > 1:
+        middle = (lo + hi) // 2
+        solver.push()
+        if maximize:
+            solver.add(z3.UGT(expr, middle), z3.ULE(expr, hi))
+        else:
+            solver.add(z3.UGE(expr, lo), z3.ULE(expr, middle))
+        checks += 1
+        sat = solver.check() == z3.sat
+        solver.pop()
+        if sat == maximize:
+            lo = middle
+        else:
+            hi = middle
+
+    solver.push()
+    solver.add(expr == (hi if maximize else lo))
+    checks += 1
+    sat = solver.check() == z3.sat
+    solver.pop()
+    if maximize:
+        return (hi if sat else lo), checks
+    return (lo if sat else hi), checks
+
+def buffer_constraints(claripy, n):
+    base = claripy.BVS('base%d' % n, 64)
+    size = claripy.BVS('size%d' % n, 64)
+    index = claripy.BVS('index%d' % n, 64)
+    ptr = base + index * 8
+    constraints = [
+        claripy.UGE(base, 0x7ff000000000 + n * 0x100000),
+        claripy.ULT(base, 0x7ff000000000 + n * 0x100000 + 0x80000),
+        base & 0xf == 0,
+        claripy.UGT(size, 0), claripy.ULE(size, 0x1000 + n),
+        claripy.ULT(index, size),
+    ]
+    offset = claripy.Extract(31, 0, index) - 16
+    queries = [ (ptr, False), (index, False), (size, False), (offset, True) ]
+    return constraints, queries
+
+def run_plain(claripy, constraints, queries):
+    from claripy.backends import BackendZ3
+
+    backend = BackendZ3()
+    solver = z3.Solver()
+    solver.add(*[ backend.convert(c) for c in constraints ])
+
+    results, checks = [ ], 0
+    start = time.time()
+    for e, signed in queries:
+        expr = backend.convert(e)
+        for maximize in (False, True):
+            if signed:
+                # the plain search only handles unsigned values
+                flipped = expr ^ (1 << (expr.size() - 1))
+                v, n = plain_extremum(solver, flipped, maximize)
+                v ^= 1 << (expr.size() - 1)
+                v = v - (1 << expr.size()) if v >> (expr.size() - 1) else v
+            else:
+                v, n = plain_extremum(solver, expr, maximize)
+            results.append(v)
+            checks += n
+    return time.time() - start, checks, results
+
+def run_frontend(claripy, constraints, queries, optimize):
+    from claripy.backends import BackendZ3, backend_z3
+
+    s = claripy.frontends.FullFrontend(BackendZ3(optimize_min_max=optimize))
+    s.add(constraints)
+    s.satisfiable()
+
+    results = [ ]
+    count = backend_z3.solve_count
+    start = time.time()
+    for e, signed in queries:
+        results.append(s.min(e, signed=signed))
+        results.append(s.max(e, signed=signed))
+    return time.time() - start, backend_z3.solve_count - count, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--buffers', type=int, default=10, help="number of buffers to query")
+    args = parser.parse_args()
+
+    import claripy
+
+    totals = { }
+    for n in range(args.buffers):
+        constraints, queries = buffer_constraints(claripy, n)
+        runs = {
+            'plain': run_plain(claripy, constraints, queries),
+            'guided': run_frontend(claripy, constraints, queries, False),
+            'optimize': run_frontend(claripy, constraints, queries, True),
+        }
+        results = runs['plain'][2]
+        for name, (elapsed, checks, r) in runs.items():
+            assert r == results, (name, r, results)
+            total = totals.setdefault(name, [ 0., 0 ])
+            total[0] += elapsed
+            total[1] += checks
+
+    queries = args.buffers * 8
+    for name, (elapsed, checks) in totals.items():
+        print("%-9s %4d queries  %6d solver calls  %5.1f per query  %.3fs" % (
+            name, queries, checks, checks / queries, elapsed
+        ))
+
+if __name__ == '__main__':
+    main()
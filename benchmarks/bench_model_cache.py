@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Filtering and evaluation of the cached models of a solver, one model at a time and all at once.
+
+The solver is given K cached models over a handful of 32-bit variables. Then the models are filtered with new
+constraints (as in add()), and expressions are evaluated on them (as in eval() and batch_eval()).
+
+    python benchmarks/bench_model_cache.py [--models K,K,...] [--rounds N]
+"""
+
+import argparse
+import random
+import time
+
+def setup(k, rng):
+    import claripy
+    from claripy.frontend_mixins.model_cache_mixin import ModelCache
+
+    xs = [ claripy.BVS('x%d' % i, 32, explicit_name=True) for i in range(6) ]
+    s = claripy.Solver()
+    s._models = { ModelCache({ x.args[0]: rng.getrandbits(32) for x in xs }) for _ in range(k) }
+    constraints = [
+        claripy.ULT(xs[0] + xs[1], 0xc0000000),
+        claripy.Or(xs[2] & 0xff != 0x10, claripy.SLT(xs[3], 0)),
+        claripy.If(xs[4] > xs[5], xs[4] - xs[5], xs[5] - xs[4]) != 7,
+    ]
+    exprs = [
+        claripy.Concat(xs[0][15:0], xs[1][31:16]) ^ (xs[2] << 3),
+        claripy.LShR(xs[3], 5) * 9 + claripy.ZeroExt(24, xs[4][7:0]),
+    ]
+    return s, constraints, exprs
+
+def run(s, constraints, exprs, rounds):
+    start = time.time()
+    for _ in range(rounds):
+        set(s._get_models(extra_constraints=constraints))
+        s._get_batch_solutions(exprs, extra_constraints=constraints[:1])
+    return time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', default='4,8,16,64,256', help="comma-separated numbers of cached models")
+    parser.add_argument('--rounds', type=int, default=20, help="number of rounds of filtering and evaluation")
+    args = parser.parse_args()
+
+    from claripy.ast import vectorized
+    from claripy.frontend_mixins import model_cache_mixin
+
+    if not vectorized.available:
+        print("NumPy is not installed")
+        return
+
+    threshold = model_cache_mixin._MIN_VECTORIZED_MODELS
+    for k in map(int, args.models.split(',')):
+        s, constraints, exprs = setup(k, random.Random(k))
+        model_cache_mixin._MIN_VECTORIZED_MODELS = float('inf')
+        one_by_one = run(s, constraints, exprs, args.rounds)
+        model_cache_mixin._MIN_VECTORIZED_MODELS = 0
+        at_once = run(s, constraints, exprs, args.rounds)
+        model_cache_mixin._MIN_VECTORIZED_MODELS = threshold
+        print("%4d models  one by one: %.3fs  all at once: %.3fs  (%.1fx)" % (
+            k, one_by_one, at_once, one_by_one / at_once
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Call throughput of AST operations, and the per-operation profile of a mixed workload.
+
+The ASTs are kept alive, so that after the first round the operations mostly hit the hash-consing cache and the
+measurement is dominated by the dispatch in claripy.operations.
+
+    python benchmarks/bench_op_dispatch.py [--rounds N] [--top K]
+"""
+
+import argparse
+import time
+
+def workload(x, y, keep):
+    import claripy
+
+    keep.append(x + y)
+    keep.append(x + 1)
+    keep.append(x == y)
+    keep.append(claripy.ULT(x, 10))
+    keep.append(claripy.Concat(x, y))
+    keep.append(x[7:0])
+    keep.append(claripy.ZeroExt(32, y))
+    keep.append(claripy.If(x == 0, x, y))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20000, help="number of rounds of the workload")
+    parser.add_argument('--top', type=int, default=10, help="number of operations to show in the profile")
+    args = parser.parse_args()
+
+    import claripy
+
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    keep = [ ]
+    workload(x, y, keep)
+
+    start = time.time()
+    for _ in range(args.rounds):
+        workload(x, y, keep)
+        del keep[8:]
+    elapsed = time.time() - start
+    print("%d rounds: %.3fs  (%.0f operations/s)" % (args.rounds, elapsed, args.rounds * 8 / elapsed))
+
+    claripy.set_op_profiling(True)
+    for _ in range(args.rounds):
+        workload(x, y, keep)
+        del keep[8:]
+    stats = claripy.op_stats()
+    claripy.set_op_profiling(False)
+
+    print("%-14s %9s %9s %9s" % ('operation', 'calls', 'coerced', 'time'))
+    for name, s in sorted(stats.items(), key=lambda i: -i[1]['time'])[:args.top]:
+        print("%-14s %9d %9d %8.3fs" % (name, s['calls'], s['coerced'], s['time']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Throughput of independent solves, with BackendZ3 in this process and with the worker processes of BackendZ3Parallel.
+
+The workload is a set of states that share a common prefix of constraints, as the states of a symbolic execution do,
+and each add a few constraints of their own. Every state asks for its satisfiability, and for the maximum of a value
+if it is satisfiable.
+BackendZ3 solves the states one after the other, and BackendZ3Parallel gets all of their solves submitted at once.
+
+    python benchmarks/bench_parallel_solving.py [--states N] [--processes N]
+"""
+
+import argparse
+import os
+import time
+
+def states(claripy, n):
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    z = claripy.BVS('z', 32)
+    prefix = [ claripy.ULT(x, 1 << 20), claripy.ULT(y, 1 << 20), (x * y) & 0xfff == 0x123 ]
+    r = [ ]
+    for i in range(n):
+        own = [ (x ^ y) & 0xff0 == (i * 16) & 0xff0, z == x * (i + 1) + y ]
+        r.append((prefix + own, z))
+    return r
+
+def run_serial(claripy, workload):
+    from claripy.backends import BackendZ3
+
+    backend = BackendZ3()
+    results = [ ]
+    start = time.time()
+    for constraints, e in workload:
+        s = backend.solver()
+        backend.add(s, constraints)
+        sat = backend.satisfiable(solver=s)
+        results.append((sat, backend.max(e, solver=s) if sat else None))
+    return time.time() - start, results
+
+def run_parallel(claripy, workload, processes):
+    from claripy.backends import BackendZ3Parallel
+
+    backend = BackendZ3Parallel(processes=processes)
+    # the workers start with the first solve
+    warm = backend.solver()
+    backend.add(warm, [ claripy.BoolV(True) ])
+    backend.satisfiable(solver=warm)
+
+    start = time.time()
+    requests = [ ]
+    for constraints, e in workload:
+        s = backend.solver()
+        backend.add(s, constraints)
+        requests.append((backend.submit('satisfiable', s), s, e))
+    maxima = [ backend.submit('max', s, exprs=(e,)) if sat.result() else None for sat, s, e in requests ]
+    results = [ (sat.result(), m.result() if m is not None else None) for (sat, _, _), m in zip(requests, maxima) ]
+    elapsed = time.time() - start
+
+    stats = backend.pool.stats()
+    backend.shutdown()
+    return elapsed, results, stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--states', type=int, default=32, help="number of states")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    import claripy
+
+    workload = states(claripy, args.states)
+    serial, serial_results = run_serial(claripy, workload)
+    parallel, parallel_results, stats = run_parallel(claripy, workload, args.processes)
+    assert serial_results == parallel_results
+
+    solves = sum(2 if sat else 1 for sat, _ in serial_results)
+    print("%d states, %d solves  serial: %.3fs  %d processes: %.3fs  (%.1fx)" % (
+        args.states, solves, serial, args.processes, parallel, serial / parallel
+    ))
+    print("%d batches, %d constraints sent, %d reused, %d asserted by the workers" % (
+        stats['batches'], stats['sent'], stats['reused'], stats['asserted']
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""
+Replacement throughput of replace_dict_many() against one replace_dict() per AST.
+
+Builds `--constraints` constraints that all extend a shared expression chain over one variable, and replaces the
+per-constraint variables (which leave the shared chain unchanged) in all of them.
+
+    python benchmarks/bench_replace_dict.py [--constraints N]
+"""
+
+import argparse
+import time
+
+def build(n):
+    import claripy
+
+    x = claripy.BVS('x', 32)
+    chain = x
+    constraints = [ ]
+    replacements = { }
+    for i in range(n):
+        chain = (chain * 3) ^ (chain >> 1)
+        y = claripy.BVS('y%d' % i, 32)
+        constraints.append(chain + y != 0)
+        replacements[y.cache_key] = claripy.BVV(i, 32)
+    return constraints, replacements
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--constraints', type=int, default=1000, help="number of constraints")
+    args = parser.parse_args()
+
+    import claripy
+
+    constraints, replacements = build(args.constraints)
+
+    start = time.time()
+    shared = dict(replacements)
+    one = [ c.replace_dict(shared) for c in constraints ]
+    one_time = time.time() - start
+
+    start = time.time()
+    many = claripy.replace_dict_many(constraints, dict(replacements))
+    many_time = time.time() - start
+
+    assert all(a is b for a, b in zip(one, many))
+    print("%d constraints  replace_dict: %.3fs  replace_dict_many: %.3fs  (%.1fx)" % (
+        len(constraints), one_time, many_time, one_time / many_time
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Conversion of the same ASTs by several threads, with an object cache per thread and with a shared one.
+
+Every thread converts the same `--exprs` ASTs into the concrete backend, `--rounds` times. With an object cache per
+thread, every thread converts every AST once; with the shared cache, the ASTs are converted once for all threads.
+
+    python benchmarks/bench_shared_object_cache.py [--threads T] [--exprs N] [--rounds R]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+def build(n, rng):
+    import claripy
+
+    exprs = [ ]
+    for _ in range(n):
+        # built without the eager backends, so that they are converted by convert()
+        e = claripy.BVV(rng.getrandbits(32), 32)
+        for _ in range(20):
+            op = rng.choice([ '__add__', '__xor__', '__mul__' ])
+            e = claripy.ast.BV(op, (e, claripy.BVV(rng.getrandbits(32), 32)), length=32, eager_backends=[ ])
+        exprs.append(e)
+    return exprs
+
+def run(backend, exprs, threads, rounds):
+    def work():
+        for _ in range(rounds):
+            for e in exprs:
+                backend.convert(e)
+
+    backend.downsize()
+    workers = [ threading.Thread(target=work) for _ in range(threads) ]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help="number of threads")
+    parser.add_argument('--exprs', type=int, default=2000, help="number of ASTs")
+    parser.add_argument('--rounds', type=int, default=3, help="number of conversions of every AST by every thread")
+    args = parser.parse_args()
+
+    import claripy
+
+    bc = claripy.backends.concrete
+    exprs = build(args.exprs, random.Random(0))
+
+    # the concrete backend keeps no object cache of its own, so give it one per thread to compare against
+    bc._cache_objects = True
+    per_thread = run(bc, exprs, args.threads, args.rounds)
+    bc._cache_objects = False
+
+    bc.enable_shared_object_cache()
+    shared = run(bc, exprs, args.threads, args.rounds)
+    stats = bc.object_cache_stats()
+    bc.disable_shared_object_cache()
+
+    print("%d threads, %d ASTs  per-thread cache: %.3fs  shared cache: %.3fs  (%.1fx)" % (
+        args.threads, len(exprs), per_thread, shared, per_thread / shared
+    ))
+    print("shared cache: %(hits)d hits, %(misses)d misses, %(size)d objects" % stats)
+
+if __name__ == '__main__':
+    main()
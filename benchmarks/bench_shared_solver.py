@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Solving on the branches of a frontend, with a solver per branch and with a solver shared by the branches.
+
+A frontend gets `--constraints` constraints, and then branches, as a symbolic execution does at every fork: every
+branch adds a few constraints of its own and checks its satisfiability, and one of them branches again, `--depth`
+times. Without sharing, every branch that adds constraints asserts all of its constraints in a fresh solver.
+
+    python benchmarks/bench_shared_solver.py [--constraints N] [--branches B] [--depth D]
+"""
+
+import argparse
+import random
+import time
+
+def run(share_solver, base, branch_constraints, depth):
+    import claripy
+
+    s = claripy.frontends.FullFrontend(claripy.backends.z3, share_solver=share_solver)
+    s.add(base)
+    results = [ ]
+    start = time.time()
+    for level in range(depth):
+        branches = [ ]
+        for constraints in branch_constraints[level]:
+            b = s.branch()
+            b.add(constraints)
+            results.append(b.satisfiable())
+            branches.append(b)
+        s = branches[0]
+    return time.time() - start, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--constraints', type=int, default=100, help="number of constraints before branching")
+    parser.add_argument('--branches', type=int, default=4, help="number of branches at every fork")
+    parser.add_argument('--depth', type=int, default=5, help="number of forks")
+    args = parser.parse_args()
+
+    import claripy
+
+    rng = random.Random(0)
+    xs = [ claripy.BVS('x%d' % i, 32) for i in range(40) ]
+
+    def constraint():
+        a, b = rng.sample(xs, 2)
+        return claripy.ULE(a + b * rng.randrange(1, 8), rng.getrandbits(32) | 0x80000000)
+
+    base = [ constraint() for _ in range(args.constraints) ]
+    branch_constraints = [
+        [ [ constraint() for _ in range(3) ] for _ in range(args.branches) ] for _ in range(args.depth)
+    ]
+
+    fresh, fresh_results = run(False, base, branch_constraints, args.depth)
+    shared, shared_results = run(True, base, branch_constraints, args.depth)
+
+    assert fresh_results == shared_results
+    print("%d branches of %d constraints  solver per branch: %.3fs  shared solver: %.3fs  (%.1fx)" % (
+        len(fresh_results), args.constraints, fresh, shared, fresh / shared
+    ))
+
+if __name__ == '__main__':
+    main()
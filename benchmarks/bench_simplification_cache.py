@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Repeated simplification of mostly-unchanged sets of constraints, with and without the simplification cache.
+
+Each round simplifies the same constraints again, plus a few new ones, as happens when the states of an analysis are
+simplified over and over.
+
+    python benchmarks/bench_simplification_cache.py [--constraints N] [--rounds N] [--kinds z3,rewrite]
+"""
+
+import argparse
+import time
+
+def constraints(n):
+    import claripy
+
+    xs = [ claripy.BVS('x%d' % i, 32) for i in range(n) ]
+    return [ claripy.And(claripy.ULT(x + i, 0x1000), (x ^ 0xff) != i, claripy.Not(claripy.Not(x[7:0] == i & 0xff)))
+             for i, x in enumerate(xs) ]
+
+def unsimplified(n):
+    import claripy
+
+    # built without the simplifications applied, for rewrite()
+    xs = [ claripy.BVS('y%d' % i, 32) for i in range(n) ]
+    return [ x.make_like('__add__', (x.make_like('Reverse', (x.make_like('Reverse', (x,), length=32),), length=32),
+                                     x.make_like('__xor__', (x, x), length=32)), length=32)
+             for x in xs ]
+
+def run(kind, exprs, rounds, fresh):
+    import claripy
+    from claripy.simplifications import simpleton
+
+    simplify = claripy.simplify if kind == 'z3' else simpleton.rewrite
+    start = time.time()
+    for r in range(rounds):
+        for e in exprs:
+            simplify(e)
+        for e in fresh[r]:
+            simplify(e)
+    return time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--constraints', type=int, default=200, help="number of constraints")
+    parser.add_argument('--rounds', type=int, default=20, help="number of rounds of simplification")
+    parser.add_argument('--kinds', default='z3,rewrite', help="comma-separated kinds of simplification")
+    args = parser.parse_args()
+
+    import claripy
+
+    for kind in args.kinds.split(','):
+        make = constraints if kind == 'z3' else unsimplified
+        exprs = make(args.constraints)
+        fresh = [ make(args.constraints + 5 * (r + 1))[-5:] for r in range(args.rounds) ]
+
+        claripy.set_simplification_cache_size(0)
+        uncached = run(kind, exprs, args.rounds, fresh)
+        claripy.set_simplification_cache_size(100000)
+        claripy.simplification_cache.simplification_cache.reset_stats()
+        cached = run(kind, exprs, args.rounds, fresh)
+        stats = claripy.simplification_cache_stats()
+        print("%-8s  uncached: %.3fs  cached: %.3fs  (%.1fx, hit rate %.0f%%)" % (
+            kind, uncached, cached, uncached / cached, 100. * stats['hits'] / max(stats['hits'] + stats['misses'], 1)
+        ))
+
+if __name__ == '__main__':
+    main()
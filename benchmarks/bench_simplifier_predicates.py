@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""
+Cost of the simplifier on bit-manipulation expressions: time and number of ASTs created per expression.
+
+The simplifications of ==, !=, -, ^, &, | and the shifts decide whether they apply by asking questions such as "are
+these two operands equal?" or "is this shift amount zero?". The number of newly interned ASTs includes the ones that
+were built only to answer those questions.
+
+    python benchmarks/bench_simplifier_predicates.py [--rounds N]
+"""
+
+import argparse
+import time
+
+def expressions(i):
+    import claripy
+
+    c = claripy.BVS('c', 8)
+    x = claripy.BVS('x', 32)
+    k = claripy.BVV(i & 0xff, 8)
+    wide = claripy.Concat(c, claripy.BVV(i, 24))
+    zext = claripy.ZeroExt(24, c)
+    yield wide == claripy.Concat(c, claripy.BVV(i + 1, 24))
+    yield wide != claripy.Concat(k, c, claripy.BVV(i, 16))
+    yield zext == claripy.BVV(i | 0x100, 32)
+    yield zext != claripy.Concat(claripy.BVV(i, 16), c, k)
+    yield claripy.Concat(k, x[23:0]) - claripy.Concat(k, x[23:0])
+    yield (x & 0xffffffff) ^ (x | claripy.BVV(i, 32))
+    yield claripy.LShR(zext, claripy.BVV(i % 40, 32))
+    yield (claripy.Concat(claripy.BVV(0, 16), x[15:0]) << 16) & claripy.BVV(i, 32)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000, help="number of rounds of expressions")
+    args = parser.parse_args()
+
+    import claripy
+
+    n = 0
+    inserts = claripy.intern_stats()['inserts']
+    start = time.time()
+    for i in range(args.rounds):
+        for _ in expressions(i):
+            n += 1
+    elapsed = time.time() - start
+    inserts = claripy.intern_stats()['inserts'] - inserts
+    print("%d expressions: %.3fs  (%.1f us/expression, %.1f new ASTs/expression)" % (
+        n, elapsed, elapsed / n * 1e6, inserts / n
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,7 @@ l.addHandler(logging.NullHandler())
 from .errors import *
 from . import operations
 from . import ops as _all_operations
+from . import simplification_cache
 
 # This is here for later, because we'll fuck the namespace in a few lines
 from . import backends as _backends_module
@@ -75,6 +76,69 @@ backends = _backend_manager.backends
 
 def downsize():
     backends.downsize()
+    ast.base.Base._hash_cache.downsize()
+    simplification_cache.simplification_cache.clear()
+    ast.variable_set.reclaim_variable_ids()
+
+def intern_stats(by_class=False, by_op=False):
+    """
+    Returns statistics about the table of hash-consed ASTs: the number of live ASTs, lookup hits and misses, inserts,
+    and the state of the generational mode.
+
+    :param by_class:    Also count the live ASTs per AST class.
+    :param by_op:       Also count the live ASTs per operation.
+    """
+    return ast.base.Base._hash_cache.stats(by_class=by_class, by_op=by_op)
+
+def set_intern_generations(generations, generation_size=None):
+    """
+    Makes the AST intern table keep ASTs that were used during the last `generations` generations alive. Older ASTs
+    are only kept alive by their other references. Pass None to disable the generational mode.
+
+    :param generations:     The number of generations, or None.
+    :param generation_size: Start a new generation automatically after this many AST lookups.
+    """
+    ast.base.Base._hash_cache.set_generations(generations, generation_size=generation_size)
+
+def advance_intern_generation():
+    """
+    Starts a new generation of the AST intern table.
+    """
+    ast.base.Base._hash_cache.advance_generation()
+
+def set_op_profiling(enabled):
+    """
+    Enables or disables the per-operation profiling of AST operations (call counts and time spent). Enabling it resets
+    the collected statistics.
+    """
+    operations.set_op_profiling(enabled)
+
+def op_stats():
+    """
+    Returns the per-operation profile collected since set_op_profiling(True): a dict mapping each operation to its
+    number of calls, the number of calls that needed their arguments coerced, and the time spent in it.
+    """
+    return operations.op_stats()
+
+def rule_stats():
+    """
+    Returns, for every simplification rule, the number of times it was tried and the number of times it applied.
+    """
+    return simplifications.simpleton.rule_stats()
+
+def simplification_cache_stats():
+    """
+    Returns the statistics of the cache of simplification results: hits, misses, evictions, its size and maximum size,
+    and the hits and misses of every kind of simplification ('z3' for the solver backend, 'rewrite' for
+    simpleton.rewrite()).
+    """
+    return simplification_cache.simplification_cache.stats()
+
+def set_simplification_cache_size(maxsize):
+    """
+    Sets the number of simplification results to keep. 0 disables the cache.
+    """
+    simplification_cache.simplification_cache.resize(maxsize)
 
 #
 # Frontends
@@ -1,3 +1,8 @@
+import itertools
+import os
+import threading
+import weakref
+
 class Annotation:
     """
     Annotations are used to achieve claripy's goal of being an arithmetic instrumentation engine.
@@ -49,6 +54,95 @@ class Annotation:
         """
         return self
 
+    def __reduce_ex__(self, protocol):
+        # unpickled in this process (or a fork of it) while it is alive, the annotation is itself again, so that the
+        # ASTs that it annotates are hash-consed with the live ones. Copies of it are itself, too.
+        reduced = super().__reduce_ex__(protocol)
+        serial = _pickle_serial(self)
+        if serial is None or not isinstance(reduced, tuple):
+            return reduced
+        # the iterators of the list and dict items don't pickle
+        reduced = tuple(list(r) if i >= 3 and r is not None else r for i, r in enumerate(reduced))
+        return _load_annotation, (_PROCESS, serial, reduced)
+
+    def __deepcopy__(self, memo):
+        # annotations are immutable
+        return self
+
+    def __copy__(self):
+        return self
+
+#
+# Pickling
+#
+
+# the process that serials are valid in
+_PROCESS = os.urandom(8)
+_serials = itertools.count()
+_serial_lock = threading.Lock()
+# id of a pickled annotation -> (a weak reference to it, its serial), and serial -> the weak reference
+_serial_by_id = { }
+_by_serial = { }
+
+def _pickle_serial(annotation):
+    """
+    Returns the serial of an annotation in its pickles, or None if it can't be referred to weakly.
+    """
+    key = id(annotation)
+    entry = _serial_by_id.get(key, None)
+    if entry is not None and entry[0]() is annotation:
+        return entry[1]
+
+    with _serial_lock:
+        entry = _serial_by_id.get(key, None)
+        if entry is not None and entry[0]() is annotation:
+            return entry[1]
+        serial = next(_serials)
+
+        def _forget(r):
+            if _serial_by_id.get(key, (None,))[0] is r:
+                del _serial_by_id[key]
+            _by_serial.pop(serial, None)
+
+        try:
+            r = weakref.ref(annotation, _forget)
+        except TypeError:
+            return None
+        _serial_by_id[key] = (r, serial)
+        _by_serial[serial] = r
+        return serial
+
+def _load_annotation(process, serial, reduced):
+    if process == _PROCESS:
+        r = _by_serial.get(serial, None)
+        annotation = r() if r is not None else None
+        if annotation is not None:
+            return annotation
+
+    # the steps of pickle's reduce protocol
+    annotation = reduced[0](*reduced[1])
+    state = reduced[2] if len(reduced) > 2 else None
+    if state is not None:
+        setstate = getattr(annotation, '__setstate__', None)
+        if setstate is not None:
+            setstate(state)
+        else:
+            slotstate = None
+            if isinstance(state, tuple) and len(state) == 2:
+                state, slotstate = state
+            if state:
+                annotation.__dict__.update(state)
+            if slotstate:
+                for k, v in slotstate.items():
+                    setattr(annotation, k, v)
+    if len(reduced) > 3 and reduced[3] is not None:
+        for item in reduced[3]:
+            annotation.append(item)
+    if len(reduced) > 4 and reduced[4] is not None:
+        for k, v in reduced[4]:
+            annotation[k] = v
+    return annotation
+
 #
 # Some built-in annotations
 #
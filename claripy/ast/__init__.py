@@ -10,9 +10,10 @@ true = lambda *args, **kwargs: None
 false = lambda *args, **kwargs: None
 String = lambda *args, **kwargs: None
 all_operations = None
+compile = lambda *args, **kwargs: None
 
 def _import():
-    global Bits, BV, VS, FP, Bool, Int, Base, String, true, false, all_operations
+    global Bits, BV, VS, FP, Bool, Int, Base, String, true, false, all_operations, compile
 
     from .bits import Bits
     from .bv import BV
@@ -23,3 +24,4 @@ def _import():
     from .base import Base
     from .strings import String
     from .. import ops as all_operations
+    from .compiler import compile
@@ -1,26 +1,35 @@
 import hashlib
 import itertools
 import logging
+import operator
 import os
 import struct
-import weakref
-from collections import OrderedDict, deque
+from collections import OrderedDict
 
 try:
     import cPickle as pickle
 except ImportError:
     import pickle
 
+from .intern_table import InternTable
+from .variable_set import VariableSet, EMPTY_VARIABLES, variable_mask
+
 l = logging.getLogger("claripy.ast")
 
 WORKER = bool(os.environ.get('WORKER', False))
 md5_unpacker = struct.Struct('2Q')
 
+# The hash-consing algorithm. 'fast' combines the cached 64-bit hashes of the children with a mixing function, 'md5'
+# is the original (and much slower) pickle+md5 digest. Switch with set_hash_mode() before any AST is created.
+HASH_MODE = os.environ.get('CLARIPY_HASH_MODE', 'fast')
+
 #pylint:enable=unused-argument
 #pylint:disable=unidiomatic-typecheck
 
 
 class ASTCacheKey:
+    __slots__ = ('ast', '__weakref__')
+
     def __init__(self, a):
         self.ast = a
 
@@ -51,9 +60,93 @@ def _d(h, cls, state):
     This function is the deserializer for ASTs.
     It exists to work around the fact that pickle will (normally) call __new__() with no arguments during deserialization.
     For ASTs, this does not work.
+
+    The hash `h` is ignored (and None in the pickles written by now): it is salted per process, and names the slot of
+    the hash-cons cache that the AST had, which may hold a different AST by the time it is loaded. The AST is rehashed.
     """
     op, args, length, variables, symbolic, annotations = state
-    return cls.__new__(cls, op, args, length=length, variables=variables, symbolic=symbolic, annotations=annotations, hash=h)
+    return cls.__new__(cls, op, args, length=length, variables=variables, symbolic=symbolic, annotations=annotations)
+
+#
+# Hash-consing
+#
+
+_MASK64 = 0xffffffffffffffff
+_MIX_MULTIPLIER = 0x9e3779b97f4a7c15
+
+# hashes that had a collision, mapped to the length of their probe chain
+_hash_collisions = { }
+
+_double = struct.Struct('<d')
+
+def _same_arg(a, b):
+    if a is b:
+        return True
+    if type(a) is not type(b) or isinstance(a, Base):
+        return False
+    if type(a) is float:
+        # 0.0 == -0.0, and NaN != NaN
+        return _double.pack(a) == _double.pack(b)
+    return a == b
+
+def _mix64(h):
+    """
+    The splitmix64 finalizer. Spreads the entropy of a 64-bit integer over all of its bits.
+    """
+    h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return h ^ (h >> 31)
+
+def _rehash(h, i):
+    return _mix64((h + i * _MIX_MULTIPLIER) & _MASK64)
+
+def _calc_hash_md5(op, args, keywords):
+    """
+    Calculates the hash of an AST by pickling its attributes and hashing them with md5.
+
+    We do it using md5 to avoid hash collisions.
+    (hash(-1) == hash(-2), for example)
+    """
+    args_tup = tuple(a if type(a) in (int, float) else hash(a) for a in args)
+    # HASHCONS: these attributes key the cache
+    # BEFORE CHANGING THIS, SEE ALL OTHER INSTANCES OF "HASHCONS" IN THIS FILE
+    to_hash = (
+        op, args_tup,
+        str(keywords.get('length', None)),
+        hash(keywords['variables']),
+        keywords['symbolic'],
+        hash(keywords.get('annotations', None)),
+    )
+
+    # Why do we use md5 when it's broken? Because speed is more important
+    # than cryptographic integrity here. Then again, look at all those
+    # allocations we're doing here... fast python is painful.
+    hd = hashlib.md5(pickle.dumps(to_hash, -1)).digest()
+    return md5_unpacker.unpack(hd)[0] # 64 bits
+
+def _calc_hash_fast(op, args, keywords):
+    """
+    Calculates the hash of an AST by combining the cached hashes of its children (Base.__hash__() returns them) with
+    its op, length, variables and annotations, using the builtin tuple hash as the mixing function. This is not
+    collision-resistant, so Base.__new__() checks hits against the interned AST.
+    """
+    # HASHCONS: these attributes key the cache
+    # BEFORE CHANGING THIS, SEE ALL OTHER INSTANCES OF "HASHCONS" IN THIS FILE
+    if op == 'FPV' and type(args[0]) is float:
+        # the value is hashed by its bits, which _same_arg() compares: hash(0.0) == hash(-0.0), and NaNs hash by id
+        args = (_double.pack(args[0]),) + args[1:]
+    return hash((
+        op, args,
+        keywords.get('length', None),
+        keywords['variables'],
+        keywords['symbolic'],
+        keywords.get('annotations', None),
+    )) & _MASK64
+
+_hash_functions = {
+    'fast': _calc_hash_fast,
+    'md5': _calc_hash_md5,
+}
 
 class Base:
     """
@@ -74,11 +167,13 @@ class Base:
     :ivar args:         The arguments that are being used
     """
 
+    # _cache_key, _uneliminatable_annotations and _relocatable_annotations may be left unset, in which case they are
+    # created on first access by __getattr__().
     __slots__ = [ 'op', 'args', 'variables', 'symbolic', '_hash', '_simplified', '_cached_encoded_name',
-                  '_cache_key', '_errored', '_eager_backends', 'length', '_excavated', '_burrowed', '_uninitialized',
-                  '_uc_alloc_depth', 'annotations', 'simplifiable', '_uneliminatable_annotations', '_relocatable_annotations',
-                  'depth']
-    _hash_cache = weakref.WeakValueDictionary()
+                  '_cache_key', '_errored', 'length', '_excavated', '_burrowed', '_uninitialized',
+                  '_uc_alloc_depth', 'annotations', '_uneliminatable_annotations', '_relocatable_annotations',
+                  'depth', '__weakref__']
+    _hash_cache = InternTable()
 
     FULL_SIMPLIFY=1
     LITE_SIMPLIFY=2
@@ -105,6 +200,7 @@ class Base:
         :param errored:         A set of backends that are known to be unable to handle this AST.
         :param eager_backends:  A list of backends with which to attempt eager evaluation
         :param annotations:     A frozenset of annotations applied onto this AST.
+        :param hash:            The hash of the AST, as _calc_hash() computes it, if the caller has it already.
         """
 
         #if any(isinstance(a, BackendObject) for a in args):
@@ -112,6 +208,13 @@ class Base:
 
         a_args = args if type(args) is tuple else tuple(args)
 
+        # operations on concrete leaves are folded without going through the eager backends (there are none while
+        # claripy is being imported, before constant_folding is)
+        if 'eager_backends' not in kwargs and backends._eager_backends and op in constant_folding.folders:
+            r = constant_folding.fold(op, a_args)
+            if r is not None:
+                return r
+
         # initialize the following properties: symbolic, variables and errored
         need_symbolic = 'symbolic' not in kwargs
         need_variables = 'variables' not in kwargs
@@ -123,26 +226,33 @@ class Base:
         arg_max_depth = 0
         if need_symbolic or need_variables or need_errored:
             symbolic_flag = False
-            variables_set = set()
-            errored_set = set()
+            variables_set = EMPTY_VARIABLES
+            variables_mask = 0
+            errored_set = _EMPTY_FROZENSET
             for a in a_args:
                 if not isinstance(a, Base): continue
                 if need_symbolic and not symbolic_flag: symbolic_flag |= a.symbolic
-                if need_variables: variables_set |= a.variables
-                if need_errored: errored_set |= a._errored
+                if need_variables and a.variables is not variables_set:
+                    if variables_set is EMPTY_VARIABLES: variables_set = a.variables
+                    else: variables_mask |= a.variables._mask
+                if need_errored and a._errored and a._errored is not errored_set:
+                    errored_set = a._errored if not errored_set else _interned_errored(errored_set | a._errored)
                 if args_have_annotations is not True:
                     args_have_annotations = args_have_annotations or bool(a.annotations)
                 if arg_max_depth < a.depth: arg_max_depth = a.depth
 
             if need_symbolic: kwargs['symbolic'] = symbolic_flag
-            if need_variables: kwargs['variables'] = frozenset(variables_set)
+            if need_variables:
+                kwargs['variables'] = variables_set.union_mask(
+                    variables_mask, parts=(a.variables for a in a_args if isinstance(a, Base))
+                )
             if need_errored: kwargs['errored'] = errored_set
 
-        if type(kwargs['variables']) is not frozenset:  #pylint:disable=unidiomatic-typecheck
-            kwargs['variables'] = frozenset(kwargs['variables'])
+        if type(kwargs['variables']) is not VariableSet:  #pylint:disable=unidiomatic-typecheck
+            kwargs['variables'] = VariableSet.intern(kwargs['variables'])
 
         if add_variables:
-            kwargs['variables'] = kwargs['variables'] | add_variables
+            kwargs['variables'] = kwargs['variables'].union_mask(variable_mask(add_variables))
 
         eager_backends = list(backends._eager_backends) if 'eager_backends' not in kwargs else kwargs['eager_backends']
 
@@ -170,57 +280,82 @@ class Base:
         if 'annotations' not in kwargs:
             kwargs['annotations'] = ()
 
+        # a given hash is checked like a computed one, since another AST may have it
         h = Base._calc_hash(op, a_args, kwargs) if hash is None else hash
         self = cls._hash_cache.get(h, None)
+        if (self is not None and not self._hashcons_matches(op, a_args, kwargs)) or h in _hash_collisions:
+            h, self = Base._probe_collision_chain(h, op, a_args, kwargs)
+
         if self is None:
             self = super(Base, cls).__new__(cls)
             depth = arg_max_depth + 1
             self.__a_init__(op, a_args, depth=depth, args_have_annotations=args_have_annotations, **kwargs)
             self._hash = h
             cls._hash_cache[h] = self
-        # else:
-        #    if self.args != f_args or self.op != f_op or self.variables != f_kwargs['variables']:
-        #        raise Exception("CRAP -- hash collision")
 
         return self
 
     def __reduce__(self):
         # HASHCONS: these attributes key the cache
         # BEFORE CHANGING THIS, SEE ALL OTHER INSTANCES OF "HASHCONS" IN THIS FILE
-        return _d, (self._hash, self.__class__, (self.op, self.args, self.length, self.variables, self.symbolic, self.annotations))
+        # the hash is left out, see _d()
+        return _d, (None, self.__class__, (self.op, self.args, self.length, self.variables, self.symbolic, self.annotations))
 
     def __init__(self, *args, **kwargs):
         pass
 
-    @staticmethod
-    def _calc_hash(op, args, keywords):
-        """
-        Calculates the hash of an AST, given the operation, args, and kwargs.
-
-        :param op:          The operation.
-        :param args:        The arguments to the operation.
-        :param keywords:    A dict including the 'symbolic', 'variables', and 'length' items.
-        :returns:           a hash.
+    # Calculates the hash of an AST, given the operation, args, and kwargs (a dict including the 'symbolic',
+    # 'variables', and 'length' items). One of the functions in `_hash_functions`, see set_hash_mode().
+    _calc_hash = staticmethod(_hash_functions[HASH_MODE])
 
-        We do it using md5 to avoid hash collisions.
-        (hash(-1) == hash(-2), for example)
+    def _hashcons_matches(self, op, args, keywords):
+        """
+        Checks whether this AST is structurally the AST described by the given operation, args, and kwargs. This is
+        used to detect hash collisions against the interned AST.
         """
-        args_tup = tuple(a if type(a) in (int, float) else hash(a) for a in args)
         # HASHCONS: these attributes key the cache
         # BEFORE CHANGING THIS, SEE ALL OTHER INSTANCES OF "HASHCONS" IN THIS FILE
-        to_hash = (
-            op, args_tup,
-            str(keywords.get('length', None)),
-            hash(keywords['variables']),
-            keywords['symbolic'],
-            hash(keywords.get('annotations', None)),
-        )
-
-        # Why do we use md5 when it's broken? Because speed is more important
-        # than cryptographic integrity here. Then again, look at all those
-        # allocations we're doing here... fast python is painful.
-        hd = hashlib.md5(pickle.dumps(to_hash, -1)).digest()
-        return md5_unpacker.unpack(hd)[0] # 64 bits
+        # The length is not compared, since subclasses may rescale it in __init__() (see String).
+        if self.op != op or self.symbolic != keywords['symbolic']:
+            return False
+
+        my_args = self.args
+        if my_args is not args:
+            if len(my_args) != len(args):
+                return False
+            if not all(map(operator.is_, my_args, args)) and not all(map(_same_arg, my_args, args)):
+                return False
+
+        variables = keywords['variables']
+        if self.variables is not variables and self.variables != variables:
+            return False
+
+        annotations = keywords.get('annotations', None)
+        return self.annotations is annotations or self.annotations == annotations
+
+    @staticmethod
+    def _probe_collision_chain(h, op, args, keywords):
+        """
+        Resolves a hash collision by probing a chain of rehashed slots in the hash-cons cache.
+
+        :returns:   A tuple of the hash to use and the AST that lives there (or None, if a new AST should be created).
+        """
+        chain_length = _hash_collisions.get(h, 0)
+        free_slot = None
+        for i in range(chain_length + 1):
+            ch = h if i == 0 else _rehash(h, i)
+            existing = Base._hash_cache.get(ch, None)
+            if existing is None:
+                if free_slot is None:
+                    free_slot = ch
+            elif existing._hashcons_matches(op, args, keywords):
+                return ch, existing
+
+        if free_slot is None:
+            l.debug("Hash collision on %#x, extending the probe chain to %d", h, chain_length + 1)
+            _hash_collisions[h] = chain_length + 1
+            free_slot = _rehash(h, chain_length + 1)
+        return free_slot, None
 
     #pylint:disable=attribute-defined-outside-init
     def __a_init__(self, op, args, variables=None, symbolic=None, length=None, simplified=0, errored=None, eager_backends=None, uninitialized=None, uc_alloc_depth=None, annotations=None, encoded_name=None, depth=None, args_have_annotations=None):  #pylint:disable=unused-argument
@@ -236,49 +371,65 @@ class Base:
         self.op = op
         self.args = args if type(args) is tuple else tuple(args)
         self.length = length
-        self.variables = frozenset(variables) if type(variables) is not frozenset else variables
+        self.variables = VariableSet.intern(variables) if type(variables) is not VariableSet else variables
         self.symbolic = symbolic
         self.annotations = annotations
 
 
         self.depth = depth if depth is not None else 1
 
-        self._eager_backends = eager_backends
         self._cached_encoded_name = encoded_name
 
-        self._errored = errored if errored is not None else set()
+        self._errored = _interned_errored(errored) if errored else _EMPTY_FROZENSET
 
         self._simplified = simplified
-        self._cache_key = ASTCacheKey(self)
         self._excavated = None
         self._burrowed = None
 
         self._uninitialized = uninitialized
         self._uc_alloc_depth = uc_alloc_depth
 
+        # otherwise, the annotation summaries are computed on demand (see _compute_annotation_summaries())
         if not annotations and args_have_annotations is False:
-            self._uneliminatable_annotations = frozenset()
-            self._relocatable_annotations = frozenset()
-        else:
-            ast_args = tuple(a for a in self.args if isinstance(a, Base))
-            self._uneliminatable_annotations = frozenset(itertools.chain(
-                itertools.chain.from_iterable(a._uneliminatable_annotations for a in ast_args),
-                tuple(a for a in self.annotations if not a.eliminatable and not a.relocatable)
-            ))
-
-            self._relocatable_annotations = OrderedDict((e, True) for e in tuple(itertools.chain(
-                itertools.chain.from_iterable(a._relocatable_annotations for a in ast_args),
-                tuple(a for a in self.annotations if not a.eliminatable and a.relocatable)
-            ))).keys()
+            self._uneliminatable_annotations = _EMPTY_FROZENSET
+            self._relocatable_annotations = ()
 
         if len(self.args) == 0:
             raise ClaripyOperationError("AST with no arguments!")
 
+    def _compute_annotation_summaries(self):
+        """
+        Computes the _uneliminatable_annotations and _relocatable_annotations of this AST, and of all the ASTs below it
+        that do not have them yet.
+        """
+        missing = lambda a: not _has_annotation_summaries(a)
+        for ast in traversal.walk(self, descend=missing, post_order=True):
+            if _has_annotation_summaries(ast):
+                continue
+
+            ast_args = tuple(a for a in ast.args if isinstance(a, Base))
+            uneliminatable = frozenset(itertools.chain(
+                itertools.chain.from_iterable(a._uneliminatable_annotations for a in ast_args),
+                tuple(a for a in ast.annotations if not a.eliminatable and not a.relocatable)
+            ))
+            relocatable = tuple(OrderedDict((e, True) for e in itertools.chain(
+                itertools.chain.from_iterable(a._relocatable_annotations for a in ast_args),
+                tuple(a for a in ast.annotations if not a.eliminatable and a.relocatable)
+            )))
+            ast._uneliminatable_annotations = uneliminatable if uneliminatable else _EMPTY_FROZENSET
+            ast._relocatable_annotations = relocatable
+
     #pylint:enable=attribute-defined-outside-init
 
     def __hash__(self):
         return self._hash
 
+    def _add_errored(self, backend):
+        """
+        Marks this AST as impossible to convert with `backend`.
+        """
+        self._errored = _interned_errored(self._errored.union((backend,)))  # pylint:disable=attribute-defined-outside-init
+
     @property
     def cache_key(self):
         """
@@ -541,42 +692,17 @@ class Base:
 
     def children_asts(self):
         """
-        Return an iterator over the nested children ASTs.
+        Return an iterator over the nested children ASTs. Every distinct AST is returned once.
         """
-        ast_queue = deque([iter(self.args)])
-        while ast_queue:
-
-            try:
-                ast = next(ast_queue[-1])
-            except StopIteration:
-                ast_queue.pop()
-                continue
-
-            if isinstance(ast, Base):
-                ast_queue.append(iter(ast.args))
-
-                l.debug("Yielding AST %s with hash %s with %d children", ast, hash(ast), len(ast.args))
-                yield ast
+        return traversal.walk(*self.args)
 
     def leaf_asts(self):
         """
         Return an iterator over the leaf ASTs.
         """
-        seen = set()
-
-        ast_queue = deque([self])
-        while ast_queue:
-
-            ast = ast_queue.pop()
-            if isinstance(ast, Base) and id(ast.cache_key) not in seen:
-                seen.add(id(ast.cache_key))
-
-                if ast.depth == 1:
-                    yield ast
-                    continue
-
-                ast_queue.extend(ast.args)
-                continue
+        for ast in traversal.walk(self):
+            if ast.depth == 1:
+                yield ast
 
     # TODO: Deprecate this property
     @property
@@ -705,65 +831,7 @@ class Base:
         :param leaf_operation:  An operation that should be applied to the leaf nodes.
         :return:                An AST with all instances of ast's in replacements.
         """
-        if variable_set is None:
-            variable_set = set()
-
-        if leaf_operation is None:
-            leaf_operation = lambda x: x
-
-        arg_queue = [iter([self])]
-        rep_queue = []
-        ast_queue = []
-
-        while arg_queue:
-            try:
-                ast = next(arg_queue[-1])
-                repl = ast
-
-                if not isinstance(ast, Base):
-                    rep_queue.append(repl)
-                    continue
-
-                elif ast.cache_key in replacements:
-                    repl = replacements[ast.cache_key]
-
-                elif ast.variables >= variable_set:
-
-                    if ast.op in operations.leaf_operations:
-                        repl = leaf_operation(ast)
-                        if repl is not ast:
-                            replacements[ast.cache_key] = repl
-
-                    elif ast.depth > 1:
-                        arg_queue.append(iter(ast.args))
-                        ast_queue.append(ast)
-                        continue
-
-                rep_queue.append(repl)
-                continue
-
-            except StopIteration:
-                arg_queue.pop()
-
-                if ast_queue:
-                    ast = ast_queue.pop()
-                    repl = ast
-
-                    args = rep_queue[-len(ast.args):]
-                    del rep_queue[-len(ast.args):]
-
-                    # Check if replacement occurred.
-                    if any((a is not b for a, b in zip(ast.args, args))):
-                        repl = ast.make_like(ast.op, tuple(args))
-                        replacements[ast.cache_key] = repl
-
-                    rep_queue.append(repl)
-
-        assert len(arg_queue) == 0, "arg_queue is not empty"
-        assert len(ast_queue) == 0, "ast_queue is not empty"
-        assert len(rep_queue) == 1, ("rep_queue has unexpected length", len(rep_queue))
-
-        return rep_queue.pop()
+        return replace_dict_many((self,), replacements, variable_set=variable_set, leaf_operation=leaf_operation)[0]
 
     def replace(self, old, new, variable_set=None, leaf_operation=None):   # pylint:disable=unused-argument
         """
@@ -845,82 +913,12 @@ class Base:
         return old_true.__class__(old_true.op, new_args, length=self.length)
 
     def _excavate_ite(self):
-        ast_queue = [iter([self])]
-        arg_queue = []
-        op_queue = []
-
-        while ast_queue:
-            try:
-                ast = next(ast_queue[-1])
+        def _pre(ast):
+            if ast.op in operations.leaf_operations or ast.annotations:
+                return ast
+            return traversal.DESCEND
 
-                if not isinstance(ast, Base):
-                    arg_queue.append(ast)
-                    continue
-
-                if ast.op in operations.leaf_operations:
-                    arg_queue.append(ast)
-                    continue
-
-                if ast.annotations:
-                    arg_queue.append(ast)
-                    continue
-
-                op_queue.append(ast)
-                ast_queue.append(iter(ast.args))
-
-            except StopIteration:
-                ast_queue.pop()
-
-                if op_queue:
-                    op = op_queue.pop()
-
-                    args = arg_queue[-len(op.args):]
-                    del arg_queue[-len(op.args):]
-
-                    ite_args = [isinstance(a, Base) and a.op == 'If' for a in args]
-
-                    if op.op == 'If':
-                        # if we are an If, call the If handler so that we can take advantage of its simplifiers
-                        excavated = If(*args)
-
-                    elif ite_args.count(True) == 0:
-                        # if there are no ifs that came to the surface, there's nothing more to do
-                        excavated = op.swap_args(args)
-
-                    else:
-                        # this gets called when we're *not* in an If, but there are Ifs in the args.
-                        # it pulls those Ifs out to the surface.
-                        cond = args[ite_args.index(True)].args[0]
-                        new_true_args = []
-                        new_false_args = []
-
-                        for a in args:
-                            if not isinstance(a, Base) or a.op != 'If':
-                                new_true_args.append(a)
-                                new_false_args.append(a)
-                            elif a.args[0] is cond:
-                                new_true_args.append(a.args[1])
-                                new_false_args.append(a.args[2])
-                            elif a.args[0] is Not(cond):
-                                new_true_args.append(a.args[2])
-                                new_false_args.append(a.args[1])
-                            else:
-                                # weird conditions -- giving up!
-                                excavated = op.swap_args(args)
-                                break
-
-                        else:
-                            excavated = If(cond, op.swap_args(new_true_args),
-                                           op.swap_args(new_false_args))
-
-                    # continue
-                    arg_queue.append(excavated)
-
-        assert len(op_queue) == 0, "op_queue is not empty"
-        assert len(ast_queue) == 0, "ast_queue is not empty"
-        assert len(arg_queue) == 1, ("arg_queue has unexpected length", len(arg_queue))
-
-        return arg_queue.pop()
+        return traversal.fold(self, _excavate_node, pre=_pre)
 
     @property
     def ite_burrowed(self):
@@ -1006,6 +1004,17 @@ class Base:
     #
 
     def __getattr__(self, a):
+        # lazily-created attributes
+        if a == '_cache_key':
+            self._cache_key = ASTCacheKey(self)  # pylint:disable=attribute-defined-outside-init
+            return self._cache_key
+        if a in ('_uneliminatable_annotations', '_relocatable_annotations'):
+            self._compute_annotation_summaries()
+            return object.__getattribute__(self, a)
+        if a == 'args':
+            # the arguments were swapped out to an ASTStore
+            return store.fault_in(self)
+
         if not a.startswith('_model_'):
             raise AttributeError(a)
 
@@ -1018,6 +1027,122 @@ class Base:
         except BackendError:
             return self
 
+def set_hash_mode(mode):
+    """
+    Selects the algorithm used to hash-cons ASTs.
+
+    ASTs hashed with different algorithms never compare identical, so this should be called before any AST is
+    created.
+
+    :param mode:    'fast' (the default) or 'md5'.
+    """
+    global HASH_MODE # pylint:disable=global-statement
+
+    if mode not in _hash_functions:
+        raise ClaripyValueError("unknown hash mode %r (available: %s)" % (mode, ', '.join(sorted(_hash_functions))))
+    if mode != HASH_MODE and len(Base._hash_cache):
+        l.warning("Switching the hash mode to %s while %d ASTs are alive. They will not be shared with new ASTs.",
+                  mode, len(Base._hash_cache))
+
+    HASH_MODE = mode
+    Base._calc_hash = staticmethod(_hash_functions[mode])
+
+_EMPTY_FROZENSET = frozenset()
+
+# there are only a handful of distinct sets of errored backends, so they are shared between ASTs
+_errored_sets = { }
+
+def _interned_errored(errored):
+    errored = frozenset(errored)
+    return _errored_sets.setdefault(errored, errored)
+
+def replace_dict_many(asts, replacements, variable_set=None, leaf_operation=None):
+    """
+    Returns the ASTs `asts` with subexpressions replaced by those that can be found in the `replacements` dict, like
+    Base.replace_dict(). The subexpressions shared between the ASTs are only visited and rewritten once.
+
+    :param asts:            The ASTs. Arguments that are not ASTs are returned as they are.
+    :param replacements:    A dictionary of hashes to their replacements. It is updated with the rewritten
+                            subexpressions.
+    :param variable_set:    For optimization, ast's without these variables are not checked for replacing.
+    :param leaf_operation:  An operation that should be applied to the leaf nodes.
+    :return:                A list of the rewritten ASTs, in the order of `asts`.
+    """
+    if variable_set is None:
+        variable_set = set()
+
+    def _pre(ast):
+        try:
+            return replacements[ast.cache_key]
+        except KeyError:
+            pass
+
+        if not ast.variables >= variable_set:
+            return ast
+        if ast.op in operations.leaf_operations:
+            if leaf_operation is None:
+                return ast
+            repl = leaf_operation(ast)
+            if repl is not ast:
+                replacements[ast.cache_key] = repl
+            return repl
+        if ast.depth == 1:
+            return ast
+        return traversal.DESCEND
+
+    def _post(ast, repl):
+        if repl is not ast:
+            replacements[ast.cache_key] = repl
+        return repl
+
+    # the memo is shared between the roots, which keep everything in it alive
+    asts = tuple(asts)
+    memo = { }
+    return [ traversal.transform(a, pre=_pre, post=_post, memo=memo) for a in asts ]
+
+def _excavate_node(op, args):
+    """
+    Rebuilds the AST `op` with its excavated arguments `args`, pulling the Ifs among them out to the top.
+    """
+    ite_args = [isinstance(a, Base) and a.op == 'If' for a in args]
+
+    if op.op == 'If':
+        # if we are an If, call the If handler so that we can take advantage of its simplifiers
+        return If(*args)
+
+    elif ite_args.count(True) == 0:
+        # if there are no ifs that came to the surface, there's nothing more to do
+        return op.swap_args(args)
+
+    # this gets called when we're *not* in an If, but there are Ifs in the args.
+    # it pulls those Ifs out to the surface.
+    cond = args[ite_args.index(True)].args[0]
+    new_true_args = []
+    new_false_args = []
+
+    for a in args:
+        if not isinstance(a, Base) or a.op != 'If':
+            new_true_args.append(a)
+            new_false_args.append(a)
+        elif a.args[0] is cond:
+            new_true_args.append(a.args[1])
+            new_false_args.append(a.args[2])
+        elif a.args[0] is Not(cond):
+            new_true_args.append(a.args[2])
+            new_false_args.append(a.args[1])
+        else:
+            # weird conditions -- giving up!
+            return op.swap_args(args)
+
+    return If(cond, op.swap_args(new_true_args), op.swap_args(new_false_args))
+
+def _has_annotation_summaries(ast, _slot=Base._relocatable_annotations):
+    try:
+        _slot.__get__(ast, Base)
+        return True
+    except AttributeError:
+        return False
+
 def simplify(e):
     if isinstance(e, Base) and e.op in operations.leaf_operations:
         return e
@@ -1034,9 +1159,12 @@ def simplify(e):
 
         return s
 
-from ..errors import BackendError, ClaripyOperationError, ClaripyReplacementError
+from ..errors import BackendError, ClaripyOperationError, ClaripyReplacementError, ClaripyValueError
 from .. import operations
+from . import traversal
 from ..backend_manager import backends
 from ..ast.bool import If, Not, BoolS
 from ..ast.bv import BV
 from .. import simplifications
+from . import store
+from . import constant_folding
@@ -6,7 +6,7 @@ class Bits(Base):
 
     :ivar length:       The length of this value in bits.
     """
-    __slots__ = ['length']
+    __slots__ = ()
 
     def __init__(self, *args, **kwargs):
         length = kwargs.pop('length', None)
@@ -43,6 +43,8 @@ class BV(Bits):
 
             11111111111111111111111111111100
     """
+    __slots__ = ()
+
 
     def chop(self, bits=1):
         """
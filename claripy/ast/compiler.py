@@ -0,0 +1,318 @@
+"""
+Compilation of ASTs into Python functions.
+
+Evaluating an AST with the concrete backend walks the whole tree, and converts every node into a claripy.bv.BVV. When
+the same AST is evaluated over and over with different values of its variables (a constraint checked against many
+models, for example), it is much cheaper to lower it once into a Python function over plain ints. compile() generates
+such a function, with one statement per distinct node of the AST, and the masking of bitvector widths and the signed
+operations written out inline.
+
+The compiled function takes a mapping from the names of the variables to their values. As in ModelCache, the variables
+that it does not mention are 0 (or True, for booleans). It returns what the concrete backend would, quirks included,
+and it raises the same exceptions (ClaripyZeroDivisionError on a division by zero, for example). compile() raises a
+BackendError for the ASTs that it does not handle (floating-point and string operations, for example).
+
+The compiled functions are cached by the hash of their AST, in a bounded LRU cache, along with the ASTs that could not
+be compiled. The cache only refers to the ASTs weakly, and their entries are dropped when they die.
+"""
+
+import builtins
+import threading
+import weakref
+
+from cachetools import LRUCache
+
+# ASTs with more distinct nodes than this are not compiled: Python takes too long to compile the function
+MAX_NODES = 5000
+
+# the most arguments of an operation that are lowered into a single Python expression. The longer argument lists are
+# lowered a chunk at a time, into temporaries, as Python can't compile arbitrarily long expressions
+_MAX_ARGS = 32
+
+
+def compile(expr): #pylint:disable=redefined-builtin
+    """
+    Returns a function that evaluates an AST, given a mapping from the names of its variables to their values.
+
+    :param expr:    The AST.
+    :raises BackendError:   If the AST can't be compiled.
+    """
+    key = expr._hash
+    with _lock:
+        entry = _cache.get(key, None)
+    if entry is not None and entry[0]() is expr:
+        if isinstance(entry[1], str):
+            raise BackendError(entry[1])
+        return entry[1]
+
+    try:
+        f = _Compiler(expr).compile()
+    except BackendError as e:
+        # the ASTs that can't be compiled are evaluated against every model, so they are only tried once
+        _store(key, expr, str(e))
+        raise
+    _store(key, expr, f)
+    return f
+
+def _store(key, expr, result):
+    with _lock:
+        _drop_dead()
+        _cache[key] = (weakref.ref(expr, lambda _: _dead.append(key)), result)
+
+def _drop_dead():
+    # with the lock held
+    while _dead:
+        key = _dead.pop()
+        entry = _cache.get(key, None)
+        if entry is not None and entry[0]() is None:
+            del _cache[key]
+
+def set_cache_size(maxsize):
+    """
+    Sets the number of compiled functions to keep.
+    """
+    global _cache
+    with _lock:
+        cache = LRUCache(maxsize)
+        for key, entry in _cache.items():
+            cache[key] = entry
+        _cache = cache
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+_lock = threading.Lock()
+_cache = LRUCache(10000)
+# the keys of the entries whose ASTs died
+_dead = [ ]
+
+
+class _Compiler:
+    def __init__(self, expr):
+        self.expr = expr
+        self.lines = [ ]
+        # id of an AST -> the Python expression (a temporary or a literal) holding its value
+        self.values = { }
+        # name of a variable -> the temporary holding its value
+        self.variables = { }
+
+    def compile(self):
+        for n, ast in enumerate(traversal.walk(self.expr, post_order=True)):
+            if n >= MAX_NODES:
+                raise BackendError("AST too large to compile")
+            self.values[id(ast)] = self._lower(ast)
+
+        source = "def evaluate(m):\n%s    return %s\n" % (
+            ''.join('    %s\n' % line for line in self.lines), self.values[id(self.expr)]
+        )
+        namespace = dict(_helpers)
+        try:
+            code = builtins.compile(source, '<claripy compiled %#x>' % (self.expr._hash,), 'exec')
+        except (RecursionError, SyntaxError, MemoryError) as e:
+            raise BackendError("Python can't compile the function of the AST: %s" % e) from None
+        exec(code, namespace) #pylint:disable=exec-used
+        f = namespace['evaluate']
+        f.source = source
+        return f
+
+    def _temp(self, code):
+        name = 'v%d' % len(self.lines)
+        self.lines.append('%s = %s' % (name, code))
+        return name
+
+    def _variable(self, name, code):
+        try:
+            return self.variables[name]
+        except KeyError:
+            t = self.variables[name] = self._temp(code)
+            return t
+
+    def _lower(self, ast):
+        op = ast.op
+        if op == 'BVV':
+            value, size = ast.args
+            if value is None or not size:
+                raise BackendError("can't compile %r" % ast)
+            return repr(value & ((1 << size) - 1))
+        elif op == 'BoolV':
+            return repr(bool(ast.args[0]))
+        elif op == 'BVS':
+            if not ast.length:
+                raise BackendError("can't compile zero-length bitvectors")
+            return self._variable(
+                (ast.args[0], ast.length), 'm.get(%r, 0) & %#x' % (ast.args[0], (1 << ast.length) - 1)
+            )
+        elif op == 'BoolS':
+            return self._variable((ast.args[0], None), 'bool(m.get(%r, True))' % (ast.args[0],))
+
+        try:
+            lower = _operations[op]
+        except KeyError:
+            raise BackendError("can't compile operation %s" % op) from None
+        args = [ self.values[id(a)] if isinstance(a, Base) else a for a in ast.args ]
+        if len(args) > _MAX_ARGS:
+            if op == 'Concat':
+                parts = list(zip(args, (a.length for a in ast.args)))
+                while len(parts) > _MAX_ARGS:
+                    chunk = parts[:_MAX_ARGS]
+                    parts = [ (self._temp(_concat_parts(chunk)), sum(size for _, size in chunk)) ] + parts[_MAX_ARGS:]
+                return self._temp(_concat_parts(parts))
+            elif op in _left_associative:
+                while len(args) > _MAX_ARGS:
+                    args = [ self._temp(lower(ast, *args[:_MAX_ARGS])) ] + args[_MAX_ARGS:]
+        return self._temp(lower(ast, *args))
+
+#
+# Helpers for the generated code
+#
+
+def _zero_division():
+    raise ClaripyZeroDivisionError()
+
+def _signed(v, size):
+    return v - (1 << size) if v >> (size - 1) else v
+
+def _shift_amount(b, size):
+    b = _signed(b, size)
+    if b < 0:
+        # the concrete backend declines the shift operators with negative amounts
+        raise BackendUnsupportedError()
+    return b
+
+def _lshift(a, b, size):
+    b = _shift_amount(b, size)
+    return (a << b) & ((1 << size) - 1) if b < size else 0
+
+def _ashr(a, b, size):
+    b = _shift_amount(b, size)
+    return (_signed(a, size) >> b) & ((1 << size) - 1) if b < size else 0
+
+def _lshr(a, b, size):
+    return a >> _signed(b, size)
+
+def _reverse(a, size):
+    return int.from_bytes(a.to_bytes(size // 8, 'little'), 'big')
+
+_helpers = {
+    '_zero_division': _zero_division,
+    '_lshift': _lshift,
+    '_ashr': _ashr,
+    '_lshr': _lshr,
+    '_reverse': _reverse,
+}
+
+#
+# Lowering of the operations, into Python expressions over the values of the arguments
+#
+
+def _mask(ast):
+    if not ast.length:
+        raise BackendError("can't compile %s on a zero-length or boolean value" % ast.op)
+    return '%#x' % ((1 << ast.length) - 1)
+
+def _arith(symbol):
+    def lower(ast, *args):
+        return '(%s) & %s' % ((' %s ' % symbol).join(args), _mask(ast))
+    return lower
+
+def _bitwise(symbol):
+    def lower(ast, *args):
+        _mask(ast)
+        return (' %s ' % symbol).join(args)
+    return lower
+
+def _compare(symbol, signed=False):
+    def lower(ast, a, b):
+        if signed:
+            bit = '%#x' % (1 << (ast.args[0].length - 1))
+            return '(%s ^ %s) %s (%s ^ %s)' % (a, bit, symbol, b, bit)
+        return '%s %s %s' % (a, symbol, b)
+    return lower
+
+def _division(symbol):
+    def lower(ast, a, b):
+        _mask(ast)
+        return '%s %s %s if %s else _zero_division()' % (a, symbol, b, b)
+    return lower
+
+def _shift(helper):
+    def lower(ast, a, b):
+        _mask(ast)
+        return '%s(%s, %s, %d)' % (helper, a, b, ast.length)
+    return lower
+
+def _concat_parts(parts):
+    # (value, size) pairs, from the most significant one
+    code = parts[0][0]
+    for v, size in parts[1:]:
+        code = '(%s << %d | %s)' % (code, size, v)
+    return code
+
+def _concat(ast, *args):
+    return _concat_parts(list(zip(args, (a.length for a in ast.args))))
+
+def _extract(ast, high, low, a):
+    return '(%s >> %d) & %#x' % (a, low, (1 << (high - low + 1)) - 1)
+
+def _sign_ext(ast, n, a):
+    inner = ast.args[1].length
+    if not inner:
+        raise BackendError("can't compile zero-length bitvectors")
+    return '%s | %#x if %s >> %d else %s' % (a, ((1 << ast.length) - 1) ^ ((1 << inner) - 1), a, inner - 1, a)
+
+def _reverse_lowering(ast, a):
+    if ast.length == 8:
+        return a
+    if not ast.length or ast.length % 8 != 0:
+        raise BackendError("can't reverse non-byte sized bitvectors")
+    return '_reverse(%s, %d)' % (a, ast.length)
+
+_operations = {
+    '__add__': _arith('+'),
+    '__sub__': _arith('-'),
+    '__mul__': _arith('*'),
+    '__neg__': lambda ast, a: '-%s & %s' % (a, _mask(ast)),
+    '__invert__': lambda ast, a: '%s ^ %s' % (a, _mask(ast)),
+    '__and__': _bitwise('&'),
+    '__or__': _bitwise('|'),
+    '__xor__': _bitwise('^'),
+    '__floordiv__': _division('//'),
+    '__mod__': _division('%'),
+    '__lshift__': _shift('_lshift'),
+    '__rshift__': _shift('_ashr'),
+    'LShR': _shift('_lshr'),
+
+    '__eq__': _compare('=='),
+    '__ne__': _compare('!='),
+    '__lt__': _compare('<'),
+    '__le__': _compare('<='),
+    '__gt__': _compare('>'),
+    '__ge__': _compare('>='),
+    'ULT': _compare('<'),
+    'ULE': _compare('<='),
+    'UGT': _compare('>'),
+    'UGE': _compare('>='),
+    'SLT': _compare('<', signed=True),
+    'SLE': _compare('<=', signed=True),
+    'SGT': _compare('>', signed=True),
+    'SGE': _compare('>=', signed=True),
+
+    'Concat': _concat,
+    'Extract': _extract,
+    'ZeroExt': lambda ast, n, a: a,
+    'SignExt': _sign_ext,
+    'Reverse': _reverse_lowering,
+
+    'If': lambda ast, c, t, f: '%s if %s else %s' % (t, c, f),
+    'And': lambda ast, *args: 'all((%s,))' % ', '.join(args),
+    'Or': lambda ast, *args: 'any((%s,))' % ', '.join(args),
+    'Not': lambda ast, a: 'not %s' % a,
+}
+
+# the operations whose arguments can be lowered a chunk at a time, from the left
+_left_associative = { '__add__', '__sub__', '__mul__', '__and__', '__or__', '__xor__', 'And', 'Or' }
+
+from ..errors import BackendError, BackendUnsupportedError, ClaripyZeroDivisionError
+from .base import Base
+from . import traversal
@@ -0,0 +1,267 @@
+"""
+Constant folding of operations on concrete ASTs.
+
+Base.__new__ evaluates operations on concrete arguments with the eager backends, which converts every argument into a
+backend object (a claripy.bv.BVV, for example), calls the operation on them, and abstracts the result back into an AST.
+For the common operations, the folders here compute the result straight from the payloads of the BVV, BoolV and FPV
+leaves instead, without any conversion.
+
+Every folder has the semantics of the concrete backend, quirks included. In the cases in which the concrete backend
+raises an exception or declines the operation (division by zero, negative shift amounts, and the like), the folder
+returns None, and the operation goes through the eager backends as before.
+"""
+
+import operator
+
+
+def fold(op, args):
+    """
+    Folds an operation on concrete ASTs.
+
+    :param op:      The operation.
+    :param args:    The arguments of the operation.
+    :return:        The resulting AST, or None if the operation can't be folded. In that case, it should be handed to
+                    the eager backends.
+    """
+    folder = folders.get(op, None)
+    if folder is None:
+        return None
+
+    for a in args:
+        if isinstance(a, Base) and (a.op not in _leaf_ops or a.annotations or a.args[0] is None or a.length == 0):
+            return None
+
+    return folder(*args)
+
+_leaf_ops = frozenset(('BVV', 'BoolV', 'FPV'))
+
+#
+# Helpers
+#
+
+def _signed(value, size):
+    return value - (1 << size) if value >> (size - 1) else value
+
+def _reduce(f):
+    def folder(*args):
+        first = args[0].args
+        value = first[0]
+        for a in args[1:]:
+            value = f(value, a.args[0])
+        return BVV(value, first[1])
+    return folder
+
+def _compare(f, signed=False):
+    if signed:
+        def folder(a, b):
+            size = a.args[1]
+            if size != b.args[1]:
+                return None
+            return BoolV(f(_signed(a.args[0], size), _signed(b.args[0], size)))
+    else:
+        def folder(a, b):
+            if len(a.args) > 1 and a.args[1] != b.args[1]:
+                return None
+            return BoolV(f(a.args[0], b.args[0]))
+    return folder
+
+def _is_float(*args):
+    return all(type(a.args[0]) is float for a in args)
+
+def _fp_compare(f):
+    def folder(a, b):
+        if a.args[1] != b.args[1] or not _is_float(a, b):
+            return None
+        return BoolV(f(a.args[0], b.args[0]))
+    return folder
+
+def _fp_binop(f):
+    def folder(_rm, a, b):
+        if a.args[1] != b.args[1] or not _is_float(a, b):
+            return None
+        return FPV(f(a.args[0], b.args[0]), a.args[1])
+    return folder
+
+#
+# Bit-vector operations
+#
+
+def _floordiv(a, b):
+    if b.args[0] == 0:
+        return None
+    return BVV(a.args[0] // b.args[0], a.args[1])
+
+def _mod(a, b):
+    if b.args[0] == 0:
+        return None
+    return BVV(a.args[0] % b.args[0], a.args[1])
+
+def _sdiv(a, b):
+    size = a.args[1]
+    x = _signed(a.args[0], size)
+    y = _signed(b.args[0], size)
+    if y == 0:
+        return None
+    # rounds towards zero
+    return BVV(x//y if x*y > 0 else (x + (-x % y))//y, size)
+
+def _smod(a, b):
+    size = a.args[1]
+    x = _signed(a.args[0], size)
+    y = _signed(b.args[0], size)
+    if y == 0:
+        return None
+    # the remainder of the % operator in C
+    q = x//y if x*y > 0 else (x + (-x % y))//y
+    return BVV(x - q*y, size)
+
+def _lshift(a, b):
+    size = a.args[1]
+    n = _signed(b.args[0], size)
+    if n < 0:
+        return None
+    return BVV(a.args[0] << n if n < size else 0, size)
+
+def _rshift(a, b):
+    # like the concrete backend, this yields 0 for shift amounts of at least the size, whatever the sign
+    size = a.args[1]
+    n = _signed(b.args[0], size)
+    if n < 0:
+        return None
+    return BVV(_signed(a.args[0], size) >> n if n < size else 0, size)
+
+def _lshr(a, b):
+    size = a.args[1]
+    n = _signed(b.args[0], size)
+    if n < 0:
+        return None
+    return BVV(a.args[0] >> n, size)
+
+def _rotate_left(a, b):
+    size = a.args[1]
+    n = b.args[0] % size
+    value = a.args[0]
+    return BVV((value << n) | (value >> (size - n)), size)
+
+def _rotate_right(a, b):
+    size = a.args[1]
+    n = b.args[0] % size
+    value = a.args[0]
+    return BVV((value >> n) | (value << (size - n)), size)
+
+def _invert(a):
+    return BVV(~a.args[0], a.args[1])
+
+def _neg(a):
+    return BVV(-a.args[0], a.args[1])
+
+def _concat(*args):
+    value = 0
+    size = 0
+    for a in args:
+        a_value, a_size = a.args
+        value = (value << a_size) | a_value
+        size += a_size
+    return BVV(value, size)
+
+def _extract(high, low, a):
+    return BVV(a.args[0] >> low, high - low + 1)
+
+def _zero_ext(n, a):
+    return BVV(a.args[0], a.args[1] + n)
+
+def _sign_ext(n, a):
+    size = a.args[1]
+    return BVV(_signed(a.args[0], size), size + n)
+
+def _reverse(a):
+    value, size = a.args
+    if size % 8 != 0:
+        return None
+    return BVV(int.from_bytes(value.to_bytes(size // 8, 'big'), 'little'), size)
+
+#
+# Boolean operations
+#
+
+def _and(*args):
+    return BoolV(all(a.args[0] for a in args))
+
+def _or(*args):
+    return BoolV(any(a.args[0] for a in args))
+
+def _not(a):
+    return BoolV(not a.args[0])
+
+#
+# Floating-point operations
+#
+
+def _fp_neg(a):
+    if not _is_float(a):
+        return None
+    return FPV(-a.args[0], a.args[1])
+
+def _fp_abs(a):
+    if not _is_float(a):
+        return None
+    return FPV(abs(a.args[0]), a.args[1])
+
+
+# the folders, by operation
+folders = {
+    '__add__': _reduce(operator.add),
+    '__sub__': _reduce(operator.sub),
+    '__mul__': _reduce(operator.mul),
+    '__and__': _reduce(operator.and_),
+    '__or__': _reduce(operator.or_),
+    '__xor__': _reduce(operator.xor),
+    '__floordiv__': _floordiv,
+    '__mod__': _mod,
+    'SDiv': _sdiv,
+    'SMod': _smod,
+    '__lshift__': _lshift,
+    '__rshift__': _rshift,
+    'LShR': _lshr,
+    'RotateLeft': _rotate_left,
+    'RotateRight': _rotate_right,
+    '__invert__': _invert,
+    '__neg__': _neg,
+    'Concat': _concat,
+    'Extract': _extract,
+    'ZeroExt': _zero_ext,
+    'SignExt': _sign_ext,
+    'Reverse': _reverse,
+
+    # these are shared by bit-vectors and booleans
+    '__eq__': _compare(operator.eq),
+    '__ne__': _compare(operator.ne),
+    '__lt__': _compare(operator.lt),
+    '__le__': _compare(operator.le),
+    '__gt__': _compare(operator.gt),
+    '__ge__': _compare(operator.ge),
+    'SLT': _compare(operator.lt, signed=True),
+    'SLE': _compare(operator.le, signed=True),
+    'SGT': _compare(operator.gt, signed=True),
+    'SGE': _compare(operator.ge, signed=True),
+
+    'And': _and,
+    'Or': _or,
+    'Not': _not,
+
+    'fpNeg': _fp_neg,
+    'fpAbs': _fp_abs,
+    'fpAdd': _fp_binop(operator.add),
+    'fpSub': _fp_binop(operator.sub),
+    'fpMul': _fp_binop(operator.mul),
+    'fpEQ': _fp_compare(operator.eq),
+    'fpLT': _fp_compare(operator.lt),
+    'fpLEQ': _fp_compare(operator.le),
+    'fpGT': _fp_compare(operator.gt),
+    'fpGEQ': _fp_compare(operator.ge),
+}
+
+from .base import Base
+from .bv import BVV
+from .bool import BoolV
+from .fp import FPV
@@ -0,0 +1,190 @@
+import collections
+import logging
+import weakref
+
+from ..errors import ClaripyValueError
+
+l = logging.getLogger("claripy.ast.intern_table")
+
+
+class InternTable:
+    """
+    The table of hash-consed ASTs, mapping hashes to the (unique) AST with that hash.
+
+    ASTs are kept weakly, so an AST lives exactly as long as something else references it. In generational mode, the
+    table additionally keeps strong references to the ASTs that were inserted or looked up during the last
+    `generations` generations. ASTs that have not been looked up for longer than that are only kept weakly again. This
+    lets long-running analyses keep recently-used ASTs resident without holding on to everything they ever created.
+
+    The table also counts hits, misses and inserts, and can report the live ASTs by class and by operation.
+    """
+
+    def __init__(self, generations=None, generation_size=None):
+        self._refs = { }
+
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+
+        self.generation = 0
+        self._generations = None
+        self._generation_size = None
+        self._generation_ops = 0
+        self._pinned = collections.deque()
+        self.set_generations(generations, generation_size=generation_size)
+
+        selfref = weakref.ref(self)
+        def _remove(wr):
+            table = selfref()
+            if table is not None and table._refs.get(wr.key, None) is wr:
+                del table._refs[wr.key]
+        self._remove = _remove
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __contains__(self, h):
+        return self.get(h, None, count=False) is not None
+
+    def __getitem__(self, h):
+        node = self.get(h, None)
+        if node is None:
+            raise KeyError(h)
+        return node
+
+    def get(self, h, default=None, count=True):
+        """
+        Looks up the AST with the hash `h`.
+
+        :param h:       The hash.
+        :param default: What to return if there is no such AST.
+        :param count:   Whether the lookup should be counted in the statistics and the generations.
+        """
+        r = self._refs.get(h, None)
+        node = r() if r is not None else None
+        if node is None:
+            if count:
+                self.misses += 1
+            return default
+
+        if count:
+            self.hits += 1
+            if self._generations is not None:
+                self._touch(h, node)
+        return node
+
+    def __setitem__(self, h, node):
+        self.inserts += 1
+        self._refs[h] = weakref.KeyedRef(node, self._remove, h)
+        if self._generations is not None:
+            self._touch(h, node)
+
+    def values(self):
+        """
+        Returns a list of the live ASTs.
+        """
+        return [ n for n in (r() for r in self._refs.copy().values()) if n is not None ]
+
+    #
+    # Generations
+    #
+
+    def _touch(self, h, node):
+        self._pinned[-1][h] = node
+        if self._generation_size is not None:
+            self._generation_ops += 1
+            if self._generation_ops >= self._generation_size:
+                self.advance_generation()
+
+    def set_generations(self, generations, generation_size=None):
+        """
+        Configures the generational mode.
+
+        :param generations:     The number of generations for which an AST that is not looked up is kept alive by the
+                                table, or None to keep ASTs only weakly.
+        :param generation_size: If not None, automatically start a new generation after this many lookups.
+        """
+        if generations is not None and generations < 1:
+            raise ClaripyValueError("the number of generations must be positive")
+
+        self._generations = generations
+        self._generation_size = generation_size
+        self._generation_ops = 0
+        if generations is None:
+            self._pinned.clear()
+        else:
+            if not self._pinned:
+                self._pinned.append({ })
+            while len(self._pinned) > generations:
+                self._pinned.popleft()
+
+    def advance_generation(self):
+        """
+        Starts a new generation. The ASTs that were last looked up `generations` generations ago become weakly kept.
+        """
+        self.generation += 1
+        self._generation_ops = 0
+        if self._generations is not None:
+            self._pinned.append({ })
+            while len(self._pinned) > self._generations:
+                self._pinned.popleft()
+
+    @property
+    def pinned(self):
+        """
+        The number of ASTs that are kept alive by the generations.
+        """
+        return len(set().union(*self._pinned))
+
+    def downsize(self):
+        """
+        Drops the strong references of the generational mode.
+        """
+        if self._generations is not None:
+            self._pinned.clear()
+            self._pinned.append({ })
+
+    #
+    # Statistics
+    #
+
+    def live_by_class(self):
+        """
+        Returns a Counter of the live ASTs per AST class name.
+        """
+        return collections.Counter(type(n).__name__ for n in self.values())
+
+    def live_by_op(self):
+        """
+        Returns a Counter of the live ASTs per operation.
+        """
+        return collections.Counter(n.op for n in self.values())
+
+    def stats(self, by_class=False, by_op=False):
+        """
+        Returns a dict with the statistics of the table.
+
+        :param by_class:    Include the live AST counts per AST class (this walks the whole table).
+        :param by_op:       Include the live AST counts per operation (this walks the whole table).
+        """
+        lookups = self.hits + self.misses
+        s = {
+            'live': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'inserts': self.inserts,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'generation': self.generation,
+            'generations': self._generations,
+            'pinned': self.pinned,
+        }
+        if by_class:
+            s['by_class'] = dict(self.live_by_class())
+        if by_op:
+            s['by_op'] = dict(self.live_by_op())
+        return s
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
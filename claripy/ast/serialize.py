@@ -0,0 +1,461 @@
+"""
+A compact binary serialization format for ASTs.
+
+Pickling an AST writes every node as a separate (op, args, length, variables, symbolic, annotations) tuple. This
+format instead writes a single, topologically ordered table of the distinct nodes, in which:
+
+- every string (operations, variable names and string arguments) is written once, and referred to by its index,
+- every distinct variable set is written once, as a list of name indices,
+- annotations, AST classes and any argument that is not a plain int, str, bool, float or None are pickled once each,
+- the arguments of a node refer to earlier nodes by their index,
+- integers are written as variable-length integers.
+
+The tables are defined inline, right before their first use, so the format is written and read in a single pass.
+
+Loading re-interns every node in the hash-cons cache, through the same checks as building it does. The hashes of the
+nodes are not written: they are salted per process, and only say which slot of the cache a node had.
+"""
+
+import io
+import pickle
+import struct
+
+MAGIC = b'CLAST'
+VERSION = 2
+
+# records
+_R_STRING = 1
+_R_VARIABLES = 2
+_R_OBJECT = 3
+_R_NODE = 4
+_R_ROOTS = 5
+
+# argument tags
+_T_NODE = 0
+_T_INT = 1
+_T_STR = 2
+_T_TRUE = 3
+_T_FALSE = 4
+_T_NONE = 5
+_T_FLOAT = 6
+_T_OBJECT = 7
+
+_TAG_NODE = bytes((_T_NODE,))
+_TAG_INT = bytes((_T_INT,))
+_TAG_STR = bytes((_T_STR,))
+_TAG_TRUE = bytes((_T_TRUE,))
+_TAG_FALSE = bytes((_T_FALSE,))
+_TAG_NONE = bytes((_T_NONE,))
+_TAG_FLOAT = bytes((_T_FLOAT,))
+_TAG_OBJECT = bytes((_T_OBJECT,))
+
+# node flags
+_F_SYMBOLIC = 1
+_F_LENGTH = 2
+_F_ANNOTATIONS = 4
+
+# root flags
+_ROOTS_SINGLE = 1
+
+_double = struct.Struct('<d')
+
+_FLUSH_SIZE = 1 << 20
+
+
+def _varint(n):
+    """
+    Encodes a non-negative integer as a variable-length integer.
+    """
+    if n < 0x80:
+        return bytes((n,))
+    out = bytearray()
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+class _Writer:
+    """
+    Writes the records. The tables map the strings, variable sets, objects and nodes that were written to their
+    encoded indices.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self._buf = bytearray()
+
+        self._nodes = { }
+        self._strings = { }
+        self._variables = { }
+        self._objects = { }
+        # unhashable objects are looked up by identity, so they are kept alive until the end
+        self._object_refs = [ ]
+
+        self.node_count = 0
+
+    def _string(self, s):
+        try:
+            return self._strings[s]
+        except KeyError:
+            data = s.encode('utf-8')
+            self._buf.append(_R_STRING)
+            self._buf += _varint(len(data))
+            self._buf += data
+            i = self._strings[s] = _varint(len(self._strings))
+            return i
+
+    def _variable_set(self, variables):
+        try:
+            return self._variables[variables]
+        except KeyError:
+            names = [ self._string(n) for n in variables ]
+            self._buf.append(_R_VARIABLES)
+            self._buf += _varint(len(names))
+            for n in names:
+                self._buf += n
+            i = self._variables[variables] = _varint(len(self._variables))
+            return i
+
+    def _object(self, o):
+        key = (type(o), o)
+        try:
+            return self._objects[key]
+        except TypeError:
+            key = id(o)
+            if key in self._objects:
+                return self._objects[key]
+            self._object_refs.append(o)
+        except KeyError:
+            pass
+
+        data = pickle.dumps(o, pickle.HIGHEST_PROTOCOL)
+        self._buf.append(_R_OBJECT)
+        self._buf += _varint(len(data))
+        self._buf += data
+        i = self._objects[key] = _varint(len(self._objects))
+        return i
+
+    def _define_arg(self, a):
+        """
+        Writes the table entries that an argument needs, and returns its encoding.
+        """
+        t = type(a)
+        if t is int:
+            return _TAG_INT + _varint(a << 1 if a >= 0 else ((-a) << 1) - 1)
+        elif t is str:
+            return _TAG_STR + self._string(a)
+        elif t is bool:
+            return _TAG_TRUE if a else _TAG_FALSE
+        elif a is None:
+            return _TAG_NONE
+        elif t is float:
+            return _TAG_FLOAT + _double.pack(a)
+        elif isinstance(a, Base):
+            return self._nodes[id(a)]
+        else:
+            return _TAG_OBJECT + self._object(a)
+
+    def header(self):
+        self._buf += MAGIC
+        self._buf += _varint(VERSION)
+
+    def node(self, ast):
+        nodes = self._nodes
+        cls = self._object(type(ast))
+        op = self._string(ast.op)
+        variables = self._variable_set(ast.variables)
+        annotations = self._object(ast.annotations) if ast.annotations else None
+        args = [ nodes[id(a)] if isinstance(a, Base) else self._define_arg(a) for a in ast.args ]
+
+        # the length is written as it is passed to the constructor, which is in characters for Strings
+        length = ast.string_length if isinstance(ast, String) else ast.length
+
+        flags = 0
+        if ast.symbolic:
+            flags |= _F_SYMBOLIC
+        if length is not None:
+            flags |= _F_LENGTH
+        if annotations is not None:
+            flags |= _F_ANNOTATIONS
+
+        buf = self._buf
+        buf.append(_R_NODE)
+        buf += cls
+        buf += op
+        buf.append(flags)
+        if length is not None:
+            buf += _varint(length)
+        buf += variables
+        if annotations is not None:
+            buf += annotations
+        buf += _varint(len(args))
+        for a in args:
+            buf += a
+
+        nodes[id(ast)] = _TAG_NODE + _varint(self.node_count)
+        self.node_count += 1
+
+        if len(buf) >= _FLUSH_SIZE:
+            self.flush()
+
+    def roots(self, roots, single):
+        args = [ self._define_arg(r) for r in roots ]
+        self._buf.append(_R_ROOTS)
+        self._buf.append(_ROOTS_SINGLE if single else 0)
+        self._buf += _varint(len(args))
+        for a in args:
+            self._buf += a
+
+    def flush(self):
+        self._f.write(bytes(self._buf))
+        self._buf = bytearray()
+
+
+def _varint_tail(data, pos, b):
+    """
+    Decodes the rest of a variable-length integer whose first byte was `b`. Returns the integer and the position after
+    it.
+    """
+    n = b & 0x7f
+    shift = 7
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+class _Reader:
+    def __init__(self, data, live=None):
+        self._data = data
+        self._pos = 0
+        self._live = live
+
+        self.strings = [ ]
+        self.variables = [ ]
+        self.objects = [ ]
+        self.nodes = [ ]
+
+    def _varint(self):
+        b = self._data[self._pos]
+        self._pos += 1
+        if b < 0x80:
+            return b
+        n, self._pos = _varint_tail(self._data, self._pos, b)
+        return n
+
+    def _bytes(self, n):
+        pos = self._pos
+        self._pos = pos + n
+        if self._pos > len(self._data):
+            raise ClaripySerializationError("truncated AST data")
+        return self._data[pos:self._pos]
+
+    def _arg(self):
+        tag = self._data[self._pos]
+        self._pos += 1
+        if tag == _T_NODE:
+            return self.nodes[self._varint()]
+        elif tag == _T_INT:
+            n = self._varint()
+            return -((n + 1) >> 1) if n & 1 else n >> 1
+        elif tag == _T_STR:
+            return self.strings[self._varint()]
+        elif tag == _T_TRUE:
+            return True
+        elif tag == _T_FALSE:
+            return False
+        elif tag == _T_NONE:
+            return None
+        elif tag == _T_FLOAT:
+            return _double.unpack(self._bytes(8))[0]
+        elif tag == _T_OBJECT:
+            return self.objects[self._varint()]
+        raise ClaripySerializationError("unknown argument tag %d" % tag)
+
+    def read_header(self):
+        if bytes(self._bytes(len(MAGIC))) != MAGIC:
+            raise ClaripySerializationError("not a serialized AST")
+        version = self._varint()
+        if version != VERSION:
+            raise ClaripySerializationError("unsupported AST serialization version %d" % version)
+
+    def _node(self):
+        # this is where loading spends its time, so the common (single-byte) varints and the node arguments are decoded
+        # inline
+        data = self._data
+        pos = self._pos
+
+        b = data[pos]
+        pos += 1
+        if b & 0x80:
+            b, pos = _varint_tail(data, pos, b)
+        cls = self.objects[b]
+
+        b = data[pos]
+        pos += 1
+        if b & 0x80:
+            b, pos = _varint_tail(data, pos, b)
+        op = self.strings[b]
+
+        flags = data[pos]
+        pos += 1
+
+        length = None
+        if flags & _F_LENGTH:
+            length = data[pos]
+            pos += 1
+            if length & 0x80:
+                length, pos = _varint_tail(data, pos, length)
+
+        b = data[pos]
+        pos += 1
+        if b & 0x80:
+            b, pos = _varint_tail(data, pos, b)
+        variables = self.variables[b]
+
+        annotations = ()
+        if flags & _F_ANNOTATIONS:
+            b = data[pos]
+            pos += 1
+            if b & 0x80:
+                b, pos = _varint_tail(data, pos, b)
+            annotations = self.objects[b]
+
+        nargs = data[pos]
+        pos += 1
+        if nargs & 0x80:
+            nargs, pos = _varint_tail(data, pos, nargs)
+
+        nodes = self.nodes
+        args = [ ]
+        for _ in range(nargs):
+            tag = data[pos]
+            if tag == _T_NODE or tag == _T_INT:
+                b = data[pos + 1]
+                pos += 2
+                if b & 0x80:
+                    b, pos = _varint_tail(data, pos, b)
+                if tag == _T_NODE:
+                    args.append(nodes[b])
+                else:
+                    args.append(-((b + 1) >> 1) if b & 1 else b >> 1)
+            else:
+                self._pos = pos
+                args.append(self._arg())
+                pos = self._pos
+        self._pos = pos
+
+        if self._live is not None:
+            node = self._live.get(len(self.nodes), None)
+            if node is not None:
+                return node
+
+        node = cls.__new__(
+            cls, op, tuple(args), length=length, variables=variables, symbolic=bool(flags & _F_SYMBOLIC),
+            annotations=annotations, eager_backends=None
+        )
+        if cls is String:
+            # Strings get their length in bits in their constructor
+            node.__init__(length=length)
+        return node
+
+    def read(self):
+        data = self._data
+        end = len(data)
+        strings = self.strings
+        nodes = self.nodes
+        varint = self._varint
+
+        while self._pos < end:
+            record = data[self._pos]
+            self._pos += 1
+
+            if record == _R_NODE:
+                nodes.append(self._node())
+
+            elif record == _R_STRING:
+                strings.append(bytes(self._bytes(varint())).decode('utf-8'))
+
+            elif record == _R_VARIABLES:
+                self.variables.append(VariableSet.intern([ strings[varint()] for _ in range(varint()) ]))
+
+            elif record == _R_OBJECT:
+                self.objects.append(pickle.loads(self._bytes(varint())))
+
+            elif record == _R_ROOTS:
+                single = data[self._pos] & _ROOTS_SINGLE
+                self._pos += 1
+                roots = [ self._arg() for _ in range(varint()) ]
+                return roots[0] if single else roots
+
+            else:
+                raise ClaripySerializationError("unknown record type %d" % record)
+
+        raise ClaripySerializationError("truncated AST data")
+
+
+def dump(asts, f, nodes=None):
+    """
+    Serializes ASTs into a file.
+
+    :param asts:    An AST, or a list of ASTs.
+    :param f:       A binary file-like object to write to.
+    :param nodes:   A list to which the nodes are appended as they are written, so that the index of a node in it is
+                    its index in the data (see loads()).
+    :return:        The number of distinct nodes that were written.
+    """
+    single = isinstance(asts, Base)
+    roots = [ asts ] if single else list(asts)
+
+    w = _Writer(f)
+    w.header()
+    for ast in walk(*roots, post_order=True):
+        w.node(ast)
+        if nodes is not None:
+            nodes.append(ast)
+    w.roots(roots, single)
+    w.flush()
+    return w.node_count
+
+def dumps(asts, nodes=None):
+    """
+    Serializes ASTs into bytes. See dump().
+    """
+    f = io.BytesIO()
+    dump(asts, f, nodes=nodes)
+    return f.getvalue()
+
+def load(f):
+    """
+    Loads ASTs serialized by dump() from a file.
+
+    :param f:   A binary file-like object to read from.
+    :return:    The AST, or the list of ASTs, that was serialized.
+    """
+    return loads(f.read())
+
+def loads(data, live=None):
+    """
+    Loads ASTs serialized by dump() or dumps() from bytes.
+
+    :param data:    The bytes.
+    :param live:    A dict mapping the indices of nodes in the data to live ASTs, which are returned for those nodes
+                    instead of loading them again.
+    """
+    r = _Reader(memoryview(data), live=live)
+    r.read_header()
+    try:
+        return r.read()
+    except IndexError as e:
+        raise ClaripySerializationError("corrupt AST data") from e
+
+from ..errors import ClaripySerializationError
+from .base import Base
+from .strings import String
+from .traversal import walk
+from .variable_set import VariableSet
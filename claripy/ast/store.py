@@ -0,0 +1,181 @@
+"""
+An on-disk store for cold ASTs.
+
+Long analyses keep many ASTs alive that are not going to be looked at again for a long time (the constraints of old
+states, for example). An ASTStore lets them be swapped out to a file: the arguments of a swapped-out AST are written to
+the store in the compact format of claripy.ast.serialize, and are dropped from memory, which releases the whole
+subtree below the AST unless something else refers to it.
+
+The swapped-out AST itself stays where it is. It keeps its identity and its hash (so it is still found by hash-consing),
+as well as its op, length, variables, depth and the like. Only its `args` are gone, and the first access to them (by
+anything, including hash-consing an identical AST) reads them back from the store, through a memory map.
+
+Loading the arguments hash-conses them with the live ASTs, so the children that are still alive elsewhere come back as
+themselves. Annotated children are also kept by weak reference while they are swapped out, since a loaded annotation is
+not necessarily the live one.
+"""
+
+import logging
+import mmap
+import tempfile
+import threading
+import weakref
+
+l = logging.getLogger("claripy.ast.store")
+
+# the swapped-out ASTs, by id, mapped to (a weak reference to the AST, its store, the offset and the size of its args,
+# and weak references to its annotated descendants by their index in the args, or None)
+_swapped_out = { }
+# guards _swapped_out and the files of the stores. Loading the arguments of an AST may fault in other ASTs (hash-consing
+# the loaded nodes looks at the arguments of the ASTs they collide with), so it is reentrant.
+_lock = threading.RLock()
+
+def _forget(key, wr):
+    entry = _swapped_out.get(key, None)
+    if entry is not None and entry[0] is wr:
+        del _swapped_out[key]
+
+
+class ASTStore:
+    """
+    A file to which the arguments of cold ASTs are swapped out.
+
+    The file only grows: the space taken by an AST that was faulted back in, or that died, is not reused until the
+    store is closed.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path:    The file to use. By default, an anonymous temporary file is used.
+        """
+        if path is None:
+            self._file = tempfile.TemporaryFile(prefix='claripy-ast-store-')
+        else:
+            self._file = open(path, 'w+b')
+        self._size = 0
+        self._mmap = None
+
+        self.swapped_out = 0
+        self.faulted_in = 0
+        self.bytes_written = 0
+
+    def close(self):
+        """
+        Faults all the ASTs that are swapped out to this store back in, and closes the file.
+        """
+        for entry in list(_swapped_out.values()):
+            ast = entry[0]()
+            if entry[1] is self and ast is not None:
+                ast.args  # pylint:disable=pointless-statement
+
+        with _lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def is_swapped_out(ast):
+        """
+        Returns whether the arguments of an AST are swapped out.
+        """
+        return id(ast) in _swapped_out
+
+    def swap_out(self, ast):
+        """
+        Swaps the arguments of an AST out to this store.
+
+        Swapped-out ASTs below `ast` are faulted in to be written along with it. ASTs without ASTs among their arguments
+        are left as they are, since there is nothing to gain from swapping them out.
+
+        :param ast: The AST.
+        :return:    Whether the AST was swapped out.
+        """
+        if ast.depth == 1 or id(ast) in _swapped_out:
+            return False
+
+        # these are computed from the arguments, so they should not have to fault them back in later
+        ast._relocatable_annotations  # pylint:disable=pointless-statement
+
+        nodes = [ ]
+        data = dumps(list(ast.args), nodes=nodes)
+        live = { i: weakref.ref(n) for i, n in enumerate(nodes) if n.annotations } or None
+        with _lock:
+            if id(ast) in _swapped_out:
+                return False
+            self._file.seek(self._size)
+            self._file.write(data)
+            offset = self._size
+            self._size += len(data)
+
+            key = id(ast)
+            _swapped_out[key] = (weakref.ref(ast, lambda wr: _forget(key, wr)), self, offset, len(data), live)
+            del ast.args
+            ast._excavated = None
+            ast._burrowed = None
+
+            self.swapped_out += 1
+            self.bytes_written += len(data)
+        return True
+
+    def swap_out_many(self, asts):
+        """
+        Swaps out the arguments of several ASTs. See swap_out().
+
+        :return:    The number of ASTs that were swapped out.
+        """
+        return sum(self.swap_out(a) for a in asts)
+
+    def _read(self, offset, size):
+        if self._mmap is None or offset + size > len(self._mmap):
+            if self._mmap is not None:
+                self._mmap.close()
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+        return self._mmap[offset:offset+size]
+
+    def _fault_in(self, ast, offset, size, live):
+        # with _lock held
+        if live is not None:
+            live = { i: n for i, n in ((i, wr()) for i, wr in live.items()) if n is not None }
+        args = tuple(loads(self._read(offset, size), live=live))
+        ast.args = args
+        _swapped_out.pop(id(ast), None)
+        self.faulted_in += 1
+        return args
+
+    def stats(self):
+        """
+        Returns a dict with the statistics of the store.
+        """
+        with _lock:
+            return {
+                'swapped_out': self.swapped_out,
+                'faulted_in': self.faulted_in,
+                'on_disk': sum(1 for e in _swapped_out.values() if e[1] is self),
+                'bytes_written': self.bytes_written,
+            }
+
+
+def fault_in(ast):
+    """
+    Reads the arguments of a swapped-out AST back from its store, and returns them.
+    """
+    with _lock:
+        entry = _swapped_out.get(id(ast), None)
+        if entry is None:
+            # another thread may have faulted it in while this one waited
+            try:
+                return object.__getattribute__(ast, 'args')
+            except AttributeError:
+                raise AttributeError('args') from None
+        _, store, offset, size, live = entry
+        return store._fault_in(ast, offset, size, live)
+
+from .serialize import dumps, loads
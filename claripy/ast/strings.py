@@ -13,6 +13,8 @@ class String(Bits):
     Do not instantiate this class directly, instead use StringS or StringV to construct a symbol or value, and then use
     operations to construct more complicated expressions.
     """
+    __slots__ = ('string_length',)
+
 
     # Identifier used by composite solver in order to identify if a certain constraints contains
     # variables of type string... In this case cvc4 would handle the solving part.
@@ -0,0 +1,144 @@
+"""
+Iterative, memoized traversals of AST DAGs.
+
+ASTs are hash-consed, so a large expression is usually a DAG in which the same subexpression is reachable through many
+paths. The traversals here visit every distinct AST once per call (they memoize on node identity), never recurse (so
+they work on arbitrarily deep ASTs), and let the caller prune the walk at any node.
+"""
+
+
+class _Descend:
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'DESCEND'
+
+# returned by the `pre` callbacks of fold() and transform() to visit the children of an AST
+DESCEND = _Descend()
+
+
+def walk(*roots, descend=None, post_order=False, seen=None):
+    """
+    Iterates over the distinct ASTs reachable from `roots`, each of them once.
+
+    :param roots:       The ASTs to start from. Arguments that are not ASTs are ignored.
+    :param descend:     A function that receives an AST and returns whether its children should be visited. By default,
+                        the whole DAG is visited.
+    :param post_order:  Yield every AST after its children instead of before them.
+    :param seen:        A set of ids of ASTs that should not be visited. It is updated with the ids of the visited
+                        ASTs, and can be shared between walks.
+    """
+    if seen is None:
+        seen = set()
+
+    stack = [ r for r in reversed(roots) if isinstance(r, Base) ]
+    if not post_order:
+        while stack:
+            ast = stack.pop()
+            if id(ast) in seen:
+                continue
+            seen.add(id(ast))
+            yield ast
+            if descend is None or descend(ast):
+                stack.extend(a for a in reversed(ast.args) if isinstance(a, Base) and id(a) not in seen)
+        return
+
+    expanded = set()
+    while stack:
+        ast = stack[-1]
+        key = id(ast)
+        if key in seen:
+            stack.pop()
+        elif key in expanded:
+            stack.pop()
+            expanded.discard(key)
+            seen.add(key)
+            yield ast
+        else:
+            expanded.add(key)
+            if descend is None or descend(ast):
+                stack.extend(a for a in reversed(ast.args) if isinstance(a, Base) and id(a) not in seen)
+
+def fold(root, post, pre=None, leaf=None, memo=None, unwind=None):
+    """
+    Computes a value for `root` bottom-up, computing the value of each distinct AST below it once.
+
+    :param root:    The AST (or non-AST argument) to fold.
+    :param post:    A function that receives an AST and the list of the values of its arguments, and returns the value
+                    of the AST.
+    :param pre:     A function that is called on every AST before its children are visited. It returns either the
+                    value of the AST, in which case the children are not visited and `post` is not called, or DESCEND.
+    :param leaf:    A function that returns the value of an argument that is not an AST. By default, such arguments
+                    are their own value.
+    :param memo:    A dict from AST ids to values. It is updated with the values that are computed, and can be shared
+                    between folds of ASTs that stay alive for as long as the memo is used.
+    :param unwind:  A function that is called with every AST whose value was still being computed when an exception
+                    escaped from one of the callbacks, before the exception is re-raised.
+    :return:        The value of `root`.
+    """
+    if not isinstance(root, Base):
+        return root if leaf is None else leaf(root)
+    if memo is None:
+        memo = { }
+    elif id(root) in memo:
+        return memo[id(root)]
+
+    stack = [ root ]
+    pending = { }
+    try:
+        while stack:
+            ast = stack[-1]
+            key = id(ast)
+            if key in memo:
+                stack.pop()
+                continue
+
+            if key in pending:
+                stack.pop()
+                if leaf is None:
+                    args = [ memo[id(a)] if isinstance(a, Base) else a for a in ast.args ]
+                else:
+                    args = [ memo[id(a)] if isinstance(a, Base) else leaf(a) for a in ast.args ]
+                memo[key] = post(ast, args)
+                del pending[key]
+                continue
+
+            if pre is not None:
+                r = pre(ast)
+                if r is not DESCEND:
+                    stack.pop()
+                    memo[key] = r
+                    continue
+
+            pending[key] = ast
+            stack.extend(a for a in reversed(ast.args) if isinstance(a, Base) and id(a) not in memo)
+    except BaseException:
+        if unwind is not None:
+            for ast in pending.values():
+                unwind(ast)
+        raise
+
+    return memo[id(root)]
+
+def transform(root, pre=None, post=None, memo=None):
+    """
+    Rebuilds `root` bottom-up. Every AST whose arguments changed is rebuilt with make_like(), and the others are kept.
+
+    :param root:    The AST to transform.
+    :param pre:     A function that is called on every AST before its children are visited. It returns either the AST
+                    that should replace it, in which case the children are not visited, or DESCEND.
+    :param post:    A function that receives every visited AST and its rebuilt version (which is the same AST if its
+                    arguments did not change), and returns the AST that should replace it.
+    :param memo:    As for fold().
+    :return:        The transformed AST.
+    """
+    def _rebuild(ast, args):
+        if any(a is not b for a, b in zip(ast.args, args)):
+            new = ast.make_like(ast.op, tuple(args))
+        else:
+            new = ast
+        return new if post is None else post(ast, new)
+
+    return fold(root, _rebuild, pre=pre, memo=memo)
+
+from .base import Base
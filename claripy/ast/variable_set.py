@@ -0,0 +1,224 @@
+import heapq
+import threading
+import weakref
+
+# the variable-name-to-id table. The ids of the names that no live VariableSet has are freed by reclaim_variable_ids(),
+# and reused (smallest first, so that the bitmasks stay short) by new names. Freed ids have None for a name.
+_variable_ids = { }
+_variable_names = [ ]
+_free_ids = [ ]
+_variable_lock = threading.Lock()
+
+# the interned variable sets, keyed by their bitmask
+_sets_by_mask = { }
+
+
+def variable_id(name):
+    """
+    Returns the id of the variable `name`, assigning a new one if necessary.
+    """
+    try:
+        return _variable_ids[name]
+    except KeyError:
+        with _variable_lock:
+            i = _variable_ids.get(name, None)
+            if i is None:
+                if _free_ids:
+                    i = heapq.heappop(_free_ids)
+                    _variable_names[i] = name
+                else:
+                    i = len(_variable_names)
+                    _variable_names.append(name)
+                _variable_ids[name] = i
+            return i
+
+def reclaim_variable_ids():
+    """
+    Frees the ids of the variable names that no live VariableSet has, for new names to reuse. Otherwise, the table of
+    ids keeps every variable name that was ever used, and the bitmasks grow with it.
+
+    A bitmask is only valid while a VariableSet with its ids is alive, so this must not run while other threads build
+    ASTs or variable sets from names. claripy.downsize() calls it.
+
+    :return:    The number of ids that were freed.
+    """
+    with _variable_lock:
+        live = 0
+        for r in list(_sets_by_mask.values()):
+            s = r()
+            if s is not None:
+                live |= s._mask
+
+        freed = 0
+        for i, name in enumerate(_variable_names):
+            if name is not None and not live >> i & 1:
+                del _variable_ids[name]
+                _variable_names[i] = None
+                heapq.heappush(_free_ids, i)
+                freed += 1
+        return freed
+
+def variable_mask(names):
+    """
+    Returns the bitmask of a collection of variable names.
+    """
+    if type(names) is VariableSet:
+        return names._mask
+
+    mask = 0
+    for n in names:
+        mask |= 1 << variable_id(n)
+    return mask
+
+def _mask_names(mask):
+    names = [ ]
+    while mask:
+        low = mask & -mask
+        names.append(_variable_names[low.bit_length() - 1])
+        mask ^= low
+    return names
+
+def _remove(wr):
+    if _sets_by_mask.get(wr.key, None) is wr:
+        del _sets_by_mask[wr.key]
+
+
+class VariableSet(frozenset):
+    """
+    An interned, immutable set of variable names.
+
+    Every variable name is assigned a small integer id, and each VariableSet carries the bitmask of the ids of its
+    names. There is only ever one live VariableSet per bitmask, so equal variable sets are shared between ASTs, and
+    unions, intersections and subset checks between VariableSets are bitmask operations. Otherwise, a VariableSet is
+    just a frozenset of the names.
+
+    Use VariableSet.intern() or VariableSet.from_mask() to get one.
+    """
+
+    __slots__ = ('_mask',)
+
+    @staticmethod
+    def intern(names):
+        """
+        Returns the VariableSet of the given variable names.
+        """
+        if type(names) is VariableSet:
+            return names
+        return VariableSet.from_mask(variable_mask(names))
+
+    @staticmethod
+    def from_mask(mask, parts=None):
+        """
+        Returns the VariableSet with the given bitmask of variable ids.
+
+        :param mask:    The bitmask.
+        :param parts:   Optionally, an iterable of sets whose union has exactly these variables. They are only used
+                        to build the set of names faster, if the VariableSet does not exist yet.
+        """
+        r = _sets_by_mask.get(mask, None)
+        s = r() if r is not None else None
+        if s is None:
+            s = frozenset.__new__(VariableSet, frozenset().union(*parts) if parts is not None else _mask_names(mask))
+            s._mask = mask
+            _sets_by_mask[mask] = weakref.KeyedRef(s, _remove, mask)
+        return s
+
+    @property
+    def mask(self):
+        return self._mask
+
+    def __reduce__(self):
+        # the ids are local to this process, so we pickle the names
+        return VariableSet.intern, (tuple(self),)
+
+    def __repr__(self):
+        return 'VariableSet(%s)' % (repr(set(self)) if self else '')
+
+    def union_mask(self, mask, parts=None):
+        """
+        Returns the union of this set and the variables with the given bitmask.
+
+        :param parts:   Optionally, an iterable of sets whose union (with this set) has exactly these variables.
+        """
+        mask |= self._mask
+        return self if mask == self._mask else VariableSet.from_mask(mask, parts=parts)
+
+    #
+    # Fast paths between VariableSets
+    #
+
+    def union(self, *others):
+        if all(type(o) is VariableSet for o in others):
+            mask = self._mask
+            for o in others:
+                mask |= o._mask
+            return self.union_mask(mask, parts=(self,) + others)
+        return frozenset.union(self, *others)
+
+    def intersection(self, *others):
+        if all(type(o) is VariableSet for o in others):
+            mask = self._mask
+            for o in others:
+                mask &= o._mask
+            return self if mask == self._mask else VariableSet.from_mask(mask)
+        return frozenset.intersection(self, *others)
+
+    def difference(self, *others):
+        if all(type(o) is VariableSet for o in others):
+            mask = self._mask
+            for o in others:
+                mask &= ~o._mask
+            return self if mask == self._mask else VariableSet.from_mask(mask)
+        return frozenset.difference(self, *others)
+
+    def isdisjoint(self, other):
+        if type(other) is VariableSet:
+            return not self._mask & other._mask
+        return frozenset.isdisjoint(self, other)
+
+    def issubset(self, other):
+        if type(other) is VariableSet:
+            return self._mask & ~other._mask == 0
+        return frozenset.issubset(self, other)
+
+    def issuperset(self, other):
+        if type(other) is VariableSet:
+            return other._mask & ~self._mask == 0
+        return frozenset.issuperset(self, other)
+
+    def __or__(self, other):
+        if type(other) is VariableSet:
+            return self.union_mask(other._mask)
+        return frozenset.__or__(self, other)
+
+    def __and__(self, other):
+        if type(other) is VariableSet:
+            return self.intersection(other)
+        return frozenset.__and__(self, other)
+
+    def __sub__(self, other):
+        if type(other) is VariableSet:
+            return self.difference(other)
+        return frozenset.__sub__(self, other)
+
+    def __le__(self, other):
+        if type(other) is VariableSet:
+            return self._mask & ~other._mask == 0
+        return frozenset.__le__(self, other)
+
+    def __ge__(self, other):
+        if type(other) is VariableSet:
+            return other._mask & ~self._mask == 0
+        return frozenset.__ge__(self, other)
+
+    def __lt__(self, other):
+        if type(other) is VariableSet:
+            return self._mask != other._mask and self._mask & ~other._mask == 0
+        return frozenset.__lt__(self, other)
+
+    def __gt__(self, other):
+        if type(other) is VariableSet:
+            return self._mask != other._mask and other._mask & ~self._mask == 0
+        return frozenset.__gt__(self, other)
+
+EMPTY_VARIABLES = VariableSet.from_mask(0)
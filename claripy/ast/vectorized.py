@@ -0,0 +1,304 @@
+"""
+Evaluation of ASTs on many models at once.
+
+ModelCacheMixin checks its cached models against new constraints and evaluates expressions on them one model at a time:
+for every model, the variables of the AST are replaced by their values and the result is evaluated by the concrete
+backend. A ModelTable holds K models as columns, one per variable, and evaluates an AST on all of them at once, with
+one NumPy operation per distinct node of the AST. Bitvectors of up to 64 bits are held in uint64 arrays, and wider
+ones in object arrays of Python ints.
+
+The results are those of the concrete backend. The cases that the evaluation does not handle (floating-point and
+string operations, division by zero, negative shift amounts, and the like) raise a BackendError, and the caller should
+then fall back to evaluating the models one by one.
+
+NumPy is optional: if it is not installed, `available` is False and ModelTable cannot be used.
+"""
+
+import functools
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+available = numpy is not None
+
+
+class ModelTable:
+    """
+    A table of models, with a column of values per variable.
+    """
+
+    def __init__(self, models):
+        """
+        :param models:  A sequence of models: dicts mapping the names of variables to their values. As in ModelCache,
+                        the variables that a model does not mention are 0 (or True, for booleans).
+        """
+        if numpy is None:
+            raise BackendError("NumPy is not available")
+        self.models = models
+        self._columns = { }
+
+    def __len__(self):
+        return len(self.models)
+
+    def eval(self, expr):
+        """
+        Returns the list of the values of an AST in every model.
+        """
+        return traversal.fold(expr, self._post, pre=self._pre).tolist()
+
+    def eval_list(self, exprs):
+        """
+        Returns the lists of the values of several ASTs in every model. Their common subexpressions are evaluated once.
+        """
+        memo = { }
+        return [ traversal.fold(e, self._post, pre=self._pre, memo=memo).tolist() for e in exprs ]
+
+    def satisfied(self, constraints):
+        """
+        Returns a list of whether each model satisfies all the constraints.
+        """
+        r = numpy.ones(len(self.models), dtype=bool)
+        memo = { }
+        for c in constraints:
+            r &= traversal.fold(c, self._post, pre=self._pre, memo=memo)
+        return r.tolist()
+
+    #
+    # Columns
+    #
+
+    def _column(self, name, size):
+        key = (name, size)
+        try:
+            return self._columns[key]
+        except KeyError:
+            pass
+
+        if size is None:
+            col = numpy.fromiter((bool(m.get(name, True)) for m in self.models), dtype=bool, count=len(self.models))
+        elif size <= 64:
+            mask = (1 << size) - 1
+            col = numpy.fromiter(
+                (m.get(name, 0) & mask for m in self.models), dtype=numpy.uint64, count=len(self.models)
+            )
+        else:
+            mask = (1 << size) - 1
+            col = _object_array([ m.get(name, 0) & mask for m in self.models ])
+        self._columns[key] = col
+        return col
+
+    def _pre(self, ast):
+        op = ast.op
+        if op == 'BVS':
+            _check_size(ast.length)
+            return self._column(ast.args[0], ast.length)
+        elif op == 'BoolS':
+            return self._column(ast.args[0], None)
+        elif op == 'BVV':
+            value, size = ast.args
+            if value is None:
+                raise BackendError("can't handle empty BVVs")
+            _check_size(size)
+            if size <= 64:
+                return numpy.full(len(self.models), numpy.uint64(value), dtype=numpy.uint64)
+            return numpy.full(len(self.models), value, dtype=object)
+        elif op == 'BoolV':
+            return numpy.full(len(self.models), bool(ast.args[0]), dtype=bool)
+        elif op not in _operations:
+            raise BackendError("unsupported operation %s" % op)
+        return traversal.DESCEND
+
+    @staticmethod
+    def _post(ast, args):
+        return _operations[ast.op](ast, *args)
+
+#
+# Helpers
+#
+
+def _check_size(size):
+    if not size:
+        raise BackendError("can't handle zero-length bitvectors")
+
+def _object_array(values):
+    a = numpy.empty(len(values), dtype=object)
+    a[:] = values
+    return a
+
+def _const(value, size):
+    # a scalar of the type of the columns of bitvectors of this size
+    return numpy.uint64(value) if size <= 64 else value
+
+def _cast(col, size):
+    if size <= 64:
+        return col if col.dtype == numpy.uint64 else col.astype(numpy.uint64)
+    return col if col.dtype == object else col.astype(object)
+
+def _wrap(col, size):
+    if size == 64 and col.dtype == numpy.uint64:
+        return col
+    return col & _const((1 << size) - 1, size)
+
+def _signed_key(col, size):
+    # flipping the sign bit orders the values as signed values, with an unsigned comparison
+    return col ^ _const(1 << (size - 1), size)
+
+def _shift_amounts(b, size):
+    if ((b >> _const(size - 1, size)) & _const(1, size)).any():
+        # the concrete backend shifts by the signed amount, and fails on negative ones
+        raise BackendError("negative shift amount")
+    big = b >= _const(size, size)
+    if big.any():
+        b = b.copy()
+        b[big] = 0
+    return b, big
+
+def _nonzero(b):
+    if not b.all():
+        raise BackendError("division by zero")
+    return b
+
+#
+# Operations
+#
+
+def _reduce(f):
+    def op(ast, *args):
+        if ast.length is None:
+            raise BackendError("unsupported boolean operation %s" % ast.op)
+        return _wrap(functools.reduce(f, args), ast.length)
+    return op
+
+def _compare(f, signed=False):
+    def op(ast, a, b):
+        if signed:
+            size = ast.args[0].length
+            a, b = _signed_key(a, size), _signed_key(b, size)
+        return numpy.asarray(f(a, b), dtype=bool)
+    return op
+
+def _neg(ast, a):
+    return _wrap(_const(0, ast.length) - a, ast.length)
+
+def _invert(ast, a):
+    return a ^ _const((1 << ast.length) - 1, ast.length)
+
+def _lshift(ast, a, b):
+    amounts, big = _shift_amounts(b, ast.length)
+    r = _wrap(a << amounts, ast.length)
+    r[big] = 0
+    return r
+
+def _lshr(ast, a, b):
+    amounts, big = _shift_amounts(b, ast.length)
+    r = a >> amounts
+    r[big] = 0
+    return r
+
+def _ashr(ast, a, b):
+    size = ast.length
+    amounts, big = _shift_amounts(b, size)
+    mask = _const((1 << size) - 1, size)
+    sign = (a >> _const(size - 1, size)) & _const(1, size)
+    r = (a >> amounts) | (sign * (mask ^ (mask >> amounts)))
+    # the concrete backend shifts everything out, even for negative values
+    r[big] = 0
+    return r
+
+def _div(ast, a, b):
+    return a // _nonzero(b)
+
+def _mod(ast, a, b):
+    return a % _nonzero(b)
+
+def _concat(ast, *args):
+    size = ast.length
+    r = _cast(args[0], size)
+    for a, col in zip(ast.args[1:], args[1:]):
+        r = (r << _const(a.length, size)) | _cast(col, size)
+    return r
+
+def _extract(ast, high, low, a):
+    size = ast.args[2].length
+    r = (a >> _const(low, size)) & _const((1 << (high - low + 1)) - 1, size)
+    return _cast(r, ast.length)
+
+def _zero_ext(ast, n, a):
+    return _cast(a, ast.length)
+
+def _sign_ext(ast, n, a):
+    inner = ast.args[1].length
+    size = ast.length
+    sign = _cast((a >> _const(inner - 1, inner)) & _const(1, inner), size)
+    return _cast(a, size) | (sign * _const(((1 << size) - 1) ^ ((1 << inner) - 1), size))
+
+def _reverse(ast, a):
+    size = ast.length
+    if size == 8:
+        return a
+    if size % 8 != 0:
+        raise BackendError("can't reverse non-byte sized bitvectors")
+    r = a & _const(0, size)
+    for i in range(0, size, 8):
+        r |= ((a >> _const(i, size)) & _const(0xff, size)) << _const(size - 8 - i, size)
+    return r
+
+def _if(ast, c, t, f):
+    return numpy.where(c, t, f)
+
+def _and(ast, *args):
+    return functools.reduce(numpy.logical_and, args)
+
+def _or(ast, *args):
+    return functools.reduce(numpy.logical_or, args)
+
+def _not(ast, a):
+    return numpy.logical_not(a)
+
+_operations = {
+    '__add__': _reduce(operator.add),
+    '__sub__': _reduce(operator.sub),
+    '__mul__': _reduce(operator.mul),
+    '__and__': _reduce(operator.and_),
+    '__or__': _reduce(operator.or_),
+    '__xor__': _reduce(operator.xor),
+    '__floordiv__': _div,
+    '__mod__': _mod,
+    '__neg__': _neg,
+    '__invert__': _invert,
+    '__lshift__': _lshift,
+    '__rshift__': _ashr,
+    'LShR': _lshr,
+
+    '__eq__': _compare(operator.eq),
+    '__ne__': _compare(operator.ne),
+    '__lt__': _compare(operator.lt),
+    '__le__': _compare(operator.le),
+    '__gt__': _compare(operator.gt),
+    '__ge__': _compare(operator.ge),
+    'ULT': _compare(operator.lt),
+    'ULE': _compare(operator.le),
+    'UGT': _compare(operator.gt),
+    'UGE': _compare(operator.ge),
+    'SLT': _compare(operator.lt, signed=True),
+    'SLE': _compare(operator.le, signed=True),
+    'SGT': _compare(operator.gt, signed=True),
+    'SGE': _compare(operator.ge, signed=True),
+
+    'Concat': _concat,
+    'Extract': _extract,
+    'ZeroExt': _zero_ext,
+    'SignExt': _sign_ext,
+    'Reverse': _reverse,
+
+    'If': _if,
+    'And': _and,
+    'Or': _or,
+    'Not': _not,
+}
+
+from ..errors import BackendError
+from . import traversal
@@ -1,4 +1,4 @@
 from .bits import Bits
 
 class VS(Bits):
-    pass
+    __slots__ = ()
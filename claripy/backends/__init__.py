@@ -47,7 +47,11 @@ class Backend:
     _convert() to see if the backend can handle that type of object.
     """
 
-    __slots__ = ('_op_raw', '_op_expr', '_cache_objects', '_solver_required', '_tls', '_true_cache', '_false_cache', )
+    __slots__ = ('_op_raw', '_op_expr', '_cache_objects', '_solver_required', '_tls', '_true_cache', '_false_cache',
+                 '_shared_object_cache', )
+
+    # whether the objects of this backend can be used by any thread, and so can be kept in a shared object cache
+    _shareable_objects = False
 
     def __init__(self, solver_required=None):
         self._op_raw = { }
@@ -58,19 +62,58 @@ class Backend:
         self._tls = threading.local()
         self._true_cache = weakref.WeakKeyDictionary()
         self._false_cache = weakref.WeakKeyDictionary()
+        self._shared_object_cache = None
 
     @property
     def is_smt_backend(self):
         return False
 
+    @property
+    def supports_scopes(self):
+        """
+        Whether the solvers of this backend support push() and pop().
+        """
+        return False
+
     @property
     def _object_cache(self):
+        if self._shared_object_cache is not None:
+            return self._shared_object_cache
+        return self._thread_object_cache
+
+    @property
+    def _thread_object_cache(self):
         try:
             return self._tls.object_cache
         except AttributeError:
             self._tls.object_cache = weakref.WeakKeyDictionary()
             return self._tls.object_cache
 
+    def enable_shared_object_cache(self, maxsize=100000, stripes=16):
+        """
+        Makes all threads share one bounded cache of converted objects, instead of each keeping its own. This is only
+        possible for the backends whose objects don't belong to a thread.
+
+        :param maxsize: The number of objects to keep.
+        :param stripes: The number of independently locked parts of the cache.
+        """
+        if not self._shareable_objects:
+            raise BackendError("the objects of %s can't be shared between threads" % self.__class__.__name__)
+        self._shared_object_cache = SharedObjectCache(maxsize=maxsize, stripes=stripes)
+
+    def disable_shared_object_cache(self):
+        """
+        Goes back to a cache of converted objects per thread.
+        """
+        self._shared_object_cache = None
+
+    def object_cache_stats(self):
+        """
+        Returns the statistics of the shared object cache (see SharedObjectCache.stats()), or None if it is disabled.
+        """
+        cache = self._shared_object_cache
+        return None if cache is None else cache.stats()
+
     def _make_raw_ops(self, op_list, op_dict=None, op_module=None):
         for o in op_list:
             if op_dict is not None:
@@ -120,7 +163,9 @@ class Backend:
         """
         Clears all caches associated with this backend.
         """
-        self._object_cache.clear()
+        self._thread_object_cache.clear()
+        if self._shared_object_cache is not None:
+            self._shared_object_cache.clear()
         self._true_cache.clear()
         self._false_cache.clear()
 
@@ -145,81 +190,79 @@ class Backend:
         :param save:    Save the result in the expression's object cache
         :return:        A backend object.
         """
-        ast_queue = [[expr]]
-        arg_queue = []
-        op_queue = []
+        # the ASTs being converted, each as [ ast, its arguments, the objects of the arguments converted so far ]. The
+        # number of converted arguments is the cursor into the arguments, so that every argument is looked at once. The
+        # bottom frame holds the expression itself.
+        stack = [ (None, (expr,), [ ]) ]
+        # id of an AST -> its object, for the ASTs converted by this call
+        converted = { }
+        cache = self._shared_object_cache
+        if cache is None and self._cache_objects:
+            cache = self._thread_object_cache
 
         try:
-            while ast_queue:
-                args_list = ast_queue[-1]
-
-                if args_list:
-                    ast = args_list.pop(0)
-
-                    if type(ast) in {bool, int, str, float} or not isinstance(ast, Base):
-                        converted = self._convert(ast)
-                        arg_queue.append(converted)
+            while True:
+                ast, args, objects = stack[-1]
+
+                i = len(objects)
+                n = len(args)
+                while i < n:
+                    a = args[i]
+                    if not isinstance(a, Base):
+                        objects.append(self._convert(a))
+                        i += 1
                         continue
 
-                    if self in ast._errored:
-                        raise BackendError("%s can't handle operation %s (%s) due to a failed "
-                                           "conversion on a child node" % (self, ast.op, ast.__class__.__name__))
-
-                    if self._cache_objects:
-                        cached_obj = self._object_cache.get(ast._cache_key, None)
-                        if cached_obj is not None:
-                            arg_queue.append(cached_obj)
-                            continue
-
-                    op_queue.append(ast)
-                    if ast.op in self._op_expr:
-                        ast_queue.append(None)
-                    else:
-                        ast_queue.append(list(ast.args))
-
-                else:
-                    ast_queue.pop()
-
-                    if op_queue:
-                        ast = op_queue.pop()
-
-                        op = self._op_expr.get(ast.op, None)
-                        if op is not None:
-                            r = op(ast)
-
-                        else:
-                            args = arg_queue[-len(ast.args):]
-                            del arg_queue[-len(ast.args):]
-
-                            try:
-                                r = self._call(ast.op, args)
-                            except BackendUnsupportedError:
-                                r = self.default_op(ast)
-
-                        for a in ast.annotations:
-                            r = self.apply_annotation(r, a)
-
-                        if self._cache_objects:
-                            self._object_cache[ast._cache_key] = r
-
-                        arg_queue.append(r)
+                    r = converted.get(id(a), None)
+                    if r is None:
+                        if self in a._errored:
+                            raise BackendError("%s can't handle operation %s (%s) due to a failed "
+                                               "conversion on a child node" % (self, a.op, a.__class__.__name__))
+                        if cache is not None:
+                            r = cache.get(a._cache_key, None)
+                        if r is None:
+                            op = self._op_expr.get(a.op, None)
+                            if op is None:
+                                # convert the arguments first
+                                break
+                            r = self._finish_convert(a, op(a), cache)
+                        converted[id(a)] = r
+                    objects.append(r)
+                    i += 1
+
+                if i < n:
+                    stack.append((a, a.args, [ ]))
+                    continue
+
+                stack.pop()
+                if ast is None:
+                    return objects[0]
+
+                try:
+                    r = self._call(ast.op, objects)
+                except BackendUnsupportedError:
+                    r = self.default_op(ast)
+                r = self._finish_convert(ast, r, cache)
+                converted[id(ast)] = r
+                stack[-1][2].append(r)
 
         except (RuntimeError, ctypes.ArgumentError) as e:
             raise ClaripyRecursionError("Recursion limit reached. Sorry about that.") from e
 
         except BackendError:
-            for ast in op_queue:
-                ast._errored.add(self)
+            for ast, _, _ in stack[1:]:
+                ast._add_errored(self)
             if isinstance(expr, Base):
-                expr._errored.add(self)
+                expr._add_errored(self)
             raise
 
-        # Note: Uncomment the following assertions if you are touching the above implementation
-        # assert len(op_queue) == 0, "op_queue is not empty"
-        # assert len(ast_queue) == 0, "ast_queue is not empty"
-        # assert len(arg_queue) == 1, ("arg_queue has unexpected length", len(arg_queue))
+    def _finish_convert(self, ast, r, cache):
+        for a in ast.annotations:
+            r = self.apply_annotation(r, a)
 
-        return arg_queue.pop()
+        if cache is not None:
+            cache[ast._cache_key] = r
+        return r
 
     def convert_list(self, args):
         return [ self.convert(a) for a in args ]
@@ -454,6 +497,25 @@ class Backend:
         """
         raise BackendError("backend doesn't support solving")
 
+    def push(self, s):
+        """
+        This function opens a new scope in the backend solver. The constraints that are added after it are removed by
+        the matching pop().
+
+        :param s: A backend solver object.
+        """
+        raise BackendError("backend doesn't support scopes")
+
+    def pop(self, s, n=1):
+        """
+        This function closes the `n` innermost scopes of the backend solver, removing the constraints that were added in
+        them.
+
+        :param s: A backend solver object.
+        :param n: The number of scopes to close.
+        """
+        raise BackendError("backend doesn't support scopes")
+
     def unsat_core(self, s):
         """
         This function returns the unsat core from the backend solver.
@@ -547,7 +609,46 @@ class Backend:
 
         raise BackendError("backend doesn't support batch_eval()")
 
-    def min(self, expr, extra_constraints=(), solver=None, model_callback=None):
+    def batch_eval_iter(self, exprs, n, extra_constraints=(), solver=None, model_callback=None):
+        """
+        Evaluate one or multiple expressions, generating the solutions one at a time. The caller can stop early: the
+        solver is left as it was when the generator is closed.
+
+        :param exprs:               A list of expressions to evaluate.
+        :param n:                   The maximum number of different solutions to generate.
+        :param extra_constraints:   Extra constraints (as ASTs) to add to the solver for this solve.
+        :param solver:              A solver object, native to the backend, to assist in the evaluation.
+        :param model_callback:      a function that will be executed with recovered models (if any)
+        :return:                    A generator of up to n tuples, where each tuple is a solution for all expressions.
+        """
+        if self._solver_required and solver is None:
+            raise BackendError("%s requires a solver for batch evaluation" % self.__class__.__name__)
+
+        converted_exprs = [ self.convert(ex) for ex in exprs ]
+
+        return self._batch_eval_iter(
+            converted_exprs, n, extra_constraints=self.convert_list(extra_constraints),
+            solver=solver, model_callback=model_callback
+        )
+
+    def _batch_eval_iter(self, exprs, n, extra_constraints=(), solver=None, model_callback=None):
+        """
+        Evaluate one or multiple expressions, generating the solutions one at a time. By default, the solutions are all
+        found by _batch_eval() first.
+
+        :param exprs:               A list of expressions (backend objects) to evaluate.
+        :param n:                   The maximum number of different solutions to generate.
+        :param extra_constraints:   Extra constraints (as ASTs) to add to the solver for this solve.
+        :param solver:              A solver object, native to the backend, to assist in the evaluation.
+        :param model_callback:      a function that will be executed with recovered models (if any)
+        :return:                    A generator of up to n tuples, where each tuple is a solution for all expressions.
+        """
+        yield from self._batch_eval(
+            exprs, n, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback
+        )
+
+    def min(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None,
+            candidates=()):
         """
         Return the minimum value of `expr`.
 
@@ -556,14 +657,21 @@ class Backend:
                        the evaluation (for example, a z3.Solver)
         :param extra_constraints: extra constraints (as ASTs) to add to the solver for this solve
         :param model_callback:      a function that will be executed with recovered models (if any)
+        :param signed:      whether to compare the values of expr as signed values
+        :param bounds:      a (low, high) pair of values of expr, compared as signed values if `signed` is set, that all
+                            the possible values of expr lie between, or None. It is only a hint.
+        :param candidates:  values that expr is known to be able to take, to start the search from
         :return: the minimum possible value of expr (backend object)
         """
         if self._solver_required and solver is None:
             raise BackendError("%s requires a solver for evaluation" % self.__class__.__name__)
 
-        return self._min(self.convert(expr), extra_constraints=self.convert_list(extra_constraints), solver=solver, model_callback=model_callback)
+        return self._min(
+            self.convert(expr), extra_constraints=self.convert_list(extra_constraints), solver=solver,
+            model_callback=model_callback, signed=signed, bounds=bounds, candidates=candidates
+        )
 
-    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None): #pylint:disable=unused-argument,no-self-use
+    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()): #pylint:disable=unused-argument,no-self-use
         """
         Return the minimum value of expr.
 
@@ -572,11 +680,15 @@ class Backend:
                        the evaluation (for example, a z3.Solver)
         :param extra_constraints: extra constraints (as ASTs) to add to the solver for this solve
         :param model_callback:      a function that will be executed with recovered models (if any)
+        :param signed:      whether to compare the values of expr as signed values
+        :param bounds:      a (low, high) pair of values that all the possible values of expr lie between, or None
+        :param candidates:  values that expr is known to be able to take
         :return: the minimum possible value of expr (backend object)
         """
         raise BackendError("backend doesn't support min()")
 
-    def max(self, expr, extra_constraints=(), solver=None, model_callback=None):
+    def max(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None,
+            candidates=()):
         """
         Return the maximum value of expr.
 
@@ -585,14 +697,21 @@ class Backend:
                        the evaluation (for example, a z3.Solver)
         :param extra_constraints: extra constraints (as ASTs) to add to the solver for this solve
         :param model_callback:      a function that will be executed with recovered models (if any)
+        :param signed:      whether to compare the values of expr as signed values
+        :param bounds:      a (low, high) pair of values of expr, compared as signed values if `signed` is set, that all
+                            the possible values of expr lie between, or None. It is only a hint.
+        :param candidates:  values that expr is known to be able to take, to start the search from
         :return: the maximum possible value of expr (backend object)
         """
         if self._solver_required and solver is None:
             raise BackendError("%s requires a solver for evaluation" % self.__class__.__name__)
 
-        return self._max(self.convert(expr), extra_constraints=self.convert_list(extra_constraints), solver=solver, model_callback=model_callback)
+        return self._max(
+            self.convert(expr), extra_constraints=self.convert_list(extra_constraints), solver=solver,
+            model_callback=model_callback, signed=signed, bounds=bounds, candidates=candidates
+        )
 
-    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None): #pylint:disable=unused-argument,no-self-use
+    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()): #pylint:disable=unused-argument,no-self-use
         """
         Return the maximum value of expr.
 
@@ -601,6 +720,9 @@ class Backend:
                        the evaluation (for example, a z3.Solver)
         :param extra_constraints: extra constraints (as ASTs) to add to the solver for this solve
         :param model_callback:      a function that will be executed with recovered models (if any)
+        :param signed:      whether to compare the values of expr as signed values
+        :param bounds:      a (low, high) pair of values that all the possible values of expr lie between, or None
+        :param candidates:  values that expr is known to be able to take
         :return: the maximum possible value of expr (backend object)
         """
         raise BackendError("backend doesn't support max()")
@@ -649,6 +771,14 @@ class Backend:
         """
         raise BackendError("backend doesn't support solving")
 
+    def interrupt_handle(self): #pylint:disable=no-self-use
+        """
+        Returns a function that interrupts, from another thread, the solve that the calling thread is running with this
+        backend, and the ones it runs afterwards, until it gets another handle. The interrupted solves raise
+        ClaripySolverInterruptError. Backends that can't interrupt their solves return None.
+        """
+        return None
+
 
     def solution(self, expr, v, extra_constraints=(), solver=None, model_callback=None):
         """
@@ -777,6 +907,7 @@ class Backend:
         raise BackendError('Backend %s does not support operation %s' % (self, expr.op))
 
 from ..errors import BackendError, ClaripyRecursionError, BackendUnsupportedError
+from .object_cache import SharedObjectCache
 from .backend_z3 import BackendZ3
 from .backend_z3_parallel import BackendZ3Parallel
 from .backend_concrete import BackendConcrete
@@ -11,6 +11,7 @@ from . import BackendError, Backend
 class BackendConcrete(Backend):
 
     __slots__ = tuple()
+    _shareable_objects = True
 
     def __init__(self):
         Backend.__init__(self)
@@ -160,14 +161,18 @@ class BackendConcrete(Backend):
 
         return [ tuple(self._to_primitive(ex) for ex in exprs) ]
 
-    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None):
+    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()): #pylint:disable=unused-argument
         if not all(extra_constraints):
             raise UnsatError('concrete False constraint in extra_constraints')
+        if signed and isinstance(expr, bv.BVV):
+            return expr.signed
         return self._to_primitive(expr)
 
-    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None):
+    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()): #pylint:disable=unused-argument
         if not all(extra_constraints):
             raise UnsatError('concrete False constraint in extra_constraints')
+        if signed and isinstance(expr, bv.BVV):
+            return expr.signed
         return self._to_primitive(expr)
 
     def _solution(self, expr, v, extra_constraints=(), solver=None, model_callback=None):
@@ -52,6 +52,8 @@ def convert_args(f):
     return converter
 
 class BackendVSA(Backend):
+    _shareable_objects = True
+
     def __init__(self):
         Backend.__init__(self)
         # self._make_raw_ops(set(expression_operations) - set(expression_set_operations), op_module=BackendVSA)
@@ -124,29 +126,37 @@ class BackendVSA(Backend):
         else:
             raise BackendError('Unsupported type %s' % type(expr))
 
-    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None):
+    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()): #pylint:disable=unused-argument
         if isinstance(expr, StridedInterval):
             if expr.is_top:
                 # TODO: Return
-                return 0
+                return StridedInterval.signed_min_int(expr.bits) if signed else 0
 
+            if signed:
+                return min(lb for lb, _ in expr._signed_bounds())
             return expr.min
 
         elif isinstance(expr, ValueSet):
+            if signed:
+                raise BackendError('signed min() of value sets is not supported')
             return expr.min
 
         else:
             raise BackendError('Unsupported expr type %s' % type(expr))
 
-    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None):
+    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()): #pylint:disable=unused-argument
         if isinstance(expr, StridedInterval):
             if expr.is_top:
                 # TODO:
-                return StridedInterval.max_int(expr.bits)
+                return StridedInterval.signed_max_int(expr.bits) if signed else StridedInterval.max_int(expr.bits)
 
+            if signed:
+                return max(ub for _, ub in expr._signed_bounds())
             return expr.max
 
         elif isinstance(expr, ValueSet):
+            if signed:
+                raise BackendError('signed max() of value sets is not supported')
             return expr.max
 
         else:
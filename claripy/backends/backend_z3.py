@@ -5,6 +5,7 @@ import ctypes
 import logging
 import numbers
 import operator
+import itertools
 import threading
 import weakref
 from functools import reduce
@@ -13,6 +14,7 @@ from decimal import Decimal
 from cachetools import LRUCache
 
 from ..errors import ClaripyZ3Error
+from ..simplification_cache import simplification_cache
 
 l = logging.getLogger("claripy.backends.backend_z3")
 
@@ -46,6 +48,10 @@ solve_count = 0
 
 supports_fp = hasattr(z3, 'fpEQ')
 
+# the names of the literals that stand for extra constraints passed as assumptions
+_ASSUMPTION_PREFIX = '__claripy_assumption_'
+_assumption_count = itertools.count()
+
 #
 # Utility functions
 #
@@ -83,6 +89,9 @@ def _z3_decl_name_str(ctx, decl):
         raise z3.Z3Exception(z3.lib().Z3_get_error_msg(ctx, err))
     return symbol_name
 
+def _is_variable(e):
+    return z3.is_const(e) and e.decl().kind() == z3.Z3_OP_UNINTERPRETED
+
 
 class SmartLRUCache(LRUCache):
     def __init__(self, maxsize, getsizeof=None, evict=None):
@@ -104,9 +113,9 @@ from . import Backend
 class BackendZ3(Backend):
     _split_on = { 'And', 'Or' }
 
-    def __init__(self, reuse_z3_solver=None, ast_cache_size=10000):
+    def __init__(self, reuse_z3_solver=None, ast_cache_size=10000, assume_extra_constraints=None,
+                 optimize_min_max=None):
         Backend.__init__(self, solver_required=True)
-        self._enable_simplification_cache = False
         self._hash_to_constraint = weakref.WeakValueDictionary()
 
         # Per-thread Z3 solver
@@ -117,6 +126,19 @@ class BackendZ3(Backend):
                 else False
         self.reuse_z3_solver = reuse_z3_solver
 
+        # Pass the extra constraints of solves to check() as assumptions, instead of asserting them in a scope that is
+        # popped afterwards, so that Z3 keeps what it learned from one solve to the next.
+        if assume_extra_constraints is None:
+            assume_extra_constraints = os.environ.get('Z3_ASSUME_EXTRA_CONSTRAINTS', "False").lower() in \
+                {"1", "true", "yes", "y"}
+        self.assume_extra_constraints = assume_extra_constraints
+
+        # Find the extrema of expressions with the objectives of Z3's Optimize, instead of a search over the values. It is
+        # faster on some constraints, and much slower on others.
+        if optimize_min_max is None:
+            optimize_min_max = os.environ.get('Z3_OPTIMIZE_MIN_MAX', "False").lower() in {"1", "true", "yes", "y"}
+        self.optimize_min_max = optimize_min_max
+
         self._ast_cache_size = ast_cache_size
 
         # and the operations
@@ -226,30 +248,12 @@ class BackendZ3(Backend):
             self._tls.sym_cache = weakref.WeakValueDictionary()
             return self._tls.sym_cache
 
-    @property
-    def _simplification_cache_key(self):
-        try:
-            return self._tls.simplification_cache_key
-        except AttributeError:
-            self._tls.simplification_cache_key = weakref.WeakValueDictionary()
-            return self._tls.simplification_cache_key
-
-    @property
-    def _simplification_cache_val(self):
-        try:
-            return self._tls.simplification_cache_val
-        except AttributeError:
-            self._tls.simplification_cache_val = weakref.WeakValueDictionary()
-            return self._tls.simplification_cache_val
-
     def downsize(self):
         Backend.downsize(self)
 
         self._ast_cache.clear()
         self._var_cache.clear()
         self._sym_cache.clear()
-        self._simplification_cache_key.clear()
-        self._simplification_cache_val.clear()
 
     @condom
     def _size(self, a):
@@ -262,6 +266,14 @@ class BackendZ3(Backend):
         l.warning("BackendZ3.name() called. This is weird.")
         raise BackendError("name is not implemented yet")
 
+    @property
+    def _assumption_literals(self):
+        try:
+            return self._tls.assumption_literals
+        except AttributeError:
+            self._tls.assumption_literals = weakref.WeakKeyDictionary()
+            return self._tls.assumption_literals
+
     def _pop_from_ast_cache(self, _, tpl):
         _, raw_ast = tpl
         z3.Z3_dec_ref(self._context.ctx, raw_ast)
@@ -610,6 +622,7 @@ class BackendZ3(Backend):
             # Load the existing Z3 solver for this thread
             s = self._tls.solver
             s.reset()
+            self._assumption_literals.pop(s, None)
 
         # for some reason we always reset the solver anyway, so always clear it. REUSE_SOLVER is fundamentally broken
         self._hash_to_constraint.clear()
@@ -633,13 +646,103 @@ class BackendZ3(Backend):
         else:
             s.add(*c)
 
+    @property
+    def supports_scopes(self):
+        return True
+
+    def push(self, s):
+        s.push()
+
+    def pop(self, s, n=1):
+        s.pop(n)
+
+        # the assumption literals that were defined in the popped scopes are gone
+        literals = self._assumption_literals.get(s, None)
+        if literals:
+            level = s.num_scopes()
+            for key in [ key for key, (_, _, scope) in literals.items() if scope > level ]:
+                del literals[key]
+
     def _unsat_core(self, s):
         cores = s.unsat_core()
         constraints = [ ]
         for core in cores:
-            constraints.append(self._hash_to_constraint.get(str(core)))
+            name = str(core)
+            if name.startswith(_ASSUMPTION_PREFIX):
+                continue
+            constraints.append(self._hash_to_constraint.get(name))
         return constraints
 
+    #
+    # Extra constraints
+    #
+
+    def _assumptions(self, solver, constraints):
+        """
+        Returns literals that stand for `constraints` in `solver`, to be passed to check(). Each of them is asserted to
+        imply its constraint the first time it is used in the solver, and stays valid until the scope where that
+        happened is popped with pop().
+        """
+        literals = self._assumption_literals.get(solver, None)
+        if literals is None:
+            literals = self._assumption_literals[solver] = { }
+
+        r = [ ]
+        for c in constraints:
+            try:
+                literal = literals[c.get_id()][0]
+            except KeyError:
+                literal = z3.Bool('%s%d' % (_ASSUMPTION_PREFIX, next(_assumption_count)), ctx=solver.ctx)
+                solver.add(z3.Implies(literal, c))
+                # the constraint is kept alive, so that its id isn't reused
+                literals[c.get_id()] = (literal, c, solver.num_scopes())
+            r.append(literal)
+        return r
+
+    def interrupt_handle(self):
+        # Z3 only interrupts the check that is running in the context, so the checks that start afterwards are stopped
+        # by the event
+        interrupted = self._tls.interrupted = threading.Event()
+        context = self._context
+
+        def interrupt():
+            interrupted.set()
+            context.interrupt()
+        return interrupt
+
+    def _check(self, solver, assumptions=()):
+        """
+        Checks a Z3 solver (or optimizer), and raises ClaripySolverInterruptError if the check was interrupted through
+        interrupt_handle().
+        """
+        interrupted = getattr(self._tls, 'interrupted', None)
+        if interrupted is not None and interrupted.is_set():
+            raise ClaripySolverInterruptError("the solve was interrupted")
+        r = solver.check(*assumptions)
+        if r == z3.unknown and interrupted is not None and interrupted.is_set():
+            raise ClaripySolverInterruptError("the solve was interrupted")
+        return r
+
+    def _push_extra_constraints(self, solver, extra_constraints):
+        """
+        Makes `solver` take the extra constraints of a solve into account, and returns the assumptions to check it with.
+        The extra constraints are either asserted in a new scope, or passed as assumptions.
+        """
+        if len(extra_constraints) == 0:
+            return ()
+        if self.assume_extra_constraints:
+            return self._assumptions(solver, extra_constraints)
+        solver.push()
+        solver.add(*extra_constraints)
+        return ()
+
+    def _pop_extra_constraints(self, solver, extra_constraints):
+        """
+        Undoes _push_extra_constraints().
+        """
+        if len(extra_constraints) > 0 and not self.assume_extra_constraints:
+            solver.pop()
+
     @condom
     def _primitive_from_model(self, model, expr):
         v = model.eval(expr, model_completion=True)
@@ -656,6 +759,8 @@ class BackendZ3(Backend):
         model = { }
         for m_f in z3_model:
             n = _z3_decl_name_str(m_f.ctx.ctx, m_f.ast).decode()
+            if n.startswith(_ASSUMPTION_PREFIX):
+                continue
             m = m_f()
             me = z3_model.eval(m)
             model[n] = self._abstract_to_primitive(me.ctx.ctx, me.ast)
@@ -666,22 +771,19 @@ class BackendZ3(Backend):
         global solve_count
 
         solve_count += 1
-        if len(extra_constraints) > 0:
-            solver.push()
-            solver.add(*extra_constraints)
+        assumptions = self._push_extra_constraints(solver, extra_constraints)
 
         try:
 
             l.debug("Doing a check!")
             #print "CHECKING"
-            if solver.check() != z3.sat:
+            if self._check(solver, assumptions) != z3.sat:
                 return False
 
             if model_callback is not None:
                 model_callback(self._generic_model(solver.model()))
         finally:
-            if len(extra_constraints) > 0:
-                solver.pop()
+            self._pop_extra_constraints(solver, extra_constraints)
         return True
 
     def _eval(self, expr, n, extra_constraints=(), solver=None, model_callback=None):
@@ -695,177 +797,268 @@ class BackendZ3(Backend):
 
     @condom
     def _batch_eval(self, exprs, n, extra_constraints=(), solver=None, model_callback=None):
-        global solve_count
-
-        result_values = [ ]
+        return list(self._batch_eval_iter(
+            exprs, n, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback
+        ))
 
-        if len(extra_constraints) > 0 or n != 1:
-            solver.push()
-        if len(extra_constraints) > 0:
-            solver.add(*extra_constraints)
-
-        for i in range(n):
-            solve_count += 1
-            l.debug("Doing a check!")
-            if solver.check() != z3.sat:
-                break
-            model = solver.model()
-
-            # construct results
-            r = [ ]
-            for expr in exprs:
-                if not isinstance(expr, (numbers.Number, str, bool)):
-                    v = self._primitive_from_model(model, expr)
-                    r.append(v)
-                else:
-                    r.append(expr)
-
-            # Append the solution to the result list
-            if model_callback is not None:
-                model_callback(self._generic_model(solver.model()))
-            result_values.append(tuple(r))
-
-            # Construct the extra constraint so we don't get the same result anymore
-            if i + 1 != n:
-                if len(exprs) == 1:
-                    solver.add(exprs[0] != r[0])
-                else:
-                    solver.add(self._op_raw_Not(self._op_raw_And(*[(ex == ex_v) for ex, ex_v in zip(exprs, r)])))
-                model = None
-
-        if len(extra_constraints) > 0 or n != 1:
-            solver.pop()
-
-        return result_values
+    def _batch_eval_iter(self, exprs, n, extra_constraints=(), solver=None, model_callback=None):
+        """
+        Enumerates the solutions of exprs, projected on their values.
 
-    @condom
-    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None):
+        The bitvectors and booleans are concatenated into a single bitvector, the projection, whose value is read from
+        every model at once, and every solution is blocked by a single disequality on it. The variables that a model
+        leaves out can take any value: when the bits of the projection that depend on them are distinct bits of these
+        variables, the whole cube of their values is made of solutions, which are generated without another check and
+        blocked with a single clause over the other bits.
+        """
         global solve_count
 
-        lo = 0
-        hi = 2**expr.size()-1
-        vals = set()
-
-        if len(extra_constraints) > 0:
-            solver.push()
-            solver.add(*[self.convert(e) for e in extra_constraints])
-
-        numpop = 0
-
-        # TODO: Can only deal with bitvectors, not floats
-        while hi-lo > 1:
-            middle = (lo + hi)//2
-            #l.debug("h/m/l/d: %d %d %d %d", hi, middle, lo, hi-lo)
+        projection = self._projection(exprs)
 
+        assumptions = self._push_extra_constraints(solver, extra_constraints)
+        if n != 1:
             solver.push()
-            # TODO: is this assumption correct?
-            # here it's not safe to call directly the z3 low level API since it might happen that the argument is an
-            # integer and not a BV
-            solver.add(z3.UGE(expr, lo), z3.ULE(expr, middle))
-            numpop += 1
 
-            solve_count += 1
-            l.debug("Doing a check!")
-            if solver.check() == z3.sat:
-                l.debug("... still sat")
+        try:
+            count = 0
+            while count < n:
+                solve_count += 1
+                l.debug("Doing a check!")
+                if self._check(solver, assumptions) != z3.sat:
+                    break
+                model = solver.model()
                 if model_callback is not None:
-                    model_callback(self._generic_model(solver.model()))
-                vals.add(self._primitive_from_model(solver.model(), expr))
-                hi = middle
-            else:
-                l.debug("... now unsat")
-                lo = middle
+                    model_callback(self._generic_model(model))
+
+                if projection is None:
+                    r = tuple(
+                        e if isinstance(e, (numbers.Number, str, bool)) else self._primitive_from_model(model, e)
+                        for e in exprs
+                    )
+                    count += 1
+                    yield r
+                    if count != n:
+                        if len(exprs) == 1:
+                            solver.add(exprs[0] != r[0])
+                        else:
+                            solver.add(self._op_raw_Not(self._op_raw_And(*[ ex == v for ex, v in zip(exprs, r) ])))
+                    continue
+
+                proj, split = projection
+                if proj is None:
+                    # only constants
+                    yield split(0)
+                    break
+
+                value, free = self._projected_cube(model, proj)
+                for v in self._cube_values(value, free, n - count):
+                    count += 1
+                    yield split(v)
+                if count != n:
+                    if free:
+                        fixed = ((1 << proj.size()) - 1) ^ free
+                        solver.add(proj & fixed != value)
+                    else:
+                        solver.add(proj != value)
+        except z3.Z3Exception as ze:
+            raise ClaripyZ3Error() from ze
+        finally:
+            if n != 1:
                 solver.pop()
-                numpop -= 1
+            self._pop_extra_constraints(solver, extra_constraints)
 
-        for _ in range(numpop):
-            solver.pop()
+    @staticmethod
+    def _projection(exprs):
+        """
+        Returns the projection of exprs, and a function that splits its values into solutions of exprs, or None if they
+        can't be projected.
+        """
+        parts = [ ]
+        fields = [ ]
+        shift = 0
+        for e in reversed(exprs):
+            if isinstance(e, (numbers.Number, str, bool)):
+                fields.append((None, e))
+            elif z3.is_bv(e):
+                parts.append(e)
+                fields.append((shift, (1 << e.size()) - 1))
+                shift += e.size()
+            elif z3.is_bool(e):
+                parts.append(z3.If(e, z3.BitVecVal(1, 1, e.ctx), z3.BitVecVal(0, 1, e.ctx)))
+                fields.append((shift, None))
+                shift += 1
+            else:
+                return None
+        fields.reverse()
 
-        #l.debug("final hi/lo: %d, %d", hi, lo)
+        def split(v):
+            return tuple(
+                a if shift is None else bool(v >> shift & 1) if a is None else v >> shift & a
+                for shift, a in fields
+            )
 
-        if hi == lo:
-            vals.add(lo)
-        else:
-            solver.push()
-            solver.add(expr == lo)
-            l.debug("Doing a check!")
-            if solver.check() == z3.sat:
-                if model_callback is not None:
-                    model_callback(self._generic_model(solver.model()))
-                vals.add(lo)
-                solver.pop()
-            else:
-                vals.add(hi)
-                solver.pop()
+        if not parts:
+            return None, split
+        return (parts[0] if len(parts) == 1 else z3.Concat(*reversed(parts))), split
 
-        if len(extra_constraints) > 0:
-            solver.pop()
+    def _projected_cube(self, model, proj):
+        """
+        Returns the value of the projection in a model, with the bits that can take any value cleared, and the mask of
+        these bits.
+        """
+        partial = model.eval(proj)
+        if z3.is_bv_value(partial):
+            return partial.as_long(), 0
+
+        value = self._primitive_from_model(model, proj)
+        free = 0
+        seen = set()
+        for i in range(proj.size()):
+            bit = z3.simplify(z3.Extract(i, i, partial))
+            if z3.is_bv_value(bit):
+                continue
+            if z3.is_app_of(bit, z3.Z3_OP_EXTRACT) and _is_variable(bit.arg(0)):
+                source = (bit.arg(0).get_id(), bit.params()[1])
+            elif _is_variable(bit):
+                source = (bit.get_id(), 0)
+            else:
+                # the bit is a function of the left out variables, which might tie it to others: only the value in the
+                # model is known to be a solution
+                return value, 0
+            if source in seen:
+                return value, 0
+            seen.add(source)
+            free |= 1 << i
+        return value & ~free, free
 
-        return min(vals)
+    @staticmethod
+    def _cube_values(value, free, n):
+        """
+        Generates up to n of the values that only differ from value in the bits of free.
+        """
+        bits = [ 1 << i for i in range(free.bit_length()) if free >> i & 1 ]
+        for k in range(min(n, 1 << len(bits))):
+            v = value
+            for i, bit in enumerate(bits):
+                if k >> i & 1:
+                    v |= bit
+            yield v
 
     @condom
-    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None):
-        global solve_count
+    def _min(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()):
+        return self._extremum(
+            expr, False, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback,
+            signed=signed, bounds=bounds, candidates=candidates
+        )
 
-        lo = 0
-        hi = 2**expr.size()-1
-        vals = set()
+    @condom
+    def _max(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None, candidates=()):
+        return self._extremum(
+            expr, True, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback,
+            signed=signed, bounds=bounds, candidates=candidates
+        )
 
-        if len(extra_constraints) > 0:
-            solver.push()
-            solver.add(*[self.convert(e) for e in extra_constraints])
+    def _extremum(self, expr, maximize, extra_constraints=(), solver=None, model_callback=None, signed=False,
+                  bounds=None, candidates=()):
+        """
+        Finds the smallest or the largest value of expr.
 
-        numpop = 0
+        Both are found by minimizing a key: the bits of expr, with the sign bit flipped for signed values and all the
+        bits flipped to maximize, so that the order of the keys as unsigned values is the order that we want. The search
+        keeps a range of keys that holds the best one: the smallest key not yet ruled out, and the best key found in a
+        model. Every satisfiable check brings the top of the range down to the key of the value in its model, and the
+        range starts from the known candidates and bounds.
+        """
+        global solve_count
 
         # TODO: Can only deal with bitvectors, not floats
-        while hi-lo > 1:
-            middle = (lo + hi)//2
-            #l.debug("h/m/l/d: %d %d %d %d", hi, middle, lo, hi-lo)
-
-            solver.push()
-            # TODO: is this assumption correct?
-            # here it's not safe to call directly the z3 low level API since it might happen that the argument is an
-            # integer and not a BV
-            solver.add(z3.UGT(expr, middle), z3.ULE(expr, hi))
-            numpop += 1
 
-            solve_count += 1
-            l.debug("Doing a check!")
-            if solver.check() == z3.sat:
-                l.debug("... still sat")
-                lo = middle
-                vals.add(self._primitive_from_model(solver.model(), expr))
-                if model_callback is not None:
-                    model_callback(self._generic_model(solver.model()))
-            else:
-                l.debug("... now unsat")
-                hi = middle
-                solver.pop()
-                numpop -= 1
-            #l.debug("          now: %d %d %d %d", hi, middle, lo, hi-lo)
+        size = expr.size()
+        top = (1 << size) - 1
+        flip = (1 << (size - 1) if signed else 0) ^ (top if maximize else 0)
+        key = expr ^ flip if flip else expr
 
-        for _ in range(numpop):
-            solver.pop()
-
-        if hi == lo:
-            vals.add(hi)
+        lo = 0
+        if bounds is not None:
+            lo = min((bounds[0] & top) ^ flip, (bounds[1] & top) ^ flip)
+        hi = None
+        for v in candidates:
+            k = (v & top) ^ flip
+            if hi is None or k < hi:
+                hi = k
+
+        extra_constraints = [ self.convert(e) for e in extra_constraints ]
+        if self.optimize_min_max:
+            hi = self._optimize(key, extra_constraints, solver, model_callback)
         else:
-            solver.push()
-            solver.add(expr == hi)
-            l.debug("Doing a check!")
-            if solver.check() == z3.sat:
-                if model_callback is not None:
-                    model_callback(self._generic_model(solver.model()))
-                vals.add(hi)
-                solver.pop()
-            else:
-                vals.add(lo)
-                solver.pop()
+            assumptions = self._push_extra_constraints(solver, extra_constraints)
+            try:
+                if hi is None:
+                    solve_count += 1
+                    l.debug("Doing a check!")
+                    if self._check(solver, assumptions) != z3.sat:
+                        raise UnsatError("unsat during %s()" % ('max' if maximize else 'min'))
+                    model = solver.model()
+                    if model_callback is not None:
+                        model_callback(self._generic_model(model))
+                    hi = self._primitive_from_model(model, key)
+
+                # the values of expr are usually close to the ones in the models, far from the ends of the range: the
+                # search first gallops down from the best value found, with steps that double while the checks are
+                # satisfiable, and then bisects what is left of the range
+                step = 1
+                while lo < hi:
+                    if step and hi - step >= lo:
+                        middle = hi - step
+                    else:
+                        step = 0
+                        middle = (lo + hi - 1) // 2
+                    solver.push()
+                    try:
+                        solver.add(z3.ULE(key, middle))
+                        if lo > 0:
+                            solver.add(z3.UGE(key, lo))
+
+                        solve_count += 1
+                        l.debug("Doing a check!")
+                        if self._check(solver, assumptions) == z3.sat:
+                            model = solver.model()
+                            if model_callback is not None:
+                                model_callback(self._generic_model(model))
+                            hi = self._primitive_from_model(model, key)
+                            step *= 2
+                        else:
+                            lo = middle + 1
+                            step = 0
+                    finally:
+                        solver.pop()
+            finally:
+                self._pop_extra_constraints(solver, extra_constraints)
+
+        v = hi ^ flip
+        if signed and v >> (size - 1):
+            v -= 1 << size
+        return v
+
+    def _optimize(self, key, extra_constraints, solver, model_callback):
+        """
+        Minimizes a key with an objective of Z3's Optimize, over the constraints of the solver.
+        """
+        global solve_count
 
-        if len(extra_constraints) > 0:
-            solver.pop()
+        optimizer = z3.Optimize(ctx=solver.ctx)
+        optimizer.add(*solver.assertions())
+        optimizer.add(*extra_constraints)
+        optimizer.minimize(key)
 
-        return max(vals)
+        solve_count += 1
+        l.debug("Doing an optimization!")
+        if self._check(optimizer) != z3.sat:
+            raise UnsatError("unsat during optimization")
+        model = optimizer.model()
+        if model_callback is not None:
+            model_callback(self._generic_model(model))
+        return self._primitive_from_model(model, key)
 
     def _simplify(self, e): #pylint:disable=W0613,R0201
         raise Exception("This shouldn't be called. Bug Yan.")
@@ -875,21 +1068,9 @@ class BackendZ3(Backend):
         if expr._simplified:
             return expr
 
-        if self._enable_simplification_cache:
-            try:
-                k = self._simplification_cache_key[expr._cache_key]
-                #print "HIT WEAK KEY CACHE"
-                return k
-            except KeyError:
-                pass
-            try:
-                k = self._simplification_cache_val[expr._cache_key]
-                #print "HIT WEAK VALUE CACHE"
-                return k
-            except KeyError:
-                pass
-
-            #print "MISS CACHE"
+        o = simplification_cache.lookup('z3', expr)
+        if o is not None:
+            return o
 
         l.debug("SIMPLIFYING EXPRESSION")
 
@@ -916,9 +1097,7 @@ class BackendZ3(Backend):
         o = self._abstract(s)
         o._simplified = Base.FULL_SIMPLIFY
 
-        if self._enable_simplification_cache:
-            self._simplification_cache_val[expr._cache_key] = o
-            self._simplification_cache_key[expr._cache_key] = o
+        simplification_cache.store('z3', expr, o)
         return o
 
     def _is_false(self, e, extra_constraints=(), solver=None, model_callback=None):
@@ -1357,7 +1536,7 @@ from ..ast.fp import FP, FPV
 from ..ast.strings import StringV, StringS
 from ..operations import backend_operations, backend_fp_operations
 from ..fp import FSort, RM, RM_NearestTiesEven, RM_NearestTiesAwayFromZero, RM_TowardsPositiveInf, RM_TowardsNegativeInf, RM_TowardsZero
-from ..errors import ClaripyError, BackendError, ClaripyOperationError
+from ..errors import ClaripyError, BackendError, ClaripyOperationError, UnsatError, ClaripySolverInterruptError
 from .. import _all_operations
 
 op_type_map = {
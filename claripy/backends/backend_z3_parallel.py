@@ -1,124 +1,211 @@
-import os
-import pickle
-import threading
+"""
+A Z3 backend that solves in a pool of worker processes.
 
-num_children = 0
+The solver objects of BackendZ3Parallel hold the constraints that are added to them as ASTs, and every solve is sent to
+a SolverPool (see solver_pool.py) along with them. The calls of the Backend API block until the solve is done, so the
+solves that run at once are the ones made from different threads, or submitted with submit(). Everything else
+(converting, simplifying) is done in this process, as BackendZ3 does.
+"""
 
+import concurrent.futures
 import logging
 l = logging.getLogger("claripy.backends.backend_z3_parallel")
 
 from .backend_z3 import BackendZ3
 
+class ParallelSolver:
+    """
+    The solver objects of BackendZ3Parallel: the constraints that were added to them, in scopes.
+    """
+
+    __slots__ = ('constraints', 'track', 'timeout', 'worker', '_held', '_scopes')
+
+    def __init__(self, timeout=None):
+        self.constraints = [ ]
+        self.track = False
+        self.timeout = timeout
+        # the worker that did the last solve, which likely still has the constraints asserted
+        self.worker = None
+        # the ids of the constraints, as frontends add the same ones again
+        self._held = set()
+        self._scopes = [ ]
+
+    def add(self, constraints, track=False):
+        self.track |= track
+        for c in constraints:
+            if id(c) not in self._held:
+                self._held.add(id(c))
+                self.constraints.append(c)
+
+    def push(self):
+        self._scopes.append(len(self.constraints))
+
+    def pop(self, n=1):
+        if n > len(self._scopes):
+            raise BackendError("popping %d scopes out of %d" % (n, len(self._scopes)))
+        size = self._scopes[-n]
+        del self._scopes[-n:]
+        for c in self.constraints[size:]:
+            self._held.discard(id(c))
+        del self.constraints[size:]
+
+    def num_scopes(self):
+        return len(self._scopes)
+
 class BackendZ3Parallel(BackendZ3):
-    def __init__(self):
-        BackendZ3.__init__(self)
-        self._child = False
-        self._lock = threading.RLock()
-        self._cache_objects = False
-
-    def _background(self, f_name, *args, **kwargs):
-        global num_children
-
-        f = getattr(BackendZ3, f_name)
-        if self._child:
-            return f(self, *args, **kwargs)
-
-        p_r, p_w = os.pipe()
-        p = os.fork()
-
-        if p == 0:
-            self._child = True
-            self._lock = threading.RLock()
-            try:
-                r = f(self, *args, **kwargs)
-            except UnsatError as e:
-                r = e
-
-            # print("WRITING (%d)" % os.getpid())
-            pickled = pickle.dumps(r, -1)
-            written = 0
-            while written < len(pickled):
-                written += os.write(p_w, pickled[written:])
-            os.close(p_w)
-            os.close(p_r)
-            # print("WROTE (%d)" % os.getpid())
-
-            os.kill(os.getpid(), 9)
-            #os.abort()
-            #sys.exit(1)
-        else:
-            os.close(p_w)
-
-            num_children += 1
-            l.debug("in _background with function %s and child %d (among %d)", f, p, num_children)
-
-            # print("READING (from %d)" % p)
-            try:
-                strs = [ os.read(p_r, 1024*1024) ]
-                while strs[-1] != "": strs.append(os.read(p_r, 1024*1024))
-            except EOFError:
-                raise ClaripyError("read error while receiving data from child")
-            os.close(p_r)
-            # print("READ (from %d)" % p)
-
-            # thread.start_new_thread(os.wait, ())
-            r = pickle.loads("".join(strs))
-
-            os.waitpid(p, 0)
-            num_children -= 1
-            l.debug("... child %d is done. %d left", p, num_children)
-
-            if isinstance(r, Exception): raise r
-            else: return r
-
-    def _synchronize(self, f, *args, **kwargs):
-        if self._child:
-            return getattr(BackendZ3, f)(self, *args, **kwargs)
-
-        self._lock.acquire()
-        #while not self._lock.acquire(blocking=False): print("ACQUIRING...",__import__('time').sleep(1))
+    def __init__(self, processes=None, batch_size=8, kill_grace=5.0, **kwargs):
+        """
+        :param processes:       The number of worker processes. Defaults to the number of CPUs.
+        :param batch_size:      The largest number of solves sent to a worker at once.
+        :param kill_grace:      The time (in seconds) that a worker can run past the timeout of a solve before it is
+                                killed. None never kills workers.
+
+        The other arguments are the ones of BackendZ3, and are passed on to the BackendZ3 of the workers.
+        """
+        if kwargs.pop('reuse_z3_solver', None):
+            raise BackendError("BackendZ3Parallel doesn't reuse Z3 solvers")
+        BackendZ3.__init__(self, reuse_z3_solver=False, **kwargs)
+        self.pool = SolverPool(
+            processes=processes, batch_size=batch_size, kill_grace=kill_grace, backend_kwargs=kwargs
+        )
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+        self.pool.shutdown()
+
+    def submit(self, op, solver, exprs=(), extra_constraints=(), timeout=None, models=False, **kwargs):
+        """
+        Submits a solve to the worker processes without waiting for it, and returns its SolveRequest, a future of its
+        result.
+
+        :param op:                  The method to solve with: 'satisfiable', 'check_satisfiability', 'batch_eval',
+                                    'min' or 'max'.
+        :param solver:              A solver object of this backend.
+        :param exprs:               The expressions of batch_eval(), or the expression of min() and max().
+        :param extra_constraints:   Extra constraints (as ASTs) to add to the solver for this solve.
+        :param timeout:             The timeout of the solve, in milliseconds. Defaults to the one of the solver.
+        :param models:              Whether to get the models that the solve goes through, in the `models` attribute
+                                    of the request once it is done.
+        :param kwargs:              The other arguments of the method.
+        """
+        if solver is None:
+            raise BackendError("BackendZ3Parallel requires a solver for evaluation")
+        return self.pool.submit(
+            op, solver.constraints, exprs=exprs, extra_constraints=extra_constraints, track=solver.track,
+            timeout=solver.timeout if timeout is None else timeout, affinity=solver.worker, models=models, **kwargs
+        )
+
+    def interrupt_handle(self):
+        # the request that the thread waits for, and whether it was interrupted
+        waiting = self._tls.waiting = [ None, False ]
+
+        def interrupt():
+            waiting[1] = True
+            request = waiting[0]
+            if request is not None:
+                request.cancel()
+        return interrupt
+
+    def _solve(self, op, solver, exprs=(), extra_constraints=(), model_callback=None, **kwargs):
+        waiting = getattr(self._tls, 'waiting', None)
+        if waiting is not None and waiting[1]:
+            raise ClaripySolverInterruptError("the solve was interrupted")
+
+        request = self.submit(
+            op, solver, exprs=exprs, extra_constraints=extra_constraints, models=model_callback is not None, **kwargs
+        )
         try:
-            return getattr(BackendZ3, f)(self, *args, **kwargs)
+            if waiting is not None:
+                waiting[0] = request
+                if waiting[1]:
+                    request.cancel()
+            result = request.result()
+        except concurrent.futures.CancelledError:
+            raise ClaripySolverInterruptError("the solve was cancelled") from None
+        except BaseException:
+            # an interrupted caller doesn't leave the solve running
+            request.cancel()
+            raise
         finally:
-            self._lock.release()
-
-    @staticmethod
-    def _translate(*args):
-        for a in args:
-            if hasattr(a, 'translate'):
-                a.translate()
-
-    # backgrounded
-    def _results(self, *args, **kwargs):
-        return self._background('_results', *args, **kwargs)
-    def _eval(self, *args, **kwargs):
-        return self._background('_eval', *args, **kwargs)
-    def _batch_eval(self, *args, **kwargs):
-        return self._background('_batch_eval', *args, **kwargs)
-    def _min(self, *args, **kwargs):
-        return self._background('_min', *args, **kwargs)
-    def _max(self, *args, **kwargs):
-        return self._background('_max', *args, **kwargs)
-
-    def _convert(self, *args, **kwargs):
-        return self._synchronize('_convert', *args, **kwargs)
-    def abstract(self, *args, **kwargs):
-        return self._synchronize('abstract', *args, **kwargs)
-    def _size(self, *args, **kwargs):
-        return self._synchronize('_size', *args, **kwargs)
-    def solver(self, *args, **kwargs):
-        return self._synchronize('solver', *args, **kwargs)
-    def _add(self, *args, **kwargs):
-        return self._synchronize('_add', *args, **kwargs)
-    def _check(self, *args, **kwargs):
-        return self._synchronize('_check', *args, **kwargs)
-    def _simplify(self, *args, **kwargs):
-        return self._synchronize('_simplify', *args, **kwargs)
-    def call(self, *args, **kwargs):
-        return self._synchronize('call', *args, **kwargs)
-    def resolve(self, *args, **kwargs):
-        return self._synchronize('resolve', *args, **kwargs)
-    def simplify(self, *args, **kwargs):
-        return self._synchronize('simplify', *args, **kwargs)
-
-from ..errors import ClaripyError, UnsatError
+            if waiting is not None:
+                waiting[0] = None
+
+        solver.worker = request.worker
+        if model_callback is not None:
+            for model in request.models:
+                model_callback(model)
+        return result
+
+    #
+    # The solver objects
+    #
+
+    def solver(self, timeout=None):
+        return ParallelSolver(timeout=timeout)
+
+    def add(self, s, c, track=False):
+        s.add(c, track=track)
+
+    def push(self, s):
+        s.push()
+
+    def pop(self, s, n=1):
+        s.pop(n)
+
+    def unsat_core(self, s):
+        return [ s.constraints[i] for i in self._solve('unsat_core', s) ]
+
+    #
+    # Solves, in the workers
+    #
+
+    def check_satisfiability(self, extra_constraints=(), solver=None, model_callback=None):
+        return self._solve(
+            'check_satisfiability', solver, extra_constraints=extra_constraints, model_callback=model_callback
+        )
+
+    def satisfiable(self, extra_constraints=(), solver=None, model_callback=None):
+        return self._solve('satisfiable', solver, extra_constraints=extra_constraints, model_callback=model_callback)
+
+    def eval(self, expr, n, extra_constraints=(), solver=None, model_callback=None):
+        results = self.batch_eval(
+            [ expr ], n, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback
+        )
+        return [ r[0] for r in results ]
+
+    def batch_eval(self, exprs, n, extra_constraints=(), solver=None, model_callback=None):
+        return self._solve(
+            'batch_eval', solver, exprs=exprs, extra_constraints=extra_constraints,
+            model_callback=model_callback, n=n
+        )
+
+    def batch_eval_iter(self, exprs, n, extra_constraints=(), solver=None, model_callback=None):
+        # the solutions come back from the workers all at once
+        yield from self.batch_eval(
+            exprs, n, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback
+        )
+
+    def min(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None,
+            candidates=()):
+        return self._solve(
+            'min', solver, exprs=(expr,), extra_constraints=extra_constraints, model_callback=model_callback,
+            signed=signed, bounds=bounds, candidates=tuple(candidates)
+        )
+
+    def max(self, expr, extra_constraints=(), solver=None, model_callback=None, signed=False, bounds=None,
+            candidates=()):
+        return self._solve(
+            'max', solver, exprs=(expr,), extra_constraints=extra_constraints, model_callback=model_callback,
+            signed=signed, bounds=bounds, candidates=tuple(candidates)
+        )
+
+    def solution(self, expr, v, extra_constraints=(), solver=None, model_callback=None):
+        return self._solve(
+            'satisfiable', solver, extra_constraints=(expr == v,) + tuple(extra_constraints),
+            model_callback=model_callback
+        )
+
+from ..errors import BackendError, ClaripySolverInterruptError
+from .solver_pool import SolverPool
@@ -0,0 +1,86 @@
+"""
+A conversion cache shared by all threads.
+
+Backend._object_cache is thread-local: every thread converts the ASTs that it sees into backend objects again, even
+though the ASTs are hash-consed and shared between threads. The objects of some backends (concrete values, strided
+intervals) do not belong to a thread, and a SharedObjectCache lets all the threads reuse them. The objects of the Z3
+backend belong to the Z3 context of their thread, and can't be shared.
+
+The cache is split into stripes, each with its own lock and its own share of the size, so that threads converting
+unrelated ASTs rarely wait for each other. It holds on to the ASTs that it keeps, and evicts the least recently used
+entries of a stripe when the stripe is full.
+"""
+
+import threading
+
+from ..simplification_cache import EvictionCountingLRUCache
+
+
+class _Stripe:
+    __slots__ = ('lock', 'cache', 'hits', 'misses')
+
+    def __init__(self, maxsize):
+        self.lock = threading.Lock()
+        self.cache = EvictionCountingLRUCache(maxsize)
+        self.hits = 0
+        self.misses = 0
+
+
+class SharedObjectCache:
+    """
+    A thread-safe, bounded mapping from the cache keys of ASTs to their backend objects.
+    """
+
+    def __init__(self, maxsize=100000, stripes=16):
+        """
+        :param maxsize: The number of objects to keep.
+        :param stripes: The number of independently locked parts of the cache.
+        """
+        if maxsize < stripes:
+            stripes = max(maxsize, 1)
+        self.maxsize = maxsize
+        self._stripes = [ _Stripe(-(-maxsize // stripes)) for _ in range(stripes) ]
+
+    def _stripe(self, key):
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key, default=None):
+        stripe = self._stripe(key)
+        with stripe.lock:
+            r = stripe.cache.get(key, None)
+            if r is None:
+                stripe.misses += 1
+                return default
+            stripe.hits += 1
+            return r
+
+    def __setitem__(self, key, obj):
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.cache[key] = obj
+
+    def __len__(self):
+        return sum(len(s.cache) for s in self._stripes)
+
+    def clear(self):
+        for s in self._stripes:
+            with s.lock:
+                s.cache.clear()
+
+    def stats(self):
+        """
+        Returns the number of hits, misses and evictions, the number of objects held and the maximum size of the cache.
+        """
+        hits = misses = evictions = size = 0
+        for s in self._stripes:
+            with s.lock:
+                hits += s.hits
+                misses += s.misses
+                evictions += s.cache.evictions
+                size += len(s.cache)
+        return { 'hits': hits, 'misses': misses, 'evictions': evictions, 'size': size, 'maxsize': self.maxsize }
+
+    def reset_stats(self):
+        for s in self._stripes:
+            with s.lock:
+                s.hits = s.misses = s.cache.evictions = 0
@@ -0,0 +1,570 @@
+"""
+A pool of worker processes that solve constraints with Z3.
+
+Every worker is a persistent process with a BackendZ3 of its own, and so its own Z3 context. The requests are sent to
+the workers in batches, along with their ASTs in the compact serialization of claripy.ast.serialize: the ASTs of a
+batch are written together, so that the nodes that they share are only sent once. A worker also keeps the constraints
+that it was sent (up to a number of them), and the pool keeps track of which ones: the constraints that a worker
+already has are only referred to by an id.
+
+A worker keeps a few solvers, with the constraints of recent requests asserted in scopes. A request is solved in the
+solver whose constraints share the longest prefix with its own, after popping the scopes past that prefix, so that the
+requests of states that only add constraints to the ones of their parents reuse the work of the solver. The pool sends
+a request to the worker that solved the previous request of the same solver object, if it is idle.
+
+Requests have a timeout, which is passed to Z3. A worker that goes past the timeout of its request by more than a grace
+period is killed and restarted, and so is a worker whose request is cancelled while it is being solved.
+"""
+
+import ast
+import atexit
+import collections
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import weakref
+
+l = logging.getLogger("claripy.backends.solver_pool")
+
+# the solvers that a worker keeps, and the scopes that they can have before they are rebuilt
+_WORKER_SOLVERS = 4
+_MAX_SCOPES = 32
+
+_pools = weakref.WeakSet()
+
+# the directory that claripy is imported from, for the workers
+_package_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_WORKER_SCRIPT = "import sys; from claripy.backends.solver_pool import _worker_main; _worker_main(sys.argv[1], sys.argv[2])"
+
+
+class SolveRequest(concurrent.futures.Future):
+    """
+    A request to a SolverPool, and the future of its result.
+
+    Once it is done, `models` holds the models that the solve went through (as name->value dicts), if they were asked
+    for, and `worker` the index of the worker that solved it.
+    """
+
+    def __init__(self, pool, op, constraints, exprs, extra_constraints, kwargs, track, timeout, affinity, models):
+        super().__init__()
+        self._pool = pool
+        self.op = op
+        self.constraints = constraints
+        self.exprs = exprs
+        self.extra_constraints = extra_constraints
+        self.kwargs = kwargs
+        self.track = track
+        self.timeout = timeout
+        self.affinity = affinity
+        self.want_models = models
+        self.models = ()
+        self.worker = None
+
+    def cancel(self):
+        """
+        Cancels the request. A request that is already being solved is interrupted by restarting its worker, and fails
+        with ClaripySolverInterruptError.
+        """
+        if super().cancel():
+            return True
+        if self.running():
+            self._pool._interrupt(self)
+            return True
+        return False
+
+
+class _Worker:
+    def __init__(self, pool, index):
+        self.index = index
+
+        # the workers are fresh interpreters rather than multiprocessing processes, which would run the main module of
+        # the program again
+        sock, child_sock = socket.socketpair()
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ _package_path, env.get('PYTHONPATH', None) ]))
+        with child_sock:
+            self.process = subprocess.Popen(
+                [ sys.executable, '-c', _WORKER_SCRIPT, str(child_sock.fileno()), repr(pool._backend_kwargs) ],
+                pass_fds=(child_sock.fileno(),), stdin=subprocess.DEVNULL, env=env
+            )
+        self.conn = multiprocessing.connection.Connection(sock.detach())
+
+        # hash -> (constraint, id) of the constraints that the worker has, least recently used first
+        self.known = collections.OrderedDict()
+        self.ids = itertools.count()
+        # the requests sent to the worker, in order, the first one being solved
+        self.batch = collections.deque()
+        self.deadline = None
+
+    def stop(self, kill=False):
+        try:
+            if not kill:
+                self.conn.send_bytes(b'')
+                self.process.wait(1)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.conn.close()
+
+
+class SolverPool:
+    """
+    A pool of worker processes that solve requests with Z3. The workers are started with the first request.
+    """
+
+    def __init__(self, processes=None, batch_size=8, kill_grace=5.0, keep_constraints=10000, backend_kwargs=None):
+        """
+        :param processes:           The number of workers. Defaults to the number of CPUs.
+        :param batch_size:          The largest number of requests sent to a worker at once.
+        :param kill_grace:          The time (in seconds) that a worker can run past the timeout of a request before it
+                                    is killed. None never kills workers.
+        :param keep_constraints:    The number of constraints that a worker keeps.
+        :param backend_kwargs:      The arguments of the BackendZ3 of the workers, as Python literals.
+        """
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.kill_grace = kill_grace
+        self.keep_constraints = keep_constraints
+        self._backend_kwargs = dict(backend_kwargs or { })
+
+        self._lock = threading.Lock()
+        self._queue = collections.deque()
+        self._interrupts = [ ]
+        self._wake_pending = False
+        self._closed = False
+        self._workers = None
+        self._thread = None
+        self._wakeup_r = self._wakeup_w = None
+        self._stats = collections.Counter()
+
+    def submit(self, op, constraints, exprs=(), extra_constraints=(), track=False, timeout=None, affinity=None,
+               models=False, **kwargs):
+        """
+        Submits a request, and returns its SolveRequest.
+
+        :param op:                  The method of BackendZ3 to solve it with: 'satisfiable', 'check_satisfiability',
+                                    'batch_eval', 'min' or 'max', or 'unsat_core', which returns the indices of the
+                                    constraints of an unsat core.
+        :param constraints:         The constraints (ASTs) of the solver.
+        :param exprs:               The expressions of batch_eval(), or the expression of min() and max().
+        :param extra_constraints:   The extra constraints of the solve.
+        :param track:               Whether to track the constraints, for unsat cores.
+        :param timeout:             The timeout of the solve, in milliseconds.
+        :param affinity:            The index of the worker to send the request to, if it is idle.
+        :param models:              Whether to send back the models that the solve goes through.
+        :param kwargs:              The other arguments of the method (n, signed, bounds, candidates), which must
+                                    be picklable.
+        """
+        request = SolveRequest(
+            self, op, tuple(constraints), tuple(exprs), tuple(extra_constraints), kwargs, track, timeout, affinity,
+            models
+        )
+        with self._lock:
+            if self._closed:
+                raise BackendError("the solver pool is shut down")
+            if self._thread is None:
+                self._start()
+            self._queue.append(request)
+            self._stats['requests'] += 1
+        self._wake()
+        return request
+
+    def shutdown(self):
+        """
+        Stops the workers. The requests that are still queued are cancelled, and the ones that are being solved fail.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._wake()
+            thread.join()
+
+    def stats(self):
+        """
+        Returns the number of requests, of the batches that they were sent in, of the constraints that were sent to the
+        workers and of the ones that the workers already had, of the constraints that the workers asserted, and of the
+        workers that were restarted.
+        """
+        with self._lock:
+            return { k: self._stats[k] for k in ('requests', 'batches', 'sent', 'reused', 'asserted', 'restarts') }
+
+    #
+    # Submission side
+    #
+
+    def _start(self):
+        self._wakeup_r, self._wakeup_w = multiprocessing.Pipe(duplex=False)
+        self._workers = [ _Worker(self, i) for i in range(self.processes) ]
+        self._thread = threading.Thread(target=self._run, name='claripy-solver-pool', daemon=True)
+        self._thread.start()
+        _pools.add(self)
+
+    def _wake(self):
+        with self._lock:
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+            self._wakeup_w.send_bytes(b'')
+
+    def _interrupt(self, request):
+        with self._lock:
+            self._interrupts.append(request)
+        self._wake()
+
+    #
+    # The thread that talks to the workers
+    #
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    self._wake_pending = False
+                    if self._closed:
+                        break
+                    interrupts, self._interrupts = self._interrupts, [ ]
+                    batches = self._assign()
+
+                for w, batch in batches:
+                    self._send(w, batch)
+                for request in interrupts:
+                    for w in self._workers:
+                        if w.batch and w.batch[0] is request and not request.done():
+                            self._restart(w, ClaripySolverInterruptError("the solve was cancelled"))
+                self._expire()
+
+                busy = { w.conn: w for w in self._workers if w.batch }
+                deadlines = [ w.deadline for w in busy.values() if w.deadline is not None ]
+                timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                for conn in multiprocessing.connection.wait(list(busy) + [ self._wakeup_r ], timeout):
+                    if conn is self._wakeup_r:
+                        while conn.poll():
+                            conn.recv_bytes()
+                    else:
+                        self._receive(busy[conn])
+        except Exception: # pylint:disable=broad-except
+            l.error("The solver pool failed", exc_info=True)
+        finally:
+            self._stop()
+
+    def _stop(self):
+        with self._lock:
+            self._closed = True
+            # nothing listens to the wakeups anymore
+            self._wake_pending = True
+            queued = list(self._queue)
+            self._queue.clear()
+        for request in queued:
+            request.cancel()
+        for w in self._workers:
+            for request in w.batch:
+                if not request.done():
+                    request.set_exception(ClaripySolverInterruptError("the solver pool was shut down"))
+            w.stop(kill=len(w.batch) > 0)
+        self._wakeup_r.close()
+
+    def _assign(self):
+        """
+        Takes the queued requests for the idle workers, sharing them out in batches.
+        """
+        idle = [ w for w in self._workers if not w.batch ]
+        batches = [ ]
+        for i, w in enumerate(idle):
+            if not self._queue:
+                break
+            share = min(self.batch_size, -(-len(self._queue) // (len(idle) - i)))
+
+            batch = [ ]
+            rest = collections.deque()
+            for request in self._queue:
+                if request.done():
+                    continue
+                if len(batch) < share and request.affinity == w.index:
+                    batch.append(request)
+                else:
+                    rest.append(request)
+            while rest and len(batch) < share:
+                batch.append(rest.popleft())
+            self._queue = rest
+            batches.append((w, batch))
+        return batches
+
+    def _send(self, w, batch):
+        roots = [ ]
+        refs = { }
+        def ref(e):
+            i = refs.get(id(e), None)
+            if i is None:
+                i = refs[id(e)] = len(roots)
+                roots.append(e)
+            return i
+
+        drop, new, used = [ ], [ ], set()
+        requests = [ ]
+        try:
+            for request in batch:
+                ids = [ ]
+                for c in request.constraints:
+                    h = c._hash
+                    entry = w.known.get(h, None)
+                    if entry is not None and entry[0] is c:
+                        self._stats['reused'] += 1
+                    else:
+                        if entry is not None:
+                            drop.append(entry[1])
+                        entry = w.known[h] = (c, next(w.ids))
+                        new.append((entry[1], ref(c)))
+                        self._stats['sent'] += 1
+                    w.known.move_to_end(h)
+                    used.add(h)
+                    ids.append(entry[1])
+                requests.append((
+                    request.op, ids, request.track, request.timeout,
+                    [ ref(e) for e in request.extra_constraints ], [ ref(e) for e in request.exprs ],
+                    request.want_models, request.kwargs
+                ))
+
+            while len(w.known) > self.keep_constraints:
+                h = next(iter(w.known))
+                if h in used:
+                    break
+                drop.append(w.known.pop(h)[1])
+
+            data = pickle.dumps((drop, new, serialize.dumps(roots) if roots else None, requests), -1)
+        except Exception as e: # pylint:disable=broad-except
+            # the worker doesn't know about the constraints that were taken as sent
+            for request in batch:
+                if not request.done():
+                    request.set_exception(e)
+            self._restart(w, None)
+            return
+
+        w.batch.extend(batch)
+        self._stats['batches'] += 1
+        try:
+            w.conn.send_bytes(data)
+        except OSError:
+            # the worker died while it was idle, and none of the requests was solved
+            self._restart(w, None)
+            return
+        self._start_head(w)
+
+    def _start_head(self, w):
+        request = w.batch[0]
+        if not request.done():
+            request.set_running_or_notify_cancel()
+        if request.timeout is not None and self.kill_grace is not None:
+            w.deadline = time.monotonic() + request.timeout / 1000. + self.kill_grace
+        else:
+            w.deadline = None
+
+    def _receive(self, w):
+        try:
+            ok, result, models, asserted = pickle.loads(w.conn.recv_bytes())
+        except (EOFError, OSError):
+            self._restart(w, BackendError("solver worker %d died" % w.index))
+            return
+
+        request = w.batch.popleft()
+        self._stats['asserted'] += asserted
+        if not request.done():
+            request.models = models
+            request.worker = w.index
+            if ok:
+                request.set_result(result)
+            else:
+                request.set_exception(result)
+
+        w.deadline = None
+        if w.batch:
+            self._start_head(w)
+
+    def _expire(self):
+        now = time.monotonic()
+        for w in self._workers:
+            if w.deadline is not None and now >= w.deadline:
+                l.warning("Solver worker %d went past the timeout of its request, restarting it", w.index)
+                self._restart(w, ClaripySolverInterruptError("the solve went past its timeout"))
+
+    def _restart(self, w, error):
+        """
+        Replaces a worker with a new one, failing the request that it was solving with `error` and queueing the others
+        again.
+        """
+        pending = list(w.batch)
+        if pending and error is not None:
+            request = pending.pop(0)
+            if not request.done():
+                request.set_exception(error)
+        w.batch.clear()
+        w.stop(kill=True)
+        self._workers[w.index] = _Worker(self, w.index)
+        with self._lock:
+            self._queue.extendleft(reversed(pending))
+            self._stats['restarts'] += 1
+        if pending:
+            self._wake()
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in list(_pools):
+        pool.shutdown()
+
+
+#
+# The worker side
+#
+
+class _WorkerSolver:
+    __slots__ = ('solver', 'timeout', 'ids', 'levels')
+
+    def __init__(self, solver, timeout):
+        self.solver = solver
+        self.timeout = timeout
+        # the ids of the asserted constraints, and the number of them at every push
+        self.ids = [ ]
+        self.levels = [ ]
+
+
+class _WorkerState:
+    def __init__(self, backend):
+        self.backend = backend
+        self.known = { }
+        # least recently used first
+        self.solvers = [ ]
+
+    def handle(self, drop, new, blob, requests):
+        for i in drop:
+            self.known.pop(i, None)
+        roots = serialize.loads(blob) if blob is not None else [ ]
+        for i, r in new:
+            self.known[i] = roots[r]
+
+        for op, ids, track, timeout, extra, exprs, want_models, kwargs in requests:
+            models = [ ]
+            try:
+                result, asserted = self.solve(
+                    op, ids, track, timeout, [ roots[i] for i in extra ], [ roots[i] for i in exprs ], kwargs,
+                    models.append if want_models else None
+                )
+                response = (True, result, models, asserted)
+            except Exception as e: # pylint:disable=broad-except
+                response = (False, e, models, 0)
+
+            try:
+                yield pickle.dumps(response, -1)
+            except Exception: # pylint:disable=broad-except
+                yield pickle.dumps((False, BackendError("%s: %s" % (type(response[1]).__name__, response[1])), [ ], 0))
+
+    def solve(self, op, ids, track, timeout, extra, exprs, kwargs, model_callback):
+        backend = self.backend
+        constraints = [ self.known[i] for i in ids ]
+        if track:
+            solver = backend.solver(timeout=timeout)
+            backend.add(solver, constraints, track=True)
+            asserted = len(constraints)
+        else:
+            solver, asserted = self._solver(ids, constraints, timeout)
+
+        if op == 'unsat_core':
+            if backend.satisfiable(solver=solver):
+                return [ ], asserted
+            positions = { c.get_id(): i for i, c in enumerate(backend.convert_list(constraints)) }
+            core = [ c for c in backend._unsat_core(solver) if c is not None ]
+            return [ positions[c.get_id()] for c in core if c.get_id() in positions ], asserted
+
+        args = (exprs,) if op == 'batch_eval' else exprs
+        return getattr(backend, op)(
+            *args, extra_constraints=extra, solver=solver, model_callback=model_callback, **kwargs
+        ), asserted
+
+    def _solver(self, ids, constraints, timeout):
+        """
+        Returns the solver that shares the longest prefix of constraints with a request, with the constraints of the
+        request asserted, and the number of constraints that had to be asserted.
+        """
+        best, best_level, best_common = None, -1, 0
+        for ws in self.solvers:
+            if ws.timeout != timeout:
+                continue
+            common = 0
+            for a, b in zip(ws.ids, ids):
+                if a != b:
+                    break
+                common += 1
+            # the scopes past the prefix are popped
+            level = common if common == len(ws.ids) else max(v for v in ws.levels if v <= common)
+            if (level, common) > (best_level, best_common):
+                best, best_level, best_common = ws, level, common
+
+        if best is None or (best_level == 0 and len(self.solvers) < _WORKER_SOLVERS):
+            best, best_level, best_common = _WorkerSolver(self.backend.solver(timeout=timeout), timeout), 0, 0
+            if len(self.solvers) == _WORKER_SOLVERS:
+                self.solvers.pop(0)
+        else:
+            self.solvers.remove(best)
+        self.solvers.append(best)
+
+        if best_level < len(best.ids):
+            scope = next(i for i, level in enumerate(best.levels) if level >= best_level)
+            self.backend.pop(best.solver, len(best.levels) - scope)
+            del best.levels[scope:]
+            del best.ids[best_level:]
+
+        if len(best.levels) + 2 > _MAX_SCOPES:
+            self.backend.pop(best.solver, len(best.levels))
+            best.levels = [ ]
+            best.ids = [ ]
+            best_level = best_common = 0
+
+        # the constraints that the request had in common with the solver go in a scope of their own, so that the next
+        # requests that diverge at the same point can keep them
+        for start, end in ((best_level, best_common), (best_common, len(ids))):
+            if start == end:
+                continue
+            self.backend.push(best.solver)
+            best.levels.append(start)
+            try:
+                self.backend.add(best.solver, constraints[start:end])
+            except BaseException:
+                self.solvers.remove(best)
+                raise
+            best.ids.extend(ids[start:end])
+        return best.solver, len(ids) - best_level
+
+
+def _worker_main(fd, backend_kwargs):
+    # the parent takes care of interrupting solves
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    conn = multiprocessing.connection.Connection(int(fd))
+    worker = _WorkerState(BackendZ3(reuse_z3_solver=False, **ast.literal_eval(backend_kwargs)))
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except EOFError:
+            break
+        if not data:
+            break
+        for response in worker.handle(*pickle.loads(data)):
+            conn.send_bytes(response)
+
+from ..errors import BackendError, ClaripySolverInterruptError
+from ..ast import serialize
+from .backend_z3 import BackendZ3
@@ -72,10 +72,25 @@ class Frontend:
     def batch_eval(self, exprs, n, extra_constraints=(), exact=None):
         raise NotImplementedError()
 
-    def max(self, e, extra_constraints=(), exact=None):
+    def iter_eval(self, e, n, extra_constraints=(), exact=None):
+        """
+        Generates up to n solutions of e, one at a time, as iter_batch_eval() does.
+        """
+        for r in self.iter_batch_eval([ e ], n, extra_constraints=extra_constraints, exact=exact):
+            yield r[0]
+
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        """
+        Generates up to n solutions of exprs, one at a time, so that the caller can stop as soon as it has the ones it
+        needs. The solutions are found as they are asked for, and the generator should be closed (or exhausted) when
+        the caller is done with it.
+        """
+        raise NotImplementedError()
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
         raise NotImplementedError()
 
-    def min(self, e, extra_constraints=(), exact=None):
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
         raise NotImplementedError()
 
     def solution(self, e, v, extra_constraints=(), exact=None):
@@ -104,6 +119,16 @@ class Frontend:
     def _constraint_filter(self, c): #pylint:disable=no-self-use
         return c
 
+    @staticmethod
+    def _signed_value(e, v):
+        """
+        Returns a value of the bitvector `e` as a signed value.
+        """
+        size = getattr(e, 'length', None)
+        if size and v >> (size - 1):
+            return v - (1 << size)
+        return v
+
     @staticmethod
     def _split_constraints(constraints, concrete=True):
         """
@@ -117,34 +142,32 @@ class Frontend:
         l.debug("... splitted of size %d", len(splitted))
 
         concrete_constraints = [ ]
-        variable_connections = { }
-        constraint_connections = { }
+        # the connected groups, as (mask of variable ids, constraint indexes) pairs. The groups are pairwise disjoint,
+        # so a new constraint joins all the groups whose variables intersect its own.
+        groups = [ ]
         for n,s in enumerate(splitted):
             l.debug("... processing constraint with %d variables", len(s.variables))
 
-            connected_variables = set(s.variables)
-            connected_constraints = { n }
-
-            if len(connected_variables) == 0:
+            connected_mask = variable_mask(s.variables)
+            if connected_mask == 0:
                 concrete_constraints.append(s)
+                continue
 
-            for v in s.variables:
-                if v in variable_connections:
-                    connected_variables |= variable_connections[v]
-                if v in constraint_connections:
-                    connected_constraints |= constraint_connections[v]
-
-            for v in connected_variables:
-                variable_connections[v] = connected_variables
-                constraint_connections[v] = connected_constraints
+            connected_constraints = [ n ]
+            unconnected = [ ]
+            for group in groups:
+                if group[0] & connected_mask:
+                    connected_mask |= group[0]
+                    connected_constraints.extend(group[1])
+                else:
+                    unconnected.append(group)
 
-        unique_constraint_sets = set()
-        for v in variable_connections:
-            unique_constraint_sets.add((frozenset(variable_connections[v]), frozenset(constraint_connections[v])))
+            unconnected.append((connected_mask, connected_constraints))
+            groups = unconnected
 
         results = [ ]
-        for v,c_indexes in unique_constraint_sets:
-            results.append((set(v), [ splitted[c] for c in c_indexes ]))
+        for mask,c_indexes in groups:
+            results.append((set(VariableSet.from_mask(mask)), [ splitted[c] for c in sorted(c_indexes) ]))
 
         if concrete and len(concrete_constraints) > 0:
             results.append(({ 'CONCRETE' }, concrete_constraints))
@@ -152,3 +175,4 @@ class Frontend:
         return results
 
 from . import ast
+from .ast.variable_set import VariableSet, variable_mask
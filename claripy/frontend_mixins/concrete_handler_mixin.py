@@ -22,19 +22,31 @@ class ConcreteHandlerMixin:
             for r in symbolic_results
         ]
 
-    def max(self, e, **kwargs):
+    def iter_batch_eval(self, exprs, n, **kwargs):
+        concrete_exprs = [ self._concrete_value(e) for e in exprs ]
+        symbolic_exprs = [ e for e,c in zip(exprs, concrete_exprs) if c is None ]
+
+        if len(symbolic_exprs) == 0:
+            yield tuple(concrete_exprs)
+            return
+
+        for r in super(ConcreteHandlerMixin, self).iter_batch_eval(symbolic_exprs, n, **kwargs):
+            r = iter(r)
+            yield tuple((c if c is not None else next(r)) for c in concrete_exprs)
+
+    def max(self, e, signed=False, **kwargs):
         c = self._concrete_value(e)
         if c is not None:
-            return c
+            return self._signed_value(e, c) if signed else c
         else:
-            return super(ConcreteHandlerMixin, self).max(e, **kwargs)
+            return super(ConcreteHandlerMixin, self).max(e, signed=signed, **kwargs)
 
-    def min(self, e, **kwargs):
+    def min(self, e, signed=False, **kwargs):
         c = self._concrete_value(e)
         if c is not None:
-            return c
+            return self._signed_value(e, c) if signed else c
         else:
-            return super(ConcreteHandlerMixin, self).min(e, **kwargs)
+            return super(ConcreteHandlerMixin, self).min(e, signed=signed, **kwargs)
 
     def solution(self, e, v, **kwargs):
         ce = self._concrete_value(e)
@@ -20,16 +20,32 @@ class ConstraintExpansionMixin:
 
         return results
 
-    def max(self, e, extra_constraints=(), exact=None, **kwargs):
-        m = super(ConstraintExpansionMixin, self).max(e, extra_constraints=extra_constraints, exact=exact, **kwargs)
+    def iter_eval(self, e, n, extra_constraints=(), exact=None, **kwargs):
+        results = [ ]
+        for v in super(ConstraintExpansionMixin, self).iter_eval(
+            e, n, extra_constraints=extra_constraints, exact=exact, **kwargs
+        ):
+            results.append(v)
+            yield v
+
+        # all the solutions are known once the generator is exhausted early, as in eval()
+        if len(extra_constraints) == 0 and len(results) < n:
+            self.add([Or(*[e == v for v in results])], invalidate_cache=False)
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False, **kwargs):
+        m = super(ConstraintExpansionMixin, self).max(
+            e, extra_constraints=extra_constraints, exact=exact, signed=signed, **kwargs
+        )
         if len(extra_constraints) == 0:
-            self.add([e <= m], invalidate_cache=False)
+            self.add([SLE(e, m) if signed else e <= m], invalidate_cache=False)
         return m
 
-    def min(self, e, extra_constraints=(), exact=None, **kwargs):
-        m = super(ConstraintExpansionMixin, self).min(e, extra_constraints=extra_constraints, exact=exact, **kwargs)
+    def min(self, e, extra_constraints=(), exact=None, signed=False, **kwargs):
+        m = super(ConstraintExpansionMixin, self).min(
+            e, extra_constraints=extra_constraints, exact=exact, signed=signed, **kwargs
+        )
         if len(extra_constraints) == 0:
-            self.add([e >= m], invalidate_cache=False)
+            self.add([SGE(e, m) if signed else e >= m], invalidate_cache=False)
         return m
 
     def solution(self, e, v, extra_constraints=(), exact=None, **kwargs):
@@ -44,3 +60,4 @@ class ConstraintExpansionMixin:
         return b
 
 from ..ast.bool import Or
+from ..ast.bv import SGE, SLE
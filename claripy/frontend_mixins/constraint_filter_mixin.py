@@ -43,6 +43,10 @@ class ConstraintFilterMixin:
         ec = self._constraint_filter(extra_constraints)
         return super(ConstraintFilterMixin, self).batch_eval(exprs, n, extra_constraints=ec, **kwargs)
 
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), **kwargs):
+        ec = self._constraint_filter(extra_constraints)
+        yield from super(ConstraintFilterMixin, self).iter_batch_eval(exprs, n, extra_constraints=ec, **kwargs)
+
     def max(self, e, extra_constraints=(), **kwargs):
         ec = self._constraint_filter(extra_constraints)
         return super(ConstraintFilterMixin, self).max(e, extra_constraints=ec, **kwargs)
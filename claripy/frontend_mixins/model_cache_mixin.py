@@ -3,6 +3,9 @@ import itertools
 
 from .. import errors
 
+# the number of cached models from which they are evaluated all at once, with a ModelTable
+_MIN_VECTORIZED_MODELS = 10
+
 
 class ModelCache:
     _defaults = { 0, 0.0, True }
@@ -49,26 +52,65 @@ class ModelCache:
             a
         )
 
+    @staticmethod
+    def _compile(asts):
+        try:
+            return [ compiler.compile(a) for a in asts ]
+        except BackendError:
+            return None
+
     def eval_ast(self, ast):
         """Eval the ast, replacing symbols by their last value in the model.
         """
+        compiled = self._compile((ast,))
+        if compiled is not None:
+            try:
+                return compiled[0](self.model)
+            except (errors.ClaripyError, ValueError):
+                # let the concrete backend decide what to make of it
+                pass
+
         # If there was no last value, it was not constrained, so we can use
         # anything.
         new_ast = ast.replace_dict(self.replacements, leaf_operation=self._leaf_op)
         return backends.concrete.eval(new_ast, 1)[0]
 
+    def _replace_list(self, asts):
+        """Replaces the symbols in all of the asts at once, so that their
+        shared subexpressions are only concretized once.
+        """
+        return replace_dict_many(asts, self.replacements, leaf_operation=self._leaf_op)
+
+    def _eval_replaced(self, ast):
+        # the replacements keep the concretized subexpressions, which the next ASTs reuse
+        return backends.concrete.eval(ast.replace_dict(self.replacements, leaf_operation=self._leaf_op), 1)[0]
+
     def eval_constraints(self, constraints):
         """Returns whether the constraints is satisfied trivially by using the
         last model."""
+        compiled = self._compile(constraints)
+        if compiled is not None:
+            try:
+                return all(f(self.model) for f in compiled)
+            except (errors.ClaripyError, ValueError):
+                pass
+
         # eval_ast is concretizing symbols and evaluating them, this can raise
         # exceptions.
         try:
-            return all(self.eval_ast(c) for c in constraints)
+            return all(self._eval_replaced(c) for c in constraints)
         except errors.ClaripyZeroDivisionError:
             return False
 
     def eval_list(self, asts):
-        return tuple(self.eval_ast(c) for c in asts)
+        compiled = self._compile(asts)
+        if compiled is not None:
+            try:
+                return tuple(f(self.model) for f in compiled)
+            except (errors.ClaripyError, ValueError):
+                pass
+
+        return tuple(backends.concrete.eval(c, 1)[0] for c in self._replace_list(asts))
 
 class ModelCacheMixin:
     def __init__(self, *args, **kwargs):
@@ -205,15 +247,43 @@ class ModelCacheMixin:
     def _model_hook(self, m):
         self._models.add(ModelCache(m))
 
+    def _vectorize(self):
+        # evaluating on all the models at once only pays off with enough of them
+        return vectorized.available and len(self._models) >= _MIN_VECTORIZED_MODELS
+
     def _get_models(self, extra_constraints=()):
-        for m in self._models:
-            if m.eval_constraints(extra_constraints):
-                yield m
+        if len(extra_constraints) == 0:
+            return iter(self._models)
+
+        if self._vectorize():
+            models = list(self._models)
+            try:
+                satisfied = vectorized.ModelTable([ m.model for m in models ]).satisfied(extra_constraints)
+            except BackendError:
+                pass
+            else:
+                return (m for m, sat in zip(models, satisfied) if sat)
+
+        return (m for m in self._models if m.eval_constraints(extra_constraints))
 
     def _get_batch_solutions(self, asts, n=None, extra_constraints=()):
         results = set()
 
-        for m in self._get_models(extra_constraints):
+        models = self._get_models(extra_constraints)
+        if self._vectorize() and len(asts) > 0:
+            models = list(models)
+            try:
+                values = vectorized.ModelTable([ m.model for m in models ]).eval_list(asts)
+            except BackendError:
+                pass
+            else:
+                for r in zip(*values):
+                    results.add(r)
+                    if len(results) == n:
+                        break
+                return results
+
+        for m in models:
             try:
                 results.add(m.eval_list(asts))
             except ZeroDivisionError:
@@ -271,30 +341,66 @@ class ModelCacheMixin:
     def eval(self, e, n, **kwargs):
         return tuple( r[0] for r in ModelCacheMixin.batch_eval(self, [e], n=n, **kwargs) )
 
-    def min(self, e, extra_constraints=(), **kwargs):
+    def iter_batch_eval(self, asts, n, extra_constraints=(), **kwargs):
+        # the solutions from the cached models come first, and the backend is only asked for more if they are needed
+        token = self._constraints_token()
+        results = self._get_batch_solutions(asts, n=n, extra_constraints=extra_constraints)
+        yield from results
+
+        if len(results) == n or (len(asts) == 1 and asts[0].cache_key in self._eval_exhausted):
+            return
+
+        if len(results) != 0:
+            constraints = (all_operations.And(*[
+                all_operations.Or(*[a!=v for a,v in zip(asts, r)]) for r in results
+            ]),) + tuple(extra_constraints)
+        else:
+            constraints = extra_constraints
+
+        count = len(results)
+        try:
+            for r in super(ModelCacheMixin, self).iter_batch_eval(
+                asts, n - len(results), extra_constraints=constraints, **kwargs
+            ):
+                count += 1
+                yield r
+        except UnsatError:
+            if len(results) == 0:
+                raise
+
+        # the solutions are only all of them for the constraints that the generator started with
+        if len(extra_constraints) == 0 and count < n and not self._constraints_changed(token):
+            self._eval_exhausted.update(e.cache_key for e in asts)
+
+    def min(self, e, extra_constraints=(), signed=False, **kwargs):
         cached = [ ]
-        if e.cache_key in self._eval_exhausted or e.cache_key in self._min_exhausted:
+        if e.cache_key in self._eval_exhausted or (not signed and e.cache_key in self._min_exhausted):
             cached = self._get_solutions(e, extra_constraints=extra_constraints)
 
         if len(cached) > 0:
-            return min(cached)
+            return min(self._signed_value(e, v) for v in cached) if signed else min(cached)
         else:
-            m = super(ModelCacheMixin, self).min(e, extra_constraints=extra_constraints, **kwargs)
-            self._min_exhausted.add(e.cache_key)
+            m = super(ModelCacheMixin, self).min(e, extra_constraints=extra_constraints, signed=signed, **kwargs)
+            if not signed:
+                self._min_exhausted.add(e.cache_key)
             return m
 
-    def max(self, e, extra_constraints=(), **kwargs):
+    def max(self, e, extra_constraints=(), signed=False, **kwargs):
         cached = [ ]
-        if e.cache_key in self._eval_exhausted or e.cache_key in self._max_exhausted:
+        if e.cache_key in self._eval_exhausted or (not signed and e.cache_key in self._max_exhausted):
             cached = self._get_solutions(e, extra_constraints=extra_constraints)
 
         if len(cached) > 0:
-            return max(cached)
+            return max(self._signed_value(e, v) for v in cached) if signed else max(cached)
         else:
-            m = super(ModelCacheMixin, self).max(e, extra_constraints=extra_constraints, **kwargs)
-            self._max_exhausted.add(e.cache_key)
+            m = super(ModelCacheMixin, self).max(e, extra_constraints=extra_constraints, signed=signed, **kwargs)
+            if not signed:
+                self._max_exhausted.add(e.cache_key)
             return m
 
+    def _known_values(self, e, extra_constraints=()):
+        return self._get_solutions(e, extra_constraints=extra_constraints)
+
     def solution(self, e, v, extra_constraints=(), **kwargs):
         if isinstance(v, Base):
             cached = self._get_batch_solutions([e,v], extra_constraints=extra_constraints)
@@ -309,5 +415,7 @@ class ModelCacheMixin:
 
 
 from .. import backends, false
-from ..errors import UnsatError
+from ..errors import UnsatError, BackendError
 from ..ast import all_operations, Base
+from ..ast.base import replace_dict_many
+from ..ast import vectorized, compiler
@@ -76,6 +76,20 @@ class SatCacheMixin:
                 self._cached_satness = False
             raise
 
+    def iter_batch_eval(self, e, n, extra_constraints=(), **kwargs):
+        if self._cached_satness is False: raise UnsatError("cached unsat")
+        try:
+            for r in super(SatCacheMixin, self).iter_batch_eval(
+                e, n,
+                extra_constraints=extra_constraints, **kwargs
+            ):
+                self._cached_satness = True
+                yield r
+        except UnsatError:
+            if len(extra_constraints) == 0:
+                self._cached_satness = False
+            raise
+
     def max(self, e, extra_constraints=(), **kwargs):
         if self._cached_satness is False: raise UnsatError("cached unsat")
         try:
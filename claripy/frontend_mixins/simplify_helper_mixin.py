@@ -16,3 +16,8 @@ class SimplifyHelperMixin:
         if n > 1:
             self.simplify()
         return super(SimplifyHelperMixin, self).batch_eval(e, n, *args, **kwargs)
+
+    def iter_batch_eval(self, e, n, *args, **kwargs):
+        if n > 1:
+            self.simplify()
+        yield from super(SimplifyHelperMixin, self).iter_batch_eval(e, n, *args, **kwargs)
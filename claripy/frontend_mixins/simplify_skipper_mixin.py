@@ -1,36 +1,30 @@
 class SimplifySkipperMixin:
-    def __init__(self, *args, **kwargs):
-        super(SimplifySkipperMixin, self).__init__(*args, **kwargs)
-        self._simplified = True
-
-    def _blank_copy(self, c):
-        super(SimplifySkipperMixin, self)._blank_copy(c)
-        c._simplified = True
-
-    def _copy(self, c):
-        super(SimplifySkipperMixin, self)._copy(c)
-        c._simplified = self._simplified
+    # the frontend counts the constraints that are already simplified (see ConstrainedFrontend._simplified_count)
 
     def __getstate__(self):
-        return self._simplified, super().__getstate__()
+        return self._simplified_count, super().__getstate__()
 
     def __setstate__(self, s):
-        self._simplified, base_state = s
+        simplified_upto, base_state = s
         super().__setstate__(base_state)
+        # older pickles hold a flag
+        if simplified_upto is True:
+            simplified_upto = len(self.constraints)
+        elif simplified_upto is False:
+            simplified_upto = 0
+        if simplified_upto:
+            self._mark_constraints_simplified(upto=simplified_upto)
 
     #
     # Simplification skipping
     #
 
-    def add(self, *args, **kwargs):
-        added = super(SimplifySkipperMixin, self).add(*args, **kwargs)
-        if len(added) > 0:
-            self._simplified = False
-        return added
+    @property
+    def _simplified(self):
+        return self._simplified_count >= len(self.constraints)
 
     def simplify(self, *args, **kwargs):
         if self._simplified:
             return self.constraints
         else:
-            self._simplified = True
             return super(SimplifySkipperMixin, self).simplify(*args, **kwargs)
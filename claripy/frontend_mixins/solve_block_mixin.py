@@ -25,6 +25,10 @@ class SolveBlockMixin:
         assert self.can_solve
         return super(SolveBlockMixin, self).batch_eval(*args, **kwargs)
 
+    def iter_batch_eval(self, *args, **kwargs):
+        assert self.can_solve
+        yield from super(SolveBlockMixin, self).iter_batch_eval(*args, **kwargs)
+
     def min(self, *args, **kwargs):
         assert self.can_solve
         return super(SolveBlockMixin, self).min(*args, **kwargs)
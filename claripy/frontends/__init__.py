@@ -2,4 +2,5 @@ from .light_frontend import LightFrontend
 from .full_frontend import FullFrontend
 from .hybrid_frontend import HybridFrontend
 from .composite_frontend import CompositeFrontend
+from .parallel_checker import ParallelChecker
 from .replacement_frontend import ReplacementFrontend
@@ -2,6 +2,8 @@ import logging
 l = logging.getLogger("claripy.frontends.composite_frontend")
 
 import weakref
+import operator
+import functools
 import itertools
 symbolic_count = itertools.count()
 
@@ -9,7 +11,14 @@ from .constrained_frontend import ConstrainedFrontend
 from claripy.ast.strings import String
 
 class CompositeFrontend(ConstrainedFrontend):
-    def __init__(self, template_frontend, template_frontend_string, track=False, **kwargs):
+    def __init__(self, template_frontend, template_frontend_string, track=False, parallel=None, **kwargs):
+        """
+        :param template_frontend:           The frontend that the children are blank copies of.
+        :param template_frontend_string:    The frontend that the children with string variables are blank copies of.
+        :param track:                       Track the constraints, for unsat_core().
+        :param parallel:                    A ParallelChecker to check the children at once with, or None to check them
+                                            one after the other. It is shared with the branches, but not pickled.
+        """
         super(CompositeFrontend, self).__init__(**kwargs)
         self._solvers = { }
         self._owned_solvers = weakref.WeakKeyDictionary()
@@ -17,6 +26,7 @@ class CompositeFrontend(ConstrainedFrontend):
         self._template_frontend_string = template_frontend_string
         self._unsat = False
         self._track = track
+        self._parallel = parallel
 
     def _blank_copy(self, c):
         super(CompositeFrontend, self)._blank_copy(c)
@@ -27,6 +37,7 @@ class CompositeFrontend(ConstrainedFrontend):
             c._template_frontend_string = self._template_frontend_string
         c._unsat = False
         c._track = self._track
+        c._parallel = self._parallel
 
     def _copy(self, c):
         super(CompositeFrontend, self)._copy(c)
@@ -48,6 +59,7 @@ class CompositeFrontend(ConstrainedFrontend):
     def __setstate__(self, s):
         self._solvers, self._template_frontend, self._unsat, self._track, base_state = s
         self._owned_solvers = weakref.WeakKeyDictionary({s:True for s in self._solver_list})
+        self._parallel = None
         super().__setstate__(base_state)
 
     def downsize(self):
@@ -80,6 +92,13 @@ class CompositeFrontend(ConstrainedFrontend):
     def variables(self, v):
         pass
 
+    @property
+    def _variables_mask(self):
+        mask = 0
+        for s in self._solver_list:
+            mask |= s._variables_mask
+        return mask
+
     #
     # Solver list management
     #
@@ -258,6 +277,16 @@ class CompositeFrontend(ConstrainedFrontend):
 
         return super(CompositeFrontend, self).add(child_added)
 
+    def _constraints_token(self):
+        # the children get the constraints that can't be split as well, which the composite doesn't keep
+        return super()._constraints_token(), [ (s, s._constraints_token()) for s in self._solver_list ]
+
+    def _constraints_changed(self, token):
+        mine, children = token
+        solvers = self._solver_list
+        return super()._constraints_changed(mine) or len(children) != len(solvers) or \
+            any(s is not o or s._constraints_changed(t) for (s, t), o in zip(children, solvers))
+
     #
     # Solving
     #
@@ -266,52 +295,89 @@ class CompositeFrontend(ConstrainedFrontend):
         if self._unsat or (len(extra_constraints) == 0 and not self.satisfiable()):
             raise UnsatError("CompositeSolver is already unsat")
 
+    @staticmethod
+    def _knows_satness(s):
+        """
+        Whether a child knows if it is satisfiable without a solve.
+        """
+        return isinstance(s, SatCacheMixin) and s._cached_satness is not None or \
+            isinstance(s, ModelCacheMixin) and len(s._models) > 0
+
+    def _check_children(self, checks, failed):
+        """
+        Checks children, until one fails. The checks are run by the ParallelChecker, if there is one, except for the
+        ones that don't need a solve.
+
+        :param checks:  A list of (child, check, cheap) tuples, where check() checks the child and returns the result,
+                        and cheap tells whether it does so without a solve.
+        :param failed:  A function of the result of a check, which tells whether it failed.
+        :return:        The list of the results of the checks, with None for the ones that didn't run.
+        """
+        results = [ None ] * len(checks)
+        solves = [ ]
+        for i, (_, check, cheap) in enumerate(checks):
+            if self._parallel is None or cheap:
+                results[i] = check()
+                if failed(results[i]):
+                    return results
+            else:
+                solves.append(i)
+
+        if len(solves) != 0:
+            solved = self._parallel.check([ checks[i][:2] for i in solves ], failed)
+            for i, r in zip(solves, solved):
+                results[i] = r
+        return results
+
+    def _satisfiability_checks(self, method, extra_constraints, exact):
+        """
+        Returns the checks of the children for a satisfiability check of the composite, with `method` of the children,
+        and the merged solver of the extra constraints, if there are any, which is checked first.
+        """
+        checks = [ ]
+        extra_solver = None
+        children = self._solver_list
+        if len(extra_constraints) != 0:
+            extra_solver = self._merged_solver_for(lst=extra_constraints)
+            checks.append((
+                extra_solver,
+                functools.partial(getattr(extra_solver, method), extra_constraints=extra_constraints, exact=exact),
+                False
+            ))
+            extra_mask = extra_solver._variables_mask
+            children = [ s for s in children if not s._variables_mask & extra_mask ]
+
+        cheap = method == 'satisfiable'
+        checks.extend(
+            (s, functools.partial(getattr(s, method), exact=exact), cheap and self._knows_satness(s)) for s in children
+        )
+        return checks, extra_solver
+
     def check_satisfiability(self, extra_constraints=(), exact=None):
         if self._unsat:
             return 'UNSAT'
 
         l.debug("%r checking satisfiability...", self)
 
-        if len(extra_constraints) != 0:
-            extra_solver = self._merged_solver_for(lst=extra_constraints)
-            extra_solver_satness = extra_solver.check_satisfiability(extra_constraints=extra_constraints, exact=exact)
-            if extra_solver_satness in {'UNSAT', 'UNKNOWN'}:
-                return extra_solver_satness
-
-            satnesses = [
-                s.check_satisfiability(exact=exact) for s in
-                self._solver_list if s.variables.isdisjoint(extra_solver.variables)
-            ]
+        checks, extra_solver = self._satisfiability_checks('check_satisfiability', extra_constraints, exact)
+        satnesses = self._check_children(checks, lambda satness: satness in {'UNSAT', 'UNKNOWN'})
+        if extra_solver is not None and satnesses[0] == 'SAT':
             self._reabsorb_solver(extra_solver)
-            for satness in satnesses:
-                if satness in {'UNSAT', 'UNKNOWN'}:
-                    return satness
-            return 'SAT'
-        else:
-            for s in self._solver_list:
-                satness = s.check_satisfiability()
-                if satness in {'UNSAT', 'UNKNOWN'}:
-                    return satness
-            return 'SAT'
+        for satness in satnesses:
+            if satness in {'UNSAT', 'UNKNOWN'}:
+                return satness
+        return 'SAT'
 
     def satisfiable(self, extra_constraints=(), exact=None):
         if self._unsat: return False
 
         l.debug("%r checking satisfiability...", self)
 
-        if len(extra_constraints) != 0:
-            extra_solver = self._merged_solver_for(lst=extra_constraints)
-            if not extra_solver.satisfiable(extra_constraints=extra_constraints, exact=exact):
-                return False
-
-            r = all(
-                s.satisfiable(exact=exact) for s in
-                self._solver_list if s.variables.isdisjoint(extra_solver.variables)
-            )
+        checks, extra_solver = self._satisfiability_checks('satisfiable', extra_constraints, exact)
+        results = self._check_children(checks, operator.not_)
+        if extra_solver is not None and results[0]:
             self._reabsorb_solver(extra_solver)
-            return r
-        else:
-            return all(s.satisfiable(exact=exact) for s in self._solver_list)
+        return all(results)
 
     def eval(self, e, n, extra_constraints=(), exact=None):
         self._ensure_sat(extra_constraints=extra_constraints)
@@ -329,19 +395,31 @@ class CompositeFrontend(ConstrainedFrontend):
         self._reabsorb_solver(ms)
         return r
 
-    def max(self, e, extra_constraints=(), exact=None):
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        self._ensure_sat(extra_constraints=extra_constraints)
+
+        ms = self._merged_solver_for(lst2=exprs, lst=extra_constraints)
+        token = self._constraints_token()
+        try:
+            yield from ms.iter_batch_eval(exprs, n, extra_constraints=extra_constraints, exact=exact)
+        finally:
+            # the merged solver would take the place of the children that got constraints in the meantime
+            if not self._constraints_changed(token):
+                self._reabsorb_solver(ms)
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
         self._ensure_sat(extra_constraints=extra_constraints)
 
         ms = self._merged_solver_for(e=e, lst=extra_constraints)
-        r = ms.max(e, extra_constraints=extra_constraints, exact=exact)
+        r = ms.max(e, extra_constraints=extra_constraints, exact=exact, signed=signed)
         self._reabsorb_solver(ms)
         return r
 
-    def min(self, e, extra_constraints=(), exact=None):
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
         self._ensure_sat(extra_constraints=extra_constraints)
 
         ms = self._merged_solver_for(e=e, lst=extra_constraints)
-        r = ms.min(e, extra_constraints=extra_constraints, exact=exact)
+        r = ms.min(e, extra_constraints=extra_constraints, exact=exact, signed=signed)
         self._reabsorb_solver(ms)
         return r
 
@@ -394,15 +472,14 @@ class CompositeFrontend(ConstrainedFrontend):
 
             l.debug("... simplifying child solver %r", s)
             s.simplify()
-            results = self._split_child(s)
-            for ns in results:
-                if isinstance(ns, SimplifySkipperMixin):
-                    ns._simplified = True
+            # the parts of a simplified child are marked simplified by split()
+            self._split_child(s)
             new_constraints += s.constraints
 
         l.debug("... after-split, %r has %d solvers", self, len(self._solver_list))
 
         self.constraints = new_constraints
+        self._simplified_count = len(new_constraints)
         return new_constraints
 
     #
@@ -489,4 +566,5 @@ from ..ast.bool import Or
 from .. import backends
 from ..errors import BackendError, UnsatError
 from ..frontend_mixins.model_cache_mixin import ModelCacheMixin
+from ..frontend_mixins.sat_cache_mixin import SatCacheMixin
 from ..frontend_mixins.simplify_skipper_mixin import SimplifySkipperMixin
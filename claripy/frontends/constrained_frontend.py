@@ -12,18 +12,31 @@ class ConstrainedFrontend(Frontend):  # pylint:disable=abstract-method
         Frontend.__init__(self)
         self.constraints = []
         self.variables = set()
+        # the VariableSet of the variables, which keeps the ids in _variables_mask from being reused
+        self._variable_set = EMPTY_VARIABLES
         self._finalized = False
+        # the number of leading constraints that are already simplified
+        self._simplified_count = 0
+        # the values that the simplified constraints pin variables to, as (a dict of cache keys to the values, and the
+        # mask of the variables). The dict is shared with the copies, and replaced rather than updated.
+        self._simplification_facts = ({ }, 0)
 
     def _blank_copy(self, c):
         super(ConstrainedFrontend, self)._blank_copy(c)
         c.constraints = []
         c.variables = set()
+        c._variable_set = EMPTY_VARIABLES
         c._finalized = False
+        c._simplified_count = 0
+        c._simplification_facts = ({ }, 0)
 
     def _copy(self, c):
         super(ConstrainedFrontend, self)._copy(c)
         c.constraints = list(self.constraints)
         c.variables = set(self.variables)
+        c._variable_set = self._variable_set
+        c._simplified_count = self._simplified_count
+        c._simplification_facts = self._simplification_facts
 
         # finalize both
         self.finalize()
@@ -38,12 +51,19 @@ class ConstrainedFrontend(Frontend):  # pylint:disable=abstract-method
 
     def __setstate__(self, s):
         self.constraints, self.variables, base_state = s
+        self._variable_set = VariableSet.intern(self.variables)
+        self._simplified_count = 0
+        self._simplification_facts = ({ }, 0)
         super().__setstate__(base_state)
 
     #
     # Constraint management
     #
 
+    @property
+    def _variables_mask(self):
+        return self._variable_set.mask
+
     def independent_constraints(self):
         return self._split_constraints(self.constraints)
 
@@ -84,12 +104,15 @@ class ConstrainedFrontend(Frontend):  # pylint:disable=abstract-method
 
     def split(self):
         results = []
+        simplified = self._simplified_count >= len(self.constraints)
         l.debug("Splitting!")
         for variables, c_list in self.independent_constraints():
             l.debug("... got %d constraints with %d variables", len(c_list), len(variables))
 
             s = self.blank_copy()
             s.add(c_list)
+            if simplified:
+                s._mark_constraints_simplified()
             results.append(s)
         return results
 
@@ -101,21 +124,65 @@ class ConstrainedFrontend(Frontend):  # pylint:disable=abstract-method
         self.constraints += constraints
         for c in constraints:
             self.variables.update(c.variables)
+            self._variable_set = self._variable_set.union(c.variables)
         return constraints
 
+    def _constraints_token(self):
+        """
+        Returns a token of the constraints that the frontend has now, which _constraints_changed() checks against.
+        """
+        # the constraints list is only ever appended to, or replaced
+        return self.constraints, len(self.constraints)
+
+    def _constraints_changed(self, token):
+        """
+        Whether constraints were added to the frontend, or simplified, since _constraints_token() returned `token`.
+        """
+        return token[0] is not self.constraints or token[1] != len(self.constraints)
+
+    def _mark_constraints_simplified(self, upto=None):
+        """
+        Takes the first `upto` constraints (all of them by default) for simplified.
+        """
+        upto = len(self.constraints) if upto is None else min(upto, len(self.constraints))
+        self._simplified_count = upto
+        self._simplification_facts = _with_pinned_values(({ }, 0), self.constraints[:upto])
+
     def simplify(self):
-        to_simplify = [ c for c in self.constraints if not any(
+        """
+        Simplifies the constraints that were added since the last simplification. The constraints that were simplified
+        before are kept as they are, and the variables that they pin to a value are replaced by the value in the new
+        ones before these are simplified together.
+        """
+        done = min(self._simplified_count, len(self.constraints))
+        prefix, new = self.constraints[:done], self.constraints[done:]
+
+        to_simplify = [ c for c in new if not any(
             isinstance(a, SimplificationAvoidanceAnnotation) for a in c.annotations
         ) ]
-        no_simplify = [ c for c in self.constraints if any(
+        no_simplify = [ c for c in new if any(
             isinstance(a, SimplificationAvoidanceAnnotation) for a in c.annotations
         ) ]
 
         if len(to_simplify) == 0:
+            self._simplified_count = len(self.constraints)
             return self.constraints
 
+        facts, facts_mask = self._simplification_facts
+        if facts_mask:
+            # replace_dict() adds the rewritten subexpressions to the dict, which the copies share, so it gets a copy, and
+            # the constraints reuse each other's rewrites
+            replacements = dict(facts)
+            to_simplify = [
+                c.replace_dict(replacements) if variable_mask(c.variables) & facts_mask else c for c in to_simplify
+            ]
+
         simplified = simplify(And(*to_simplify)).split(['And']) #pylint:disable=no-member
-        self.constraints = no_simplify + simplified
+        if prefix:
+            simplified = [ c for c in simplified if c is not true ]
+        self.constraints = prefix + no_simplify + simplified
+        self._simplified_count = len(self.constraints)
+        self._simplification_facts = _with_pinned_values(self._simplification_facts, simplified)
         return self.constraints
 
     #
@@ -134,10 +201,13 @@ class ConstrainedFrontend(Frontend):  # pylint:disable=abstract-method
     def eval(self, e, n, extra_constraints=(), exact=None):
         raise NotImplementedError("eval() is not implemented")
 
-    def min(self, e, extra_constraints=(), exact=None):
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        raise NotImplementedError("iter_batch_eval() is not implemented")
+
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
         raise NotImplementedError("min() is not implemented")
 
-    def max(self, e, extra_constraints=(), exact=None):
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
         raise NotImplementedError("max() is not implemented")
 
     def solution(self, e, v, extra_constraints=(), exact=None):
@@ -149,6 +219,40 @@ class ConstrainedFrontend(Frontend):  # pylint:disable=abstract-method
     def is_false(self, e, extra_constraints=(), exact=None):
         raise NotImplementedError("is_false() is not implemented")
 
+def _pinned_values(constraints):
+    """
+    Yields the (cache key of a variable, value) pairs for the constraints that pin a variable to a value.
+    """
+    for c in constraints:
+        if c.annotations:
+            continue
+        if c.op == 'BoolS':
+            yield c.cache_key, true
+        elif c.op == 'Not' and c.args[0].op == 'BoolS':
+            yield c.args[0].cache_key, false
+        elif c.op == '__eq__':
+            a, b = c.args
+            if a.op == 'BVS' and not b.symbolic:
+                yield a.cache_key, b
+            elif b.op == 'BVS' and not a.symbolic:
+                yield b.cache_key, a
+
+def _with_pinned_values(facts, constraints):
+    """
+    Returns the (values, mask) pair `facts`, extended with the values that `constraints` pin variables to.
+    """
+    values, mask = facts
+    pinned = [ (k, v) for k, v in _pinned_values(constraints) if k not in values ]
+    if not pinned:
+        return facts
+
+    values = dict(values)
+    for k, v in pinned:
+        values[k] = v
+        mask |= variable_mask(k.ast.variables)
+    return values, mask
+
 from ..ast.base import simplify
-from ..ast.bool import And, Or
+from ..ast.variable_set import VariableSet, EMPTY_VARIABLES, variable_mask
+from ..ast.bool import And, Or, true, false
 from ..annotation import SimplificationAvoidanceAnnotation
@@ -1,48 +1,133 @@
 import logging
 import threading
+import weakref
 
 from .constrained_frontend import ConstrainedFrontend
 
 l = logging.getLogger("claripy.frontends.full_frontend")
 
+# the cache keys of the ASTs that the value-set analysis doesn't bound, which _value_bounds() doesn't convert again
+_unbounded = weakref.WeakSet()
+
+
+class _SharedSolver:
+    """
+    A backend solver that is shared by a frontend and its branches, and holds the constraints of whichever of them used
+    it last.
+
+    The constraints are asserted in scopes, one for every batch of constraints that were asserted together. When a
+    frontend takes the solver over, the scopes that go beyond the prefix of constraints that it has in common with the
+    solver are popped, and only the rest of its constraints are asserted, in a new scope. Branches share most of their
+    constraints, so moving between them only pops and asserts the few constraints where they differ.
+    """
+
+    __slots__ = ('backend', 'solver', 'constraints', 'scopes', 'owner', 'asserted', )
+
+    def __init__(self, backend, solver):
+        self.backend = backend
+        self.solver = solver
+        # the constraints that are asserted in the solver
+        self.constraints = [ ]
+        # the number of constraints that were asserted before each open scope
+        self.scopes = [ ]
+        # the list of constraints of the frontend that used the solver last. It is only ever appended to, so the
+        # constraints of the solver stay a prefix of it until another frontend takes the solver over.
+        self.owner = None
+        # the number of constraints asserted so far, over all scopes
+        self.asserted = 0
+
+    def hold(self, constraints):
+        """
+        Makes the solver hold exactly `constraints`.
+        """
+        held = self.constraints
+        if constraints is self.owner and len(held) <= len(constraints):
+            common = len(held)
+        else:
+            common = 0
+            for a, b in zip(held, constraints):
+                if a is not b:
+                    break
+                common += 1
+
+        n = 0
+        while len(held) > common:
+            del held[self.scopes.pop():]
+            n += 1
+        if n:
+            self.backend.pop(self.solver, n)
+
+        if len(constraints) > len(held):
+            new = constraints[len(held):]
+            self.backend.push(self.solver)
+            try:
+                self.backend.add(self.solver, new)
+            except BaseException:
+                self.backend.pop(self.solver)
+                raise
+            self.scopes.append(len(held))
+            held.extend(new)
+            self.asserted += len(new)
+
+        self.owner = constraints
+
+
 class FullFrontend(ConstrainedFrontend):
     _model_hook = None
 
-    def __init__(self, solver_backend, timeout=None, track=False, **kwargs):
+    def __init__(self, solver_backend, timeout=None, track=False, share_solver=False, **kwargs):
+        """
+        :param solver_backend:  The backend to solve with.
+        :param timeout:         The timeout of the solver, in milliseconds.
+        :param track:           Track the constraints, for unsat_core().
+        :param share_solver:    Share one solver between this frontend and its branches, with the constraints that they
+                                have in common asserted once (see _SharedSolver). This needs a backend that supports
+                                scopes, and is disabled when tracking constraints.
+        """
         ConstrainedFrontend.__init__(self, **kwargs)
         self._track = track
+        self._share_solver = share_solver
         self._solver_backend = solver_backend
         self.timeout = timeout if timeout is not None else 300000
         self._tls = threading.local()
-        self._to_add = [ ]
 
     def _blank_copy(self, c):
         super(FullFrontend, self)._blank_copy(c)
         c._track = self._track
+        c._share_solver = self._share_solver
         c._solver_backend = self._solver_backend
         c.timeout = self.timeout
         c._tls = threading.local()
-        c._to_add = [ ]
 
     def _copy(self, c):
         super(FullFrontend, self)._copy(c)
         c._track = self._track
+        c._share_solver = self._share_solver
         c._tls.solver = getattr(self._tls, 'solver', None) #pylint:disable=no-member
-        c._to_add = list(self._to_add)
+        c._tls.shared_solver = getattr(self._tls, 'shared_solver', None) #pylint:disable=no-member
+        if not self._solver_behind():
+            c._tls.synced = (c.constraints, len(c.constraints))
 
     #
     # Serialization support
     #
 
     def __getstate__(self):
-        return self._solver_backend.__class__.__name__, self.timeout, self._track, super().__getstate__()
+        return (
+            self._solver_backend.__class__.__name__, self.timeout, self._track, self._share_solver,
+            super().__getstate__()
+        )
 
     def __setstate__(self, s):
-        backend_name, self.timeout, self._track, base_state = s
+        if len(s) == 4:
+            # older pickles don't have the solver sharing flag
+            backend_name, self.timeout, self._track, base_state = s
+            self._share_solver = False
+        else:
+            backend_name, self.timeout, self._track, self._share_solver, base_state = s
         self._solver_backend = backends._backends_by_type[backend_name]
         #self._tls = None
         self._tls = threading.local()
-        self._to_add = [ ]
         super().__setstate__(base_state)
 
     #
@@ -50,11 +135,15 @@ class FullFrontend(ConstrainedFrontend):
     #
 
     def _get_solver(self):
-        if getattr(self._tls, 'solver', None) is None or (self._finalized and len(self._to_add) > 0):
+        if self._share_solver and not self._track and self._solver_backend.supports_scopes and \
+                not self._solver_backend.reuse_z3_solver:
+            return self._get_shared_solver()
+
+        if getattr(self._tls, 'solver', None) is None or (self._finalized and self._solver_behind()):
             self._tls.solver = self._solver_backend.solver(timeout=self.timeout)
             self._add_constraints()
 
-        if len(self._to_add) > 0:
+        if self._solver_behind():
             self._add_constraints()
 
         solver = self._tls.solver
@@ -63,25 +152,64 @@ class FullFrontend(ConstrainedFrontend):
             self._add_constraints()
         return solver
 
+    def _get_shared_solver(self):
+        shared = getattr(self._tls, 'shared_solver', None)
+        if shared is None:
+            shared = self._tls.shared_solver = _SharedSolver(
+                self._solver_backend, self._solver_backend.solver(timeout=self.timeout)
+            )
+        shared.hold(self.constraints)
+        return shared.solver
+
     def _add_constraints(self):
         self._solver_backend.add(self._tls.solver, self.constraints, track=self._track)
-        self._to_add = [ ]
+        self._tls.synced = (self.constraints, len(self.constraints))
+
+    def _solver_behind(self):
+        """
+        Whether the solver of this thread is missing constraints of the frontend.
+
+        Every thread has a solver of its own, so this is kept per thread, as the constraints list (which is replaced
+        when simplifying) and its length when the solver got them.
+        """
+        synced = getattr(self._tls, 'synced', None)
+        return getattr(self._tls, 'solver', None) is None or synced is None or \
+            synced[0] is not self.constraints or synced[1] != len(self.constraints)
+
+    def _take_solver(self):
+        """
+        Takes a solver holding the constraints away from the frontend, for a solve that leaves scopes open in it across
+        calls, while the frontend keeps being used. Returns the solver and a function to give it back.
+
+        The frontend gets another solver in the meantime, if it needs one. A shared solver is left alone, and the solve
+        gets one of its own.
+        """
+        if self._share_solver and not self._track and self._solver_backend.supports_scopes and \
+                not self._solver_backend.reuse_z3_solver:
+            solver = self._solver_backend.solver(timeout=self.timeout)
+            self._solver_backend.add(solver, self.constraints)
+            return solver, lambda: None
+
+        solver = self._get_solver()
+        self._tls.solver = None
+
+        def give_back():
+            if getattr(self._tls, 'solver', None) is None:
+                self._tls.solver = solver
+        return solver, give_back
 
     #
     # Constraint management
     #
 
     def add(self, constraints):
-        to_add = ConstrainedFrontend.add(self, constraints)
-        self._to_add += to_add
-        return to_add
+        return ConstrainedFrontend.add(self, constraints)
 
     def simplify(self):
         ConstrainedFrontend.simplify(self)
 
         # TODO: should we do this?
         self._tls.solver = None
-        self._to_add = [ ]
 
         return self.constraints
 
@@ -131,46 +259,97 @@ class FullFrontend(ConstrainedFrontend):
         except BackendError as e:
             raise ClaripyFrontendError("Backend error during batch_eval") from e
 
-    def max(self, e, extra_constraints=(), exact=None):
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        if not self.satisfiable(extra_constraints=extra_constraints):
+            raise UnsatError('unsat')
+
+        if self._solver_backend.reuse_z3_solver:
+            # every solve resets the solver, so the solutions can't be found lazily
+            yield from FullFrontend.batch_eval(self, exprs, n, extra_constraints=extra_constraints, exact=exact)
+            return
+
+        # the generator keeps solving the constraints that it started with, so its models only go to the model hook
+        # while the frontend has no others
+        model_hook = self._model_hook
+        if model_hook is not None:
+            token = self._constraints_token()
+            def model_callback(m):
+                if not self._constraints_changed(token):
+                    model_hook(m)
+        else:
+            model_callback = None
+
+        solver, give_back = self._take_solver()
+        try:
+            yield from self._solver_backend.batch_eval_iter(
+                exprs, n, extra_constraints=extra_constraints, solver=solver, model_callback=model_callback
+            )
+        except BackendError as e:
+            raise ClaripyFrontendError("Backend error during batch_eval") from e
+        finally:
+            give_back()
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
         if not self.satisfiable(extra_constraints=extra_constraints):
             raise UnsatError("Unsat during _max()")
 
         l.debug("Frontend.max() with %d extra_constraints", len(extra_constraints))
 
-        two = self.eval(e, 2, extra_constraints=extra_constraints)
-        if len(two) == 0: raise UnsatError("unsat during max()")
-        elif len(two) == 1: return two[0]
-
-        c = tuple(extra_constraints) + (UGE(e, two[0]), UGE(e, two[1]))
         try:
             return self._solver_backend.max(
-                e, extra_constraints=c,
+                e, extra_constraints=extra_constraints,
                 solver=self._get_solver(),
-                model_callback=self._model_hook
+                model_callback=self._model_hook,
+                signed=signed,
+                bounds=self._value_bounds(e, signed),
+                candidates=self._known_values(e, extra_constraints=extra_constraints)
             )
         except BackendError as e:
             raise ClaripyFrontendError("Backend error during max") from e
 
-    def min(self, e, extra_constraints=(), exact=None):
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
         if not self.satisfiable(extra_constraints=extra_constraints):
             raise UnsatError("Unsat during _min()")
 
         l.debug("Frontend.min() with %d extra_constraints", len(extra_constraints))
 
-        two = self.eval(e, 2, extra_constraints=extra_constraints)
-        if len(two) == 0: raise UnsatError("unsat during min()")
-        elif len(two) == 1: return two[0]
-
-        c = tuple(extra_constraints) + (ULE(e, two[0]), ULE(e, two[1]))
         try:
             return self._solver_backend.min(
-                e, extra_constraints=c,
+                e, extra_constraints=extra_constraints,
                 solver=self._get_solver(),
-                model_callback=self._model_hook
+                model_callback=self._model_hook,
+                signed=signed,
+                bounds=self._value_bounds(e, signed),
+                candidates=self._known_values(e, extra_constraints=extra_constraints)
             )
         except BackendError as e:
             raise ClaripyFrontendError("Backend error during min") from e
 
+    @staticmethod
+    def _value_bounds(e, signed):
+        """
+        Returns the bounds of the values of `e` from a value-set analysis, to seed the search of min() and max(), or
+        None.
+        """
+        if not isinstance(e, BV) or e.symbolic is False or e.cache_key in _unbounded:
+            return None
+        try:
+            si = backends.vsa.convert(e)
+            if isinstance(si, StridedInterval) and not si.is_empty and not si.is_top:
+                return backends.vsa._min(si, signed=signed), backends.vsa._max(si, signed=signed)
+        except ClaripyError:
+            # the bounds are only a hint: the search starts from the whole range of values without them
+            pass
+        _unbounded.add(e.cache_key)
+        return None
+
+    def _known_values(self, e, extra_constraints=()): #pylint:disable=unused-argument,no-self-use
+        """
+        Returns values that `e` is known to be able to take, along with the constraints and `extra_constraints`, to seed
+        the search of min() and max().
+        """
+        return ()
+
     def solution(self, e, v, extra_constraints=(), exact=None):
         try:
             return self._solver_backend.solution(
@@ -218,7 +397,7 @@ class FullFrontend(ConstrainedFrontend):
     def downsize(self):
         ConstrainedFrontend.downsize(self)
         self._tls.solver = None
-        self._to_add = [ ]
+        self._tls.shared_solver = None
 
     #
     # Merging and splitting
@@ -229,6 +408,7 @@ class FullFrontend(ConstrainedFrontend):
             self, others, merge_conditions, common_ancestor=common_ancestor
         )[1]
 
-from ..errors import UnsatError, BackendError, ClaripyFrontendError
-from ..ast.bv import UGE, ULE
+from ..errors import UnsatError, BackendError, ClaripyError, ClaripyFrontendError
+from ..ast.bv import BV
+from ..vsa import StridedInterval
 from ..backend_manager import backends
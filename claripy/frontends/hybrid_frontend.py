@@ -47,6 +47,13 @@ class HybridFrontend(Frontend):
     def variables(self):
         return self._exact_frontend.variables
 
+    @property
+    def _simplified_count(self):
+        return self._exact_frontend._simplified_count
+
+    def _mark_constraints_simplified(self, upto=None):
+        self._exact_frontend._mark_constraints_simplified(upto=upto)
+
     #
     # Serialization support
     #
@@ -107,11 +114,18 @@ class HybridFrontend(Frontend):
             return self._approximate_first_call('batch_eval', e, n, extra_constraints=extra_constraints)
         return self._hybrid_call('batch_eval', e, n, extra_constraints=extra_constraints, exact=exact)
 
-    def max(self, e, extra_constraints=(), exact=None):
-        return self._hybrid_call('max', e, extra_constraints=extra_constraints, exact=exact)
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        if exact is False or (self._approximate_first and exact is None and n > 2):
+            # the approximation can only be told apart from the exact solutions once they are all known
+            yield from HybridFrontend.batch_eval(self, exprs, n, extra_constraints=extra_constraints, exact=exact)
+        else:
+            yield from self._exact_frontend.iter_batch_eval(exprs, n, extra_constraints=extra_constraints)
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
+        return self._hybrid_call('max', e, extra_constraints=extra_constraints, exact=exact, signed=signed)
 
-    def min(self, e, extra_constraints=(), exact=None):
-        return self._hybrid_call('min', e, extra_constraints=extra_constraints, exact=exact)
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
+        return self._hybrid_call('min', e, extra_constraints=extra_constraints, exact=exact, signed=signed)
 
     def solution(self, e, v, extra_constraints=(), exact=None):
         return self._hybrid_call('solution', e, v, extra_constraints=extra_constraints, exact=exact)
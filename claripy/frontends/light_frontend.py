@@ -47,15 +47,18 @@ class LightFrontend(ConstrainedFrontend):
         except BackendError:
             raise ClaripyFrontendError("Light solver can't handle this batch_eval().")
 
-    def max(self, e, extra_constraints=(), exact=None):
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        yield from LightFrontend.batch_eval(self, exprs, n, extra_constraints=extra_constraints, exact=exact)
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
         try:
-            return self._solver_backend.max(e)
+            return self._solver_backend.max(e, signed=signed)
         except BackendError:
             raise ClaripyFrontendError("Light solver can't handle this max().")
 
-    def min(self, e, extra_constraints=(), exact=None):
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
         try:
-            return self._solver_backend.min(e)
+            return self._solver_backend.min(e, signed=signed)
         except BackendError:
             raise ClaripyFrontendError("Light solver can't handle this min().")
 
@@ -0,0 +1,167 @@
+"""
+Checks the independent children of CompositeFrontends at once.
+
+The children of a composite frontend have no variables in common, so the composite is satisfiable when all of them are,
+and their checks can run side by side. The checks are run by a pool of threads, and the first one that fails settles
+the check of the composite: the checks that haven't started are cancelled, and the running ones are interrupted,
+through Backend.interrupt_handle().
+"""
+
+import concurrent.futures
+import os
+import threading
+
+import logging
+l = logging.getLogger("claripy.frontends.parallel_checker")
+
+# the time (in seconds) between the interrupts of the checks that keep running after one failed
+_INTERRUPT_INTERVAL = 0.05
+
+# set in the threads of the pools, which check the children one after the other if they get to check a composite
+_pool_thread = threading.local()
+
+def _init_pool_thread():
+    _pool_thread.active = True
+
+class _Checks:
+    """
+    The checks of one ParallelChecker.check() call, and the handles that interrupt the running ones.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.interrupts = { }
+
+    def run(self, i, child, check):
+        with self.lock:
+            if self.stopped:
+                return None
+            backend = getattr(child, '_solver_backend', None)
+            interrupt = backend.interrupt_handle() if backend is not None else None
+            if interrupt is not None:
+                self.interrupts[i] = interrupt
+
+        try:
+            return check()
+        finally:
+            with self.lock:
+                self.interrupts.pop(i, None)
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            for interrupt in self.interrupts.values():
+                interrupt()
+
+class ParallelChecker:
+    """
+    Checks the satisfiability of the children of CompositeFrontends at once, in a pool of threads.
+
+    Z3 releases the GIL while it solves, so the children that solve with BackendZ3 are solved in the threads themselves.
+    With processes, the children solve with a BackendZ3Parallel (the `backend` of the checker, which SolverComposite
+    gives to the children of its default template solver), and the threads wait for its worker processes.
+
+    A checker can be shared by any number of composite frontends, and of threads.
+    """
+
+    ORDERS = ('largest', 'smallest', 'given')
+
+    def __init__(self, threads=None, processes=None, order='largest', min_children=2):
+        """
+        :param threads:         The number of threads of the pool. Defaults to the number of CPUs, or to twice the
+                                number of processes, so that the workers have their next solves queued.
+        :param processes:       The number of worker processes of a BackendZ3Parallel to solve in, or None to solve in
+                                the threads.
+        :param order:           The order that the checks start in: 'largest' starts with the children with the most
+                                constraints, which tend to take the longest, 'smallest' with the ones with the fewest,
+                                which are the quickest to find an unsatisfiable child if there is one, and 'given'
+                                keeps the order of the composite.
+        :param min_children:    The fewest checks to run in the pool. Fewer checks are run one after the other, in the
+                                calling thread.
+        """
+        if order not in self.ORDERS:
+            raise ValueError("unknown order %r, expected one of %s" % (order, ', '.join(self.ORDERS)))
+
+        self.processes = processes
+        self.threads = threads if threads is not None else 2 * processes if processes else os.cpu_count()
+        self.order = order
+        self.min_children = min_children
+        self.backend = BackendZ3Parallel(processes=processes) if processes else None
+
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __repr__(self):
+        return "<ParallelChecker %d threads, %s processes, order %s>" % (self.threads, self.processes, self.order)
+
+    def shutdown(self):
+        """
+        Stops the threads, and the worker processes.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        if self.backend is not None:
+            self.backend.shutdown()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.threads, thread_name_prefix='claripy-checker', initializer=_init_pool_thread
+                )
+            return self._executor
+
+    def _ordered(self, checks):
+        indices = range(len(checks))
+        if self.order == 'largest':
+            return sorted(indices, key=lambda i: len(checks[i][0].constraints), reverse=True)
+        elif self.order == 'smallest':
+            return sorted(indices, key=lambda i: len(checks[i][0].constraints))
+        else:
+            return list(indices)
+
+    def check(self, checks, failed):
+        """
+        Runs checks of children, until one fails.
+
+        :param checks:  A list of (child, check) pairs, where check() checks the child and returns the result.
+        :param failed:  A function of the result of a check, which tells whether it failed.
+        :return:        The list of the results of the checks, with None for the ones that were cancelled or
+                        interrupted after one failed.
+        """
+        results = [ None ] * len(checks)
+        order = self._ordered(checks)
+
+        if len(checks) < self.min_children or getattr(_pool_thread, 'active', False):
+            for i in order:
+                results[i] = checks[i][1]()
+                if failed(results[i]):
+                    break
+            return results
+
+        l.debug("checking %d children in the pool", len(checks))
+        state = _Checks()
+        executor = self._get_executor()
+        futures = { executor.submit(state.run, i, *checks[i]): i for i in order }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if failed(results[i]):
+                    l.debug("... child %d failed, stopping the other checks", i)
+                    break
+        finally:
+            # the children are left alone by the time this returns
+            state.stop()
+            for future in futures:
+                future.cancel()
+            # an interrupt that comes right before a solve starts is lost, so they are repeated until the checks stop
+            while len(concurrent.futures.wait(futures, timeout=_INTERRUPT_INTERVAL).not_done) != 0:
+                state.stop()
+
+        return results
+
+from ..backends import BackendZ3Parallel
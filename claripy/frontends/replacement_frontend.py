@@ -87,14 +87,16 @@ class ReplacementFrontend(ConstrainedFrontend):
         self._replacements = dict()
         self._replacement_cache = weakref.WeakKeyDictionary(self._replacements)
 
-    def _replacement(self, old):
+    def _has_replacements(self):
         # depressing hack
         try:
-            if not self._replacement_cache:
-                return old
+            return bool(self._replacement_cache)
         except RuntimeError:
-            if not self._replacement_cache:
-                return old
+            return bool(self._replacement_cache)
+
+    def _replacement(self, old):
+        if not self._has_replacements():
+            return old
 
         if not isinstance(old, Base):
             return old
@@ -159,7 +161,9 @@ class ReplacementFrontend(ConstrainedFrontend):
     #
 
     def _replace_list(self, lst):
-        return tuple(self._replacement(c) for c in lst)
+        if not self._has_replacements():
+            return tuple(lst)
+        return tuple(replace_dict_many(lst, self._replacement_cache))
 
     def eval(self, e, n, extra_constraints=(), exact=None):
         er = self._replacement(e)
@@ -177,17 +181,28 @@ class ReplacementFrontend(ConstrainedFrontend):
                 self._add_solve_result(original, er[i], r[0][i])
         return r
 
-    def max(self, e, extra_constraints=(), exact=None):
+    def iter_batch_eval(self, exprs, n, extra_constraints=(), exact=None):
+        er = self._replace_list(exprs)
+        ecr = self._replace_list(extra_constraints)
+        first = True
+        for r in self._actual_frontend.iter_batch_eval(er, n, extra_constraints=ecr, exact=exact):
+            if first and self._unsafe_replacement:
+                for i, original in enumerate(exprs):
+                    self._add_solve_result(original, er[i], r[i])
+            first = False
+            yield r
+
+    def max(self, e, extra_constraints=(), exact=None, signed=False):
         er = self._replacement(e)
         ecr = self._replace_list(extra_constraints)
-        r = self._actual_frontend.max(er, extra_constraints=ecr, exact=exact)
+        r = self._actual_frontend.max(er, extra_constraints=ecr, exact=exact, signed=signed)
         if self._unsafe_replacement: self._add_solve_result(e, er, r)
         return r
 
-    def min(self, e, extra_constraints=(), exact=None):
+    def min(self, e, extra_constraints=(), exact=None, signed=False):
         er = self._replacement(e)
         ecr = self._replace_list(extra_constraints)
-        r = self._actual_frontend.min(er, extra_constraints=ecr, exact=exact)
+        r = self._actual_frontend.min(er, extra_constraints=ecr, exact=exact, signed=signed)
         if self._unsafe_replacement: self._add_solve_result(e, er, r)
         return r
 
@@ -277,7 +292,7 @@ class ReplacementFrontend(ConstrainedFrontend):
         return added
 
 
-from ..ast.base import Base
+from ..ast.base import Base, replace_dict_many
 from ..ast.bv import BVV
 from ..ast.bool import BoolV, false
 from ..errors import ClaripyFrontendError, BackendError
@@ -1,4 +1,5 @@
 import itertools
+import time
 
 def op(name, arg_types, return_type, extra_check=None, calc_length=None, do_coerce=True, bound=True): #pylint:disable=unused-argument
     if type(arg_types) in (tuple, list): #pylint:disable=unidiomatic-typecheck
@@ -8,6 +9,8 @@ def op(name, arg_types, return_type, extra_check=None, calc_length=None, do_coer
     else:
         raise ClaripyOperationError("op {} got weird arg_types".format(name))
 
+    preprocessor = preprocessors.get(name, None)
+
     def _type_fixer(args):
         num_args = len(args)
         if expected_num_args is not None and num_args != expected_num_args:
@@ -37,11 +40,29 @@ def op(name, arg_types, return_type, extra_check=None, calc_length=None, do_coer
             else:
                 yield arg
 
-    def _op(*args):
+    def _fix_args(args, stats):
+        # fast path: the arguments already have the right types, so there is nothing to coerce
+        if expected_num_args is None:
+            for a in args:
+                if not isinstance(a, arg_types):
+                    break
+            else:
+                return args
+        elif len(args) == expected_num_args and all(map(isinstance, args, arg_types)):
+            return args
+
+        if stats is not None:
+            stats[1] += 1
         fixed_args = tuple(_type_fixer(args))
         for i in fixed_args:
             if i is NotImplemented:
                 return NotImplemented
+        return fixed_args
+
+    def _call(args, stats):
+        fixed_args = _fix_args(args, stats)
+        if fixed_args is NotImplemented:
+            return NotImplemented
         if extra_check is not None:
             success, msg = extra_check(*fixed_args)
             if not success:
@@ -57,16 +78,58 @@ def op(name, arg_types, return_type, extra_check=None, calc_length=None, do_coer
             kwargs['length'] = calc_length(*fixed_args)
 
         kwargs['uninitialized'] = None
-        if any(a.uninitialized is True for a in args if isinstance(a, ast.Base)):
-            kwargs['uninitialized'] = True
-        if name in preprocessors:
-            args, kwargs = preprocessors[name](*args, **kwargs)
+        base = ast.Base
+        for a in args:
+            if isinstance(a, base) and a._uninitialized is True:
+                kwargs['uninitialized'] = True
+                break
+        if preprocessor is not None:
+            args, kwargs = preprocessor(*args, **kwargs)
 
         return return_type(name, fixed_args, **kwargs)
 
+    def _op(*args):
+        if _op_stats is None:
+            return _call(args, None)
+
+        stats = _op_stats.get(name, None)
+        if stats is None:
+            stats = _op_stats[name] = [ 0, 0, 0.0 ]
+        stats[0] += 1
+        start = time.perf_counter()
+        try:
+            return _call(args, stats)
+        finally:
+            stats[2] += time.perf_counter() - start
+
     _op.calc_length = calc_length
     return _op
 
+#
+# Profiling
+#
+
+# when profiling is enabled, maps the name of each operation to its call count, the number of calls that needed their
+# arguments coerced, and the time spent in it
+_op_stats = None
+
+def set_op_profiling(enabled):
+    """
+    Enables or disables the profiling of operations. Enabling it resets the collected statistics.
+    """
+    global _op_stats  #pylint:disable=global-statement
+    _op_stats = { } if enabled else None
+
+def op_stats():
+    """
+    Returns the profile of the operations called since profiling was enabled, as a dict mapping the name of each
+    operation to its number of calls, the number of calls that needed their arguments coerced, and the time spent in
+    it, in seconds. The time includes the nested operations (those created by simplifiers, for example).
+    """
+    if _op_stats is None:
+        return { }
+    return { name: { 'calls': calls, 'coerced': coerced, 'time': t } for name, (calls, coerced, t) in _op_stats.items() }
+
 def _handle_annotations(simp, args):
     if simp is None:
         return None
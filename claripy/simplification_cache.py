@@ -0,0 +1,134 @@
+"""
+A bounded cache of simplification results.
+
+Simplifying an AST (with a solver backend, or by rewriting it with the simplification rules) only depends on the AST
+itself, so the result can be reused whenever the same AST is simplified again. The cache is keyed by the hash of the
+AST, which covers its annotations, and it keeps a weak reference to the original AST along with the simplified one: a
+hit is only taken if the original is the very same (hash-consed) AST, so that the result is never reused for a different
+AST whose hash collides, or that only differs in its annotations.
+
+The cache doesn't keep the original ASTs alive: the entry of an AST is dropped once the AST is gone. It also evicts the
+least recently used entries when it grows beyond its size.
+"""
+
+import threading
+import weakref
+
+from cachetools import LRUCache
+
+
+class EvictionCountingLRUCache(LRUCache):
+    def __init__(self, maxsize):
+        LRUCache.__init__(self, maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        item = LRUCache.popitem(self)
+        self.evictions += 1
+        return item
+
+
+class SimplificationCache:
+    """
+    A thread-safe LRU cache mapping ASTs to their simplified forms, for several kinds of simplification.
+    """
+
+    def __init__(self, maxsize=100000):
+        """
+        :param maxsize: The number of results to keep. 0 disables the cache.
+        """
+        self._lock = threading.Lock()
+        self._cache = EvictionCountingLRUCache(max(maxsize, 1))
+        self._enabled = maxsize > 0
+        # kind -> [hits, misses]
+        self._counters = { }
+        # the keys of the entries whose AST is gone, which are dropped on the next access
+        self._dead = [ ]
+
+    def _drop_dead(self):
+        # with the lock held
+        while self._dead:
+            key = self._dead.pop()
+            entry = self._cache.get(key, None)
+            if entry is not None and entry[0]() is None:
+                del self._cache[key]
+
+    def lookup(self, kind, expr, variant=None):
+        """
+        Returns the cached simplification of an AST, or None.
+
+        :param kind:    The kind of simplification, such as 'z3' or 'rewrite'.
+        :param expr:    The AST to simplify.
+        :param variant: Anything else that the result depends on.
+        """
+        if not self._enabled:
+            return None
+
+        key = (kind, variant, expr._hash)
+        with self._lock:
+            counters = self._counters.get(kind, None)
+            if counters is None:
+                counters = self._counters[kind] = [ 0, 0 ]
+            entry = self._cache.get(key, None)
+            if entry is not None and entry[0]() is expr:
+                counters[0] += 1
+                # an AST that simplifies to itself isn't referred to by its own entry, which would keep it alive
+                return expr if entry[1] is None else entry[1]
+            counters[1] += 1
+            return None
+
+    def store(self, kind, expr, result, variant=None):
+        """
+        Remembers the simplification of an AST. See lookup() for the parameters.
+        """
+        if not self._enabled:
+            return
+
+        key = (kind, variant, expr._hash)
+        dead = self._dead
+        with self._lock:
+            self._drop_dead()
+            self._cache[key] = (weakref.ref(expr, lambda _: dead.append(key)), None if result is expr else result)
+
+    def resize(self, maxsize):
+        """
+        Changes the number of results to keep, dropping the oldest ones if needed. 0 disables the cache.
+        """
+        with self._lock:
+            cache = EvictionCountingLRUCache(max(maxsize, 1))
+            if maxsize > 0:
+                for key, entry in self._cache.items():
+                    cache[key] = entry
+            cache.evictions += self._cache.evictions
+            self._cache = cache
+            self._enabled = maxsize > 0
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        """
+        Returns the number of hits, misses and evictions, the number of results held and the maximum size of the cache,
+        along with the hits and misses of every kind of simplification.
+        """
+        with self._lock:
+            self._drop_dead()
+            by_kind = { kind: { 'hits': h, 'misses': m } for kind, (h, m) in self._counters.items() }
+            return {
+                'hits': sum(s['hits'] for s in by_kind.values()),
+                'misses': sum(s['misses'] for s in by_kind.values()),
+                'evictions': self._cache.evictions,
+                'size': len(self._cache),
+                'maxsize': self._cache.maxsize if self._enabled else 0,
+                'by_kind': by_kind,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters.clear()
+            self._cache.evictions = 0
+
+
+# the cache shared by the simplifiers
+simplification_cache = SimplificationCache()
@@ -1,43 +1,226 @@
 import collections
 import itertools
 import operator
+import weakref
 
 from functools import reduce
 
+from .simplification_cache import simplification_cache
+
+_versions = itertools.count()
+
+
+class Rule:
+    """
+    A rewrite rule: a function that receives the arguments of an operation and returns a simpler AST, or None if it
+    does not apply.
+    """
+
+    __slots__ = ('name', 'op', 'children', 'func', 'tries', 'hits')
+
+    def __init__(self, name, op, children, func):
+        self.name = name
+        self.op = op
+        # a tuple of (position, ops) pairs: the rule only applies if the argument at every position is an AST with one
+        # of the ops
+        self.children = children
+        self.func = func
+        self.tries = 0
+        self.hits = 0
+
+    def matches(self, child_ops):
+        return all(child_ops.get(pos, None) in ops for pos, ops in self.children)
+
+    def __repr__(self):
+        return '<Rule %s on %s>' % (self.name, self.op)
+
 
 class SimplificationManager:
+    """
+    A term-rewriting engine. Its rules are indexed by the operation they apply to and by the operations of the
+    arguments they expect, so that simplifying an operation only tries the rules that can apply to it. The candidate
+    rules for every combination of operations are computed once.
+
+    Rules are tried in the order in which they were added, and the first one that returns an AST wins.
+    """
+
     def __init__(self):
-        self._simplifiers = {
-            'Reverse': self.bv_reverse_simplifier,
-            'And': self.boolean_and_simplifier,
-            'Or': self.boolean_or_simplifier,
-            'Not': self.boolean_not_simplifier,
-            'Extract': self.extract_simplifier,
-            'Concat': self.concat_simplifier,
-            'If': self.if_simplifier,
-            '__lshift__': self.lshift_simplifier,
-            '__rshift__': self.rshift_simplifier,
-            'LShR': self.lshr_simplifier,
-            '__eq__': self.eq_simplifier,
-            '__ne__': self.ne_simplifier,
-            '__or__': self.bitwise_or_simplifier,
-            '__and__': self.bitwise_and_simplifier,
-            '__xor__': self.bitwise_xor_simplifier,
-            '__add__': self.bitwise_add_simplifier,
-            '__sub__': self.bitwise_sub_simplifier,
-            '__mul__': self.bitwise_mul_simplifier,
-            'ZeroExt': self.zeroext_simplifier,
-            'SignExt': self.signext_simplifier,
-            'fpToIEEEBV': self.fptobv_simplifier,
-            'fpToFP': self.fptofp_simplifier,
-            'StrExtract': self.str_extract_simplifier,
-            'StrReverse': self.str_reverse_simplifier,
-        }
+        self._rules = [ ]
+        # op -> (rules on the op, positions of the arguments whose ops index these rules)
+        self._index = { }
+        # (op, ops of the indexed arguments) -> candidate rules
+        self._candidates = { }
+        # hash -> AST, for the ASTs that are known to be in normal form
+        self._normal = weakref.WeakValueDictionary()
+        # identifies the rule set in the simplification cache
+        self._version = next(_versions)
+
+        self._add_default_rules()
+
+    def add_rule(self, op, func, children=None, name=None):
+        """
+        Adds a rewrite rule.
+
+        :param op:          The operation the rule applies to.
+        :param func:        The function that rewrites the arguments of the operation. It returns the resulting AST, or
+                            None if the rule does not apply.
+        :param children:    The ops that the arguments must have for the rule to apply: a sequence holding, for each
+                            argument, an op, a collection of ops, or None for any argument.
+        :param name:        The name of the rule, for rule_stats(). Defaults to the name of the function.
+        """
+        constraints = tuple(
+            (pos, frozenset((c,)) if isinstance(c, str) else frozenset(c))
+            for pos, c in enumerate(children or ()) if c is not None
+        )
+        rule = Rule(name or func.__name__, op, constraints, func)
+        self._rules.append(rule)
+
+        rules, positions = self._index.get(op, ((), ()))
+        positions = tuple(sorted(set(positions) | { pos for pos, _ in constraints }))
+        self._index[op] = (rules + (rule,), positions)
+
+        self._candidates.clear()
+        self._normal.clear()
+        self._version = next(_versions)
+        return rule
+
+    def rules_for(self, op, args):
+        """
+        Returns the rules that may apply to an operation on the given arguments, in order.
+        """
+        try:
+            rules, positions = self._index[op]
+        except KeyError:
+            return ()
+        if not positions:
+            return rules
+
+        key = (op,) + tuple(
+            args[pos].op if pos < len(args) and isinstance(args[pos], ast.Base) else None for pos in positions
+        )
+        try:
+            return self._candidates[key]
+        except KeyError:
+            child_ops = dict(zip(positions, key[1:]))
+            candidates = tuple(r for r in rules if r.matches(child_ops))
+            self._candidates[key] = candidates
+            return candidates
 
     def simplify(self, op, args):
-        if op not in self._simplifiers:
-            return None
-        return self._simplifiers[op](*args)
+        for rule in self.rules_for(op, args):
+            rule.tries += 1
+            r = rule.func(*args)
+            if r is not None:
+                rule.hits += 1
+                return r
+        return None
+
+    def rewrite(self, expr, max_rounds=16):
+        """
+        Rewrites an AST bottom-up to a fixpoint of the rules: the rules are applied to every node until none of them
+        applies, or until they have rewritten the node `max_rounds` times. ASTs that are already known to be in normal
+        form are not visited again.
+
+        This is useful for ASTs that were built without simplification (with make_like(), for example). ASTs that
+        were built through the operations are already simplified at every step.
+
+        The results are kept in the simplification cache.
+        """
+        variant = (self._version, max_rounds)
+        r = simplification_cache.lookup('rewrite', expr, variant=variant)
+        if r is not None:
+            return r
+
+        normal = self._normal
+
+        def _pre(a):
+            return a if normal.get(a._hash, None) is a else traversal.DESCEND
+
+        def _post(_, a):
+            for _ in range(max_rounds):
+                if not isinstance(a, ast.Base) or a.op in operations.leaf_operations:
+                    return a
+                r = self.simplify(a.op, a.args)
+                if r is not None:
+                    r = operations._handle_annotations(r, a.args)
+                if r is None or r is a:
+                    normal[a._hash] = a
+                    return a
+                a = r
+            return a
+
+        r = traversal.transform(expr, pre=_pre, post=_post)
+        simplification_cache.store('rewrite', expr, r, variant=variant)
+        return r
+
+    def rule_stats(self):
+        """
+        Returns a dict mapping the name of every rule to the number of times it was tried and the number of times it
+        applied.
+        """
+        stats = { }
+        for rule in self._rules:
+            s = stats.setdefault(rule.name, { 'tries': 0, 'hits': 0 })
+            s['tries'] += rule.tries
+            s['hits'] += rule.hits
+        return stats
+
+    def reset_rule_stats(self):
+        for rule in self._rules:
+            rule.tries = 0
+            rule.hits = 0
+
+    def _add_default_rules(self):
+        add = self.add_rule
+
+        add('Reverse', self.reverse_reverse_simplifier, ('Reverse',))
+        add('Reverse', self.reverse_byte_simplifier)
+        add('Reverse', self.reverse_concat_simplifier, ('Concat',))
+        add('Reverse', self.reverse_extract_simplifier, ('Extract',))
+
+        add('And', self.boolean_and_simplifier)
+        add('Or', self.boolean_or_simplifier)
+
+        # Not(a op b) ==> a inverse-op b
+        for body_op, negated in (('__eq__', operator.ne), ('__ne__', operator.eq),
+                                 ('SLT', 'SGE'), ('SLE', 'SGT'),
+                                 ('SGT', 'SLE'), ('SGE', 'SLT'),
+                                 ('ULT', 'UGE'), ('ULE', 'UGT'),
+                                 ('UGT', 'ULE'), ('UGE', 'ULT'),
+                                 ('__lt__', 'UGE'), ('__le__', 'UGT'),
+                                 ('__gt__', 'ULE'), ('__ge__', 'ULT')):
+            add('Not', self._negated_comparison_simplifier(negated), (body_op,), name='not_' + body_op.strip('_'))
+        add('Not', self.not_not_simplifier, ('Not',))
+        add('Not', self.not_if_simplifier, ('If',))
+
+        add('Extract', self.extract_simplifier)
+        add('Concat', self.concat_simplifier)
+        add('If', self.if_simplifier)
+
+        for shift_op in ('__lshift__', '__rshift__', 'LShR'):
+            add(shift_op, self.shift_by_zero_simplifier)
+        for shift_op in ('__rshift__', 'LShR'):
+            add(shift_op, self.shift_out_concat_simplifier, ('Concat',))
+            add(shift_op, self.shift_out_zeroext_simplifier, ('ZeroExt',))
+
+        add('__eq__', self.eq_simplifier)
+        add('__ne__', self.ne_simplifier)
+        add('__or__', self.bitwise_or_simplifier)
+        add('__and__', self.bitwise_and_simplifier)
+        add('__xor__', self.bitwise_xor_simplifier)
+        add('__add__', self.bitwise_add_simplifier)
+        add('__sub__', self.bitwise_sub_simplifier)
+        add('__mul__', self.bitwise_mul_simplifier)
+
+        add('ZeroExt', self.ext_by_zero_simplifier)
+        add('ZeroExt', self.zeroext_zeroext_simplifier, (None, 'ZeroExt'))
+        add('SignExt', self.ext_by_zero_simplifier)
+
+        add('fpToIEEEBV', self.fptobv_simplifier, ('fpToFP',))
+        add('fpToFP', self.fptofp_simplifier, ('fpToIEEEBV',))
+
+        add('StrExtract', self.str_extract_simplifier)
+        add('StrReverse', self.str_reverse_simplifier)
 
     #
     # The simplifiers.
@@ -135,27 +318,19 @@ class SimplificationManager:
         return
 
     @staticmethod
-    def rshift_simplifier(val, shift):
-        if (shift == 0).is_true():
+    def shift_by_zero_simplifier(val, shift):
+        if _is_value(shift, 0):
             return val
-        if val.op == "Concat" and (val.args[0] == 0).is_true() and (shift > val.size() - val.args[0].size()).is_true():
-            return ast.all_operations.BVV(0, val.size())
-        if val.op == "ZeroExt" and (shift > val.size() - val.args[0]).is_true():
-            return ast.all_operations.BVV(0, val.size())
 
     @staticmethod
-    def lshr_simplifier(val, shift):
-        if (shift == 0).is_true():
-            return val
-        if val.op == "Concat" and (val.args[0] == 0).is_true() and (shift > val.size() - val.args[0].size()).is_true():
-            return ast.all_operations.BVV(0, val.size())
-        if val.op == "ZeroExt" and (shift > val.size() - val.args[0]).is_true():
+    def shift_out_concat_simplifier(val, shift):
+        if _is_value(val.args[0], 0) and _is_ugt(shift, val.size() - val.args[0].size()):
             return ast.all_operations.BVV(0, val.size())
 
     @staticmethod
-    def lshift_simplifier(val, shift):
-        if (shift == 0).is_true():
-            return val
+    def shift_out_zeroext_simplifier(val, shift):
+        if _is_ugt(shift, val.size() - val.args[0]):
+            return ast.all_operations.BVV(0, val.size())
 
     @staticmethod
     def eq_simplifier(a, b):
@@ -176,10 +351,10 @@ class SimplificationManager:
 
         # TODO: all these ==/!= might really slow things down...
         if a.op == 'If':
-            if a.args[1] is b and ast.all_operations.is_true(a.args[2] != b):
+            if a.args[1] is b and _must_be_ne(a.args[2], b):
                 # (If(c, x, y) == x, x != y) -> c
                 return a.args[0]
-            elif a.args[2] is b and ast.all_operations.is_true(a.args[1] != b):
+            elif a.args[2] is b and _must_be_ne(a.args[1], b):
                 # (If(c, x, y) == y, x != y) -> !c
                 return ast.all_operations.Not(a.args[0])
             # elif a._claripy.is_true(a.args[1] == b) and a._claripy.is_true(a.args[2] == b):
@@ -188,10 +363,10 @@ class SimplificationManager:
             #	  return a._claripy.false
 
         if b.op == 'If':
-            if b.args[1] is a and ast.all_operations.is_true(b.args[2] != b):
+            if b.args[1] is a and _must_be_ne(b.args[2], b):
                 # (x == If(c, x, y)) -> c
                 return b.args[0]
-            elif b.args[2] is a and ast.all_operations.is_true(b.args[1] != a):
+            elif b.args[2] is a and _must_be_ne(b.args[1], a):
                 # (y == If(c, x, y)) -> !c
                 return ast.all_operations.Not(b.args[0])
             # elif b._claripy.is_true(b.args[1] == a) and b._claripy.is_true(b.args[2] == a):
@@ -200,17 +375,8 @@ class SimplificationManager:
             #	  return b._claripy.false
 
         if (a.op in SIMPLE_OPS or b.op in SIMPLE_OPS) and a.length > 1 and a.length == b.length:
-            for i in range(a.length):
-                a_bit = a[i:i]
-                if a_bit.symbolic:
-                    break
-
-                b_bit = b[i:i]
-                if b_bit.symbolic:
-                    break
-
-                if ast.all_operations.is_false(a_bit == b_bit):
-                    return ast.all_operations.false
+            if _low_bits_differ(a, b):
+                return ast.all_operations.false
 
     @staticmethod
     def ne_simplifier(a, b):
@@ -221,10 +387,10 @@ class SimplificationManager:
             return a.args[0] != b.args[0]
 
         if a.op == 'If':
-            if a.args[2] is b and ast.all_operations.is_true(a.args[1] != b):
+            if a.args[2] is b and _must_be_ne(a.args[1], b):
                 # (If(c, x, y) == x, x != y) -> c
                 return a.args[0]
-            elif a.args[1] is b and ast.all_operations.is_true(a.args[2] != b):
+            elif a.args[1] is b and _must_be_ne(a.args[2], b):
                 # (If(c, x, y) == y, x != y) -> !c
                 return ast.all_operations.Not(a.args[0])
             # elif a._claripy.is_true(a.args[1] == b) and a._claripy.is_true(a.args[2] == b):
@@ -233,10 +399,10 @@ class SimplificationManager:
             #	  return a._claripy.true
 
         if b.op == 'If':
-            if b.args[2] is a and ast.all_operations.is_true(b.args[1] != a):
+            if b.args[2] is a and _must_be_ne(b.args[1], a):
                 # (x == If(c, x, y)) -> c
                 return b.args[0]
-            elif b.args[1] is a and ast.all_operations.is_true(b.args[2] != a):
+            elif b.args[1] is a and _must_be_ne(b.args[2], a):
                 # (y == If(c, x, y)) -> !c
                 return ast.all_operations.Not(b.args[0])
             # elif b._claripy.is_true(b.args[1] != a) and b._claripy.is_true(b.args[2] != a):
@@ -245,51 +411,45 @@ class SimplificationManager:
             #	  return b._claripy.false
 
         if (a.op == SIMPLE_OPS or b.op in SIMPLE_OPS) and a.length > 1 and a.length == b.length:
-            for i in range(a.length):
-                a_bit = a[i:i]
-                if a_bit.symbolic:
-                    break
-
-                b_bit = b[i:i]
-                if b_bit.symbolic:
-                    break
-
-                if ast.all_operations.is_true(a_bit != b_bit):
-                    return ast.all_operations.true
+            if _low_bits_differ(a, b):
+                return ast.all_operations.true
 
     @staticmethod
-    def bv_reverse_simplifier(body):
-        if body.op == 'Reverse':
-            # Reverse(Reverse(x)) ==> x
-            return body.args[0]
+    def reverse_reverse_simplifier(body):
+        # Reverse(Reverse(x)) ==> x
+        return body.args[0]
 
+    @staticmethod
+    def reverse_byte_simplifier(body):
         if body.length == 8:
             # Reverse(byte) ==> byte
             return body
 
-        if body.op == 'Concat':
-            if all(a.op == 'Extract' for a in body.args):
-                first_ast = body.args[0].args[2]
-                for i,a in enumerate(body.args):
-                    if not (first_ast is a.args[2]
-                            and a.args[0] == ((i + 1) * 8 - 1)
-                            and a.args[1] == i * 8):
-                        break
+    @staticmethod
+    def reverse_concat_simplifier(body):
+        if all(a.op == 'Extract' for a in body.args):
+            first_ast = body.args[0].args[2]
+            for i,a in enumerate(body.args):
+                if not (first_ast is a.args[2]
+                        and a.args[0] == ((i + 1) * 8 - 1)
+                        and a.args[1] == i * 8):
+                    break
+            else:
+                upper_bound = body.args[-1].args[0]
+                if first_ast.length == upper_bound + 1:
+                    return first_ast
                 else:
-                    upper_bound = body.args[-1].args[0]
-                    if first_ast.length == upper_bound + 1:
-                        return first_ast
-                    else:
-                        return first_ast[upper_bound:0]
-            if all(a.length == 8 for a in body.args):
-                return body.make_like(body.op, body.args[::-1], simplify=True)
-
-        if body.op == 'Concat':
-            if all(a.op == 'Reverse' for a in body.args):
-                if all(a.length % 8 == 0 for a in body.args):
-                    return body.make_like(body.op, [a.args[0] for a in reversed(body.args)], simplify=True)
-
-        if body.op == 'Extract' and body.args[2].op == 'Reverse':
+                    return first_ast[upper_bound:0]
+        if all(a.length == 8 for a in body.args):
+            return body.make_like(body.op, body.args[::-1], simplify=True)
+
+        if all(a.op == 'Reverse' for a in body.args):
+            if all(a.length % 8 == 0 for a in body.args):
+                return body.make_like(body.op, [a.args[0] for a in reversed(body.args)], simplify=True)
+
+    @staticmethod
+    def reverse_extract_simplifier(body):
+        if body.args[2].op == 'Reverse':
             # Reverse(Extract(hi, lo, Reverse(x))) ==> Extract(bits-lo-1, bits-hi-1, x)
             # Holds only when (hi+1) and lo are multiples of 8 (or, multiples of bits_per_byte if we really want to
             # suppport cLEMENCy)
@@ -414,7 +574,7 @@ class SimplificationManager:
         new_args = tuple(itertools.chain.from_iterable(
             (a.args if isinstance(a, ast.Base) and a.op == op_name else (a,)) for a in args
         ))
-        variables = frozenset(itertools.chain.from_iterable(a.variables for a in args if isinstance(a, ast.Base)))
+        variables = EMPTY_VARIABLES.union(*(a.variables for a in args if isinstance(a, ast.Base)))
         if filter_func: new_args = filter_func(new_args)
         if not new_args and 'initial_value' in kwargs:
             return kwargs['initial_value']
@@ -439,7 +599,7 @@ class SimplificationManager:
     def bitwise_sub_simplifier(a, b):
         if b is ast.all_operations.BVV(0, a.size()):
             return a
-        elif a is b or (a == b).is_true():
+        elif _must_be_eq(a, b):
             return ast.all_operations.BVV(0, a.size())
 
     # recognize b-bit z=signedmax(q,r) from this idiom:
@@ -503,7 +663,7 @@ class SimplificationManager:
             return b
         elif b is ast.all_operations.BVV(0, a.size()):
             return a
-        elif a is b or (a == b).is_true():
+        elif _must_be_eq(a, b):
             return ast.all_operations.BVV(0, a.size())
 
         result = SimplificationManager.bitwise_xor_simplifier_minmax(a,b)
@@ -524,9 +684,7 @@ class SimplificationManager:
             return b
         elif b is ast.all_operations.BVV(0, a.size()):
             return a
-        elif (a == b).is_true():
-            return a
-        elif a is b:
+        elif _must_be_eq(a, b):
             return a
 
         def _flattening_filter(args):
@@ -543,17 +701,15 @@ class SimplificationManager:
         if r is not None:
             return r
 
-        if (a == 2**a.size()-1).is_true():
+        if _is_value(a, 2**a.size()-1):
             return b
-        elif (b == 2**a.size()-1).is_true():
-            return a
-        elif (a == b).is_true():
+        elif _is_value(b, 2**a.size()-1):
             return a
-        elif a is b:
+        elif _must_be_eq(a, b):
             return a
         elif a.op == "Concat" and len(a.args) == 2:
             # maybe we can drop the second argument
-            if (b == 2 ** (a.size() - a.args[0].size()) - 1).is_true():
+            if _is_value(b, 2 ** (a.size() - a.args[0].size()) - 1):
                 # yes!
                 return ast.all_operations.ZeroExt(a.args[0].size(), a.args[1])
 
@@ -564,60 +720,31 @@ class SimplificationManager:
         return SimplificationManager._flatten_simplifier('__and__', _flattening_filter, a, b)
 
     @staticmethod
-    def boolean_not_simplifier(body):
-        if body.op == '__eq__':
-            return body.args[0] != body.args[1]
-        elif body.op == '__ne__':
-            return body.args[0] == body.args[1]
-
-        if body.op == 'Not':
-            return body.args[0]
-
-        if body.op == 'If':
-            return ast.all_operations.If(body.args[0], body.args[2], body.args[1])
-
-        if body.op == 'SLT':
-            return ast.all_operations.SGE(body.args[0], body.args[1])
-        elif body.op == 'SLE':
-            return ast.all_operations.SGT(body.args[0], body.args[1])
-        elif body.op == 'SGT':
-            return ast.all_operations.SLE(body.args[0], body.args[1])
-        elif body.op == 'SGE':
-            return ast.all_operations.SLT(body.args[0], body.args[1])
-
-        if body.op == 'ULT':
-            return ast.all_operations.UGE(body.args[0], body.args[1])
-        elif body.op == 'ULE':
-            return ast.all_operations.UGT(body.args[0], body.args[1])
-        elif body.op == 'UGT':
-            return ast.all_operations.ULE(body.args[0], body.args[1])
-        elif body.op == 'UGE':
-            return ast.all_operations.ULT(body.args[0], body.args[1])
-
-        if body.op == '__lt__':
-            return ast.all_operations.UGE(body.args[0], body.args[1])
-        elif body.op == '__le__':
-            return ast.all_operations.UGT(body.args[0], body.args[1])
-        elif body.op == '__gt__':
-            return ast.all_operations.ULE(body.args[0], body.args[1])
-        elif body.op == '__ge__':
-            return ast.all_operations.ULT(body.args[0], body.args[1])
-
-    @staticmethod
-    def zeroext_simplifier(n, e):
-        if n == 0:
-            return e
+    def _negated_comparison_simplifier(negated):
+        def simplifier(body):
+            f = negated if callable(negated) else getattr(ast.all_operations, negated)
+            return f(body.args[0], body.args[1])
+        return simplifier
 
-        if e.op == 'ZeroExt':
-            # ZeroExt(A, ZeroExt(B, x)) ==> ZeroExt(A + B, x)
-            return e.make_like(e.op, (n + e.args[0], e.args[1]), length=n + e.size(), simplify=True)
+    @staticmethod
+    def not_not_simplifier(body):
+        return body.args[0]
+
+    @staticmethod
+    def not_if_simplifier(body):
+        return ast.all_operations.If(body.args[0], body.args[2], body.args[1])
 
     @staticmethod
-    def signext_simplifier(n, e):
+    def ext_by_zero_simplifier(n, e):
         if n == 0:
             return e
 
-        # TODO: if top bit is 0, do a zero-extend instead
+        # TODO: for SignExt, if top bit is 0, do a zero-extend instead
+
+    @staticmethod
+    def zeroext_zeroext_simplifier(n, e):
+        # ZeroExt(A, ZeroExt(B, x)) ==> ZeroExt(A + B, x)
+        return e.make_like(e.op, (n + e.args[0], e.args[1]), length=n + e.size(), simplify=True)
 
     @staticmethod
     def extract_simplifier(high, low, val):
@@ -710,12 +837,12 @@ class SimplificationManager:
     # oh gods
     @staticmethod
     def fptobv_simplifier(the_fp):
-        if the_fp.op == 'fpToFP' and len(the_fp.args) == 2:
+        if len(the_fp.args) == 2:
             return the_fp.args[0]
 
     @staticmethod
     def fptofp_simplifier(*args):
-        if len(args) == 2 and args[0].op == 'fpToIEEEBV':
+        if len(args) == 2:
             to_bv, sort = args
             if sort == fp.FSORT_FLOAT and to_bv.length == 32:
                 return to_bv.args[0]
@@ -803,9 +930,136 @@ extract_distributable = {
     '__xor__', '__rxor__',
 }
 
+#
+# Predicates
+#
+# These decide the side conditions of the simplifiers from the payloads, lengths and identities of their arguments.
+# Each one gives the answer of the expression in its docstring, but without building the ASTs that evaluating that
+# expression would (and simplifying them, and handing them to the quick backends). The cases that they can't decide
+# that way fall back to the expression.
+#
+
+# the symbolic operations on which the default rules for __eq__ and __ne__ may decide something
+_EQ_DECIDABLE_OPS = ('If', 'Reverse')
+
+def _is_concrete_leaf(e):
+    return (e.op == 'BVV' or e.op == 'BoolV') and e.args[0] is not None
+
+def _is_value(e, v):
+    """
+    (e == v).is_true(), for a bit-vector `e` and an int `v`.
+    """
+    if e.op == 'BVV' and e.args[0] is not None:
+        return e.args[0] == v & ((1 << e.args[1]) - 1)
+    if e.symbolic and e.op not in _EQ_DECIDABLE_OPS:
+        return False
+    return (e == v).is_true()
+
+def _is_ugt(e, v):
+    """
+    (e > v).is_true(), for a bit-vector `e` and an int `v`.
+    """
+    if e.op == 'BVV' and e.args[0] is not None:
+        return e.args[0] > v & ((1 << e.args[1]) - 1)
+    if e.symbolic:
+        return False
+    return (e > v).is_true()
+
+def _must_be_eq(a, b):
+    """
+    a is b or (a == b).is_true()
+    """
+    if a is b:
+        return True
+    if _is_concrete_leaf(a) and _is_concrete_leaf(b) and a.op == b.op and a.length == b.length:
+        return a.args[0] == b.args[0]
+    if (a.symbolic or b.symbolic) and a.op not in _EQ_DECIDABLE_OPS and b.op not in _EQ_DECIDABLE_OPS:
+        return False
+    return (a == b).is_true()
+
+def _must_be_ne(a, b):
+    """
+    ast.all_operations.is_true(a != b)
+    """
+    if a is b:
+        return False
+    if _is_concrete_leaf(a) and _is_concrete_leaf(b) and a.op == b.op and a.length == b.length:
+        return a.args[0] != b.args[0]
+    if (a.symbolic or b.symbolic) and a.op not in _EQ_DECIDABLE_OPS and b.op not in _EQ_DECIDABLE_OPS:
+        # only the bit comparison of ne_simplifier() is left, and it only looks at the ops of `b`
+        if b.op not in SIMPLE_OPS or not a.length or a.length <= 1 or a.length != b.length:
+            return False
+        # (annotations may keep the result of the simplification from being used)
+        if not a.annotations and not b.annotations:
+            return _low_bits_differ(a, b)
+    return ast.all_operations.is_true(a != b)
+
+def _low_concrete_bits(e):
+    """
+    Returns the value and the number of the low bits of `e` that extracting would yield concrete ASTs for, up to the
+    first one that would be symbolic, or None if that can't be told without extracting them.
+    """
+    op = e.op
+    if op == 'BVV':
+        return None if e.args[0] is None else (e.args[0], e.length)
+    if not e.symbolic or e.annotations:
+        return None
+
+    if op == 'Concat':
+        value = 0
+        count = 0
+        for arg in reversed(e.args):
+            k = _low_concrete_bits(arg)
+            if k is None:
+                return None
+            value |= (k[0] & ((1 << k[1]) - 1)) << count
+            count += k[1]
+            if k[1] < arg.length:
+                break
+        return value, count
+    if op == 'ZeroExt':
+        inner = e.args[1]
+        k = _low_concrete_bits(inner)
+        if k is None or k[1] < inner.length:
+            return k
+        return k[0], e.length
+    if op in _BIT_OPAQUE_OPS:
+        return None
+    # extract_simplifier() leaves the bits of anything else as symbolic Extracts
+    return 0, 0
+
+# the ops on which extract_simplifier() may do something else than building a symbolic Extract
+_BIT_OPAQUE_OPS = frozenset(('Reverse', 'Extract')) | frozenset(extract_distributable)
+
+def _low_bits_differ(a, b):
+    """
+    Whether a bit of `a` and `b` that is concrete in both, below the first bit that is symbolic in either of them,
+    differs between them.
+    """
+    ka = _low_concrete_bits(a)
+    kb = _low_concrete_bits(b) if ka is not None else None
+    if kb is not None:
+        return bool((ka[0] ^ kb[0]) & ((1 << min(ka[1], kb[1])) - 1))
+
+    for i in range(a.length):
+        a_bit = a[i:i]
+        if a_bit.symbolic:
+            break
+
+        b_bit = b[i:i]
+        if b_bit.symbolic:
+            break
+
+        if ast.all_operations.is_false(a_bit == b_bit):
+            return True
+    return False
+
 from .backend_manager import backends
 from . import ast
+from .ast.variable_set import EMPTY_VARIABLES
 from . import fp
+from . import operations
+from .ast import traversal
 
 
 # the actual instance
@@ -127,11 +127,18 @@ class SolverComposite(
     frontend_mixins.CompositedCacheMixin,
     frontends.CompositeFrontend
 ):
-    def __init__(self, template_solver=None, track=False, template_solver_string=None, **kwargs):
-        template_solver = SolverCompositeChild(track=track) if template_solver is None else template_solver
+    def __init__(self, template_solver=None, track=False, template_solver_string=None, parallel=None, **kwargs):
+        if template_solver is None:
+            # with processes, the children solve in the worker processes of the checker
+            if parallel is not None and parallel.backend is not None:
+                template_solver = SolverCompositeChild(track=track, backend=parallel.backend)
+            else:
+                template_solver = SolverCompositeChild(track=track)
         template_solver_string = SolverCompositeChild(track=track, backend=backends.z3) if \
             template_solver_string is None else template_solver_string
-        super(SolverComposite, self).__init__(template_solver, template_solver_string, track=track, **kwargs)
+        super(SolverComposite, self).__init__(
+            template_solver, template_solver_string, track=track, parallel=parallel, **kwargs
+        )
 
     def __repr__(self):
         return "<SolverComposite %x, %d children>" % (id(self), len(self._solver_list))
@@ -0,0 +1,50 @@
+import claripy
+from claripy.backends import BackendZ3
+
+def _frontend(**kwargs):
+    backend = BackendZ3(assume_extra_constraints=True)
+    return backend, claripy.frontends.FullFrontend(backend, **kwargs)
+
+def test_assumed_extra_constraints():
+    x = claripy.BVS('x', 32)
+    backend, s = _frontend()
+    s.add([ claripy.ULT(x, 10) ])
+
+    for _ in range(2):
+        assert s.satisfiable(extra_constraints=(x == 5,))
+        assert not s.satisfiable(extra_constraints=(x == 50,))
+        assert not s.satisfiable(extra_constraints=(x == 5, x == 6))
+        assert s.satisfiable()
+
+    # the extra constraints weren't asserted, and every one of them got a single literal
+    solver = s._get_solver()
+    assert solver.num_scopes() == 0
+    assert len(backend._assumption_literals[solver]) == 3
+
+def test_assumptions_in_scopes():
+    x = claripy.BVS('x', 32)
+    backend, s = _frontend(share_solver=True)
+    s.add([ claripy.ULT(x, 10) ])
+    a = s.branch()
+    a.add([ x != 5 ])
+
+    # the literals defined in the scope of a branch are forgotten when the scope is popped
+    assert not a.satisfiable(extra_constraints=(x == 5,))
+    assert s.satisfiable(extra_constraints=(x == 5,))
+    assert not a.satisfiable(extra_constraints=(x == 5,))
+    assert s.satisfiable(extra_constraints=(x == 5,))
+
+def test_assumed_extra_constraints_eval():
+    x = claripy.BVS('x', 32)
+    _, s = _frontend()
+    s.add([ claripy.ULT(x, 10) ])
+
+    assert set(s.eval(x, 20, extra_constraints=(claripy.UGE(x, 7),))) == { 7, 8, 9 }
+    assert s.min(x, extra_constraints=(claripy.UGE(x, 3),)) == 3
+    assert s.max(x, extra_constraints=(claripy.ULE(x, 4),)) == 4
+    assert set(s.eval(x, 20)) == set(range(10))
+
+if __name__ == '__main__':
+    test_assumed_extra_constraints()
+    test_assumptions_in_scopes()
+    test_assumed_extra_constraints_eval()
@@ -0,0 +1,99 @@
+import gc
+
+import claripy
+from claripy.ast import compiler
+from claripy.frontend_mixins.model_cache_mixin import ModelCache
+
+def _concrete_eval(e, model):
+    return claripy.backends.concrete.eval(ModelCache(model)._replace_list([ e ])[0], 1)[0]
+
+def test_compile():
+    x = claripy.BVS('x', 32, explicit_name=True)
+    y = claripy.BVS('y', 32, explicit_name=True)
+    w = claripy.BVS('w', 96, explicit_name=True)
+    a = claripy.BoolS('a', explicit_name=True)
+    models = [ { 'x': 0, 'y': 1, 'w': 2**95, 'a': False }, { 'x': 0xffffffff, 'y': 31 }, { 'y': 40, 'w': 5 } ]
+    exprs = [
+        x + y * 3, x - y, -x, ~y, x >> y, x << y, claripy.LShR(x, y), claripy.SLT(x, y), claripy.ULT(x, y),
+        claripy.Concat(x[7:0], y[31:8]), claripy.SignExt(32, x[15:0]), claripy.ZeroExt(64, x) + w, w[95:64],
+        claripy.If(claripy.And(a, x == 0), x, y), claripy.Or(claripy.Not(a), x != y), x.reversed, w >> 1,
+    ]
+
+    for e in exprs:
+        f = claripy.ast.compile(e)
+        for m in models:
+            assert f(m) == _concrete_eval(e, m), (e, m)
+
+    # the compiled functions are cached
+    f = claripy.ast.compile(exprs[0])
+    assert claripy.ast.compile(exprs[0]) is f
+    compiler.clear_cache()
+    assert claripy.ast.compile(exprs[0]) is not f
+
+def test_compile_errors():
+    x = claripy.BVS('x', 32, explicit_name=True)
+    y = claripy.BVS('y', 32, explicit_name=True)
+
+    # the same errors as the concrete backend
+    f = claripy.ast.compile(y // x)
+    try:
+        f({ 'y': 3 })
+        assert False
+    except claripy.ClaripyZeroDivisionError:
+        pass
+    assert ModelCache({ 'y': 3 }).eval_constraints([ y // x == 1 ]) is False
+
+    # operations that aren't supported
+    try:
+        claripy.ast.compile(claripy.FPS('f', claripy.FSORT_DOUBLE) + 1.0)
+        assert False
+    except claripy.BackendError:
+        pass
+    assert ModelCache({ }).eval_ast(claripy.fpToIEEEBV(claripy.FPV(1.0, claripy.FSORT_FLOAT))) == 0x3f800000
+
+    # which are evaluated one after the other, up to the first one that doesn't hold
+    bits = claripy.fpToIEEEBV(claripy.FPS('g', claripy.FSORT_FLOAT, explicit_name=True))
+    m = ModelCache({ 'g': 1.0 })
+    first, second = bits == 0, bits[7:0] == 0
+    assert m.eval_constraints([ first, second ]) is False
+    assert first.cache_key in m.replacements and second.cache_key not in m.replacements
+    assert m.eval_constraints([ bits == 0x3f800000, second ]) is True
+
+    # and they are only tried once
+    fp = claripy.fpToIEEEBV(claripy.FPS('f', claripy.FSORT_FLOAT))
+    for _ in range(2):
+        try:
+            claripy.ast.compile(fp)
+            assert False
+        except claripy.BackendError:
+            pass
+    assert isinstance(compiler._cache[fp._hash][1], str)
+
+    # the cache doesn't keep the ASTs alive
+    key = fp._hash
+    del fp
+    gc.collect()
+    claripy.ast.compile(claripy.BVS('z', 32) + 1)
+    assert key not in compiler._cache
+
+def test_compile_wide():
+    # the long argument lists are lowered a chunk at a time
+    xs = [ claripy.BVS('x%d' % i, 32, explicit_name=True) for i in range(3000) ]
+    total = xs[0]
+    for x in xs[1:]:
+        total = total + x
+    assert total.op == '__add__' and len(total.args) == 3000
+    model = { 'x%d' % i: i for i in range(0, 3000, 7) }
+    assert claripy.ast.compile(total)(model) == sum(model.values()) & 0xffffffff
+    assert ModelCache(model).eval_ast(total) == sum(model.values()) & 0xffffffff
+
+    bs = [ claripy.BVS('b%d' % i, 8, explicit_name=True) for i in range(3000) ]
+    c = claripy.Concat(*bs)
+    model = { 'b0': 1, 'b2998': 2, 'b2999': 3 }
+    assert claripy.ast.compile(c)(model) == (1 << (8 * 2999)) | (2 << 8) | 3
+    assert ModelCache(model).eval_constraints([ c[15:0] == 0x203, c != 0 ])
+
+if __name__ == '__main__':
+    test_compile()
+    test_compile_errors()
+    test_compile_wide()
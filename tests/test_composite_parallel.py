@@ -0,0 +1,110 @@
+import threading
+import time
+
+import claripy
+from claripy.frontends import ParallelChecker
+
+def _hard_constraints():
+    # factoring the product of two 31-bit primes
+    x = claripy.BVS('x', 64)
+    y = claripy.BVS('y', 64)
+    return [
+        x * y == 2147483647 * 2147483629,
+        claripy.UGT(x, 1), claripy.UGT(y, 1), claripy.ULT(x, 2**32), claripy.ULT(y, 2**32),
+    ]
+
+def _wide(parallel):
+    s = claripy.SolverComposite(parallel=parallel)
+    vs = [ claripy.BVS('v%d' % i, 32) for i in range(8) ]
+    for i, v in enumerate(vs):
+        s.add([ claripy.ULT(v, i + 1), v * 3 != 1 ])
+    return s, vs
+
+def _check_interrupted(parallel):
+    s = claripy.SolverComposite(parallel=parallel)
+    w = claripy.BVS('w', 32)
+    s.add(_hard_constraints())
+    s.add(w * 2 == 1)
+
+    # the unsatisfiable child stops the check of the hard one
+    start = time.time()
+    assert not s.satisfiable()
+    assert s.check_satisfiability() == 'UNSAT'
+    assert time.time() - start < 10
+
+    # which doesn't take it for unsatisfiable
+    satnesses = { len(c.constraints): c._cached_satness for c in s._solver_list }
+    assert satnesses == { 1: False, 5: None }
+
+def test_parallel_composite():
+    parallel = ParallelChecker(threads=4)
+    try:
+        s, vs = _wide(parallel)
+        assert len(s._solver_list) == 8
+        assert s.satisfiable()
+        assert s.check_satisfiability() == 'SAT'
+        assert s.satisfiable(extra_constraints=(vs[2] == 2,))
+        assert not s.satisfiable(extra_constraints=(vs[2] == 3,))
+        assert s.check_satisfiability(extra_constraints=(vs[2] == 3,)) == 'UNSAT'
+
+        b = s.branch()
+        b.add(vs[5] == 4)
+        assert b.satisfiable()
+        assert b.eval(vs[5], 2) == (4,)
+        b.add(vs[6] == 7)
+        assert not b.satisfiable()
+        assert s.satisfiable()
+
+        _check_interrupted(parallel)
+    finally:
+        parallel.shutdown()
+
+def test_parallel_composite_order():
+    for order in ParallelChecker.ORDERS:
+        parallel = ParallelChecker(threads=2, order=order, min_children=1)
+        try:
+            s, vs = _wide(parallel)
+            assert s.satisfiable()
+            assert not s.satisfiable(extra_constraints=(vs[0] == 1,))
+        finally:
+            parallel.shutdown()
+
+    try:
+        ParallelChecker(order='random')
+        assert False
+    except ValueError:
+        pass
+
+def test_parallel_composite_processes():
+    parallel = ParallelChecker(processes=2)
+    try:
+        s, vs = _wide(parallel)
+        assert s.satisfiable()
+        assert sorted(s.eval(vs[3], 10)) == [ 0, 1, 2, 3 ]
+
+        _check_interrupted(parallel)
+        assert parallel.backend.pool.stats()['restarts'] == 1
+    finally:
+        parallel.shutdown()
+
+def test_solver_threads():
+    # every thread has a solver of its own, which catches up on the constraints that were added since it was used
+    x = claripy.BVS('x', 32)
+    s = claripy.frontends.FullFrontend(claripy.backends.z3)
+    s.add([ claripy.ULT(x, 10) ])
+    assert s.max(x) == 9
+    s.add([ claripy.ULT(x, 5) ])
+
+    results = [ ]
+    thread = threading.Thread(target=lambda: results.append(s.max(x)))
+    thread.start()
+    thread.join()
+    assert results == [ 4 ]
+    assert s.max(x) == 4
+    assert not s.satisfiable(extra_constraints=(x == 7,))
+
+if __name__ == '__main__':
+    test_parallel_composite()
+    test_parallel_composite_order()
+    test_parallel_composite_processes()
+    test_solver_threads()
@@ -26,6 +26,24 @@ def test_concrete_fp():
     f = claripy.FPV(1.0, claripy.FSORT_FLOAT)
     nose.tools.assert_equal(claripy.backends.concrete.eval(f, 2), (1.0,))
 
+def test_concrete_convert_wide_and_deep():
+    bc = claripy.backends.concrete
+    bytes_ = [ claripy.BVV(i, 8) for i in range(256) ] * 8
+
+    # built without the eager backends, so that they are converted by convert()
+    wide = claripy.ast.BV('Concat', tuple(bytes_), length=8 * len(bytes_), eager_backends=[ ])
+    assert bc.convert(wide) == int.from_bytes(bytes(range(256)) * 8, 'big')
+
+    deep = claripy.BVV(1, 32)
+    for i in range(20000):
+        deep = claripy.ast.BV('__add__', (deep, claripy.BVV(i, 32)), length=32, eager_backends=[ ])
+    assert bc.convert(deep) == (1 + sum(range(20000))) & 0xffffffff
+
+    # shared arguments are converted once
+    e = claripy.ast.BV('__sub__', (deep, deep), length=32, eager_backends=[ ])
+    assert bc.convert(e) == 0
+
 if __name__ == '__main__':
     test_concrete()
     test_concrete_fp()
+    test_concrete_convert_wide_and_deep()
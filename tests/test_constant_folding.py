@@ -0,0 +1,95 @@
+import random
+
+import claripy
+from claripy.ast.constant_folding import fold, folders
+
+def _backend(op, args):
+    b = claripy.backends.concrete
+    return b._abstract(b.call(op, args))
+
+def _bv_args(op, rng, size):
+    interesting = [ 0, 1, 2, size - 1, size, size + 1, (1 << (size - 1)) - 1, 1 << (size - 1), (1 << size) - 1 ]
+    value = lambda: rng.choice(interesting) if rng.random() < 0.5 else rng.getrandbits(size)
+    if op in ('Extract',):
+        high = rng.randrange(size)
+        return (high, rng.randrange(high + 1), claripy.BVV(value(), size))
+    if op in ('ZeroExt', 'SignExt'):
+        return (rng.randrange(1, 16), claripy.BVV(value(), size))
+    if op in ('__invert__', '__neg__', 'Reverse'):
+        return (claripy.BVV(value(), size),)
+    if op in ('__add__', '__mul__', '__xor__', 'Concat'):
+        return tuple(claripy.BVV(value(), size) for _ in range(rng.randrange(2, 4)))
+    return (claripy.BVV(value(), size), claripy.BVV(value(), size))
+
+def test_bv_folding():
+    rng = random.Random(0)
+    bool_ops = { 'And', 'Or', 'Not' }
+    for op in folders:
+        if op.startswith('fp') or op in bool_ops:
+            continue
+        for size in (8, 12, 32, 64):
+            for _ in range(50):
+                args = _bv_args(op, rng, size)
+                folded = fold(op, args)
+                if folded is None:
+                    # the cases the concrete backend rejects are left to it
+                    try:
+                        _backend(op, args)
+                    except (claripy.ClaripyError, ValueError):
+                        continue
+                    assert op in ('__lshift__', '__rshift__'), (op, args)
+                else:
+                    assert folded is _backend(op, args), (op, args)
+
+def test_bool_and_fp_folding():
+    t, f = claripy.true, claripy.false
+    for args in ((t, t), (t, f), (f, t), (f, f), (t, f, t)):
+        for op in ('And', 'Or'):
+            assert fold(op, args) is _backend(op, args)
+        if len(args) == 2:
+            for op in ('__eq__', '__ne__'):
+                assert fold(op, args) is _backend(op, args)
+    assert fold('Not', (t,)) is f
+
+    rm = claripy.fp.RM.default()
+    values = [ claripy.FPV(v, claripy.FSORT_DOUBLE) for v in (0.0, -0.0, 1.5, -2.25, float('inf'), float('nan')) ]
+    for a in values:
+        for op in ('fpNeg', 'fpAbs'):
+            assert repr(fold(op, (a,))) == repr(_backend(op, (a,)))
+        for b in values:
+            for op in ('fpEQ', 'fpLT', 'fpLEQ', 'fpGT', 'fpGEQ'):
+                assert fold(op, (a, b)) is _backend(op, (a, b))
+            for op in ('fpAdd', 'fpSub', 'fpMul'):
+                assert repr(fold(op, (rm, a, b))) == repr(_backend(op, (rm, a, b)))
+
+def test_construction():
+    x = claripy.BVS('x', 32)
+    a = claripy.BVV(0x1000, 32)
+    b = claripy.BVV(0x24, 32)
+
+    assert (a + b * 4).op == 'BVV'
+    assert (a + b * 4).args == (0x1090, 32)
+    assert (a + x).symbolic
+
+    # unfoldable cases go through the eager backends as before
+    try:
+        a // claripy.BVV(0, 32)
+        assert False
+    except claripy.ClaripyZeroDivisionError:
+        pass
+
+    # annotated leaves are not folded here, so that their annotations are handled by the backends
+    class A(claripy.Annotation):
+        @property
+        def eliminatable(self):
+            return True
+        @property
+        def relocatable(self):
+            return False
+    assert fold('__add__', (a.annotate(A()), b)) is None
+    assert (a.annotate(A()) + b).args == (0x1024, 32)
+
+if __name__ == '__main__':
+    test_bv_folding()
+    test_bool_and_fp_folding()
+    test_construction()
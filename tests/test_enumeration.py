@@ -0,0 +1,66 @@
+import claripy
+from claripy.backends import BackendZ3
+from claripy.backends import backend_z3
+
+def _frontend():
+    backend = BackendZ3()
+    return backend, claripy.frontends.FullFrontend(backend)
+
+def test_projected_enumeration():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 8)
+    c = claripy.BoolS('c')
+    _, s = _frontend()
+    s.add([ claripy.ULT(x, 10), claripy.ULT(y, 3), claripy.Or(c, x == 3) ])
+
+    assert sorted(s.eval(x, 100)) == list(range(10))
+    assert len(s.eval(x, 4)) == 4
+
+    solutions = s.batch_eval([ x + 1, y, c, claripy.BVV(7, 16) ], 100)
+    assert sorted(solutions) == sorted(
+        (a + 1, b, v, 7) for a in range(10) for b in range(3) for v in (False, True) if v or a == 3
+    )
+
+    assert s.batch_eval([ claripy.BVV(7, 16) ], 100) == [ (7,) ]
+
+def test_cube_enumeration():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    _, s = _frontend()
+    s.add([ claripy.ULT(x, 10) ])
+
+    # the bits of y are free: every model brings a whole cube of solutions
+    count = backend_z3.solve_count
+    values = s.eval(claripy.Concat(x[3:0], y[7:0]), 10000)
+    assert sorted(values) == [ a << 8 | b for a in range(10) for b in range(256) ]
+    assert backend_z3.solve_count - count <= 20
+
+    values = s.eval(y & 0xf0, 100)
+    assert sorted(values) == list(range(0, 0x100, 0x10))
+
+    # bits that depend on each other are only enumerated point by point
+    values = s.eval(y[3:0] ^ y[7:4], 100)
+    assert sorted(values) == list(range(16))
+
+def test_enumeration_stream():
+    x = claripy.BVS('x', 32)
+    backend, s = _frontend()
+    s.add([ claripy.ULT(x, 10) ])
+    solver = s._get_solver()
+
+    g = backend.batch_eval_iter([ x ], 100, extra_constraints=(x != 0,), solver=solver)
+    first = [ next(g), next(g) ]
+    assert all(0 < v[0] < 10 for v in first)
+    assert solver.num_scopes() > 0
+    g.close()
+    assert solver.num_scopes() == 0
+
+    assert sorted(backend.batch_eval_iter([ x ], 100, extra_constraints=(x != 0,), solver=solver)) == [
+        (v,) for v in range(1, 10)
+    ]
+    assert len(s.eval(x, 100)) == 10
+
+if __name__ == '__main__':
+    test_projected_enumeration()
+    test_cube_enumeration()
+    test_enumeration_stream()
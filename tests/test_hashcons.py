@@ -0,0 +1,230 @@
+import copy
+import gc
+import os
+import pickle
+import subprocess
+import sys
+
+import claripy
+import nose
+
+from claripy.ast.base import Base, _hash_collisions
+
+def test_hash_identity():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+
+    nose.tools.assert_is(x + y, x + y)
+    nose.tools.assert_is_not(x + y, y + x)
+    nose.tools.assert_is(claripy.BVV(2**100, 128), claripy.BVV(2**100, 128))
+    nose.tools.assert_is_not(claripy.BVV(1, 32), claripy.BVV(1, 64))
+
+    # the builtin hash() maps -1 and -2 to the same value
+    a = claripy.BVS('a', 32, min=-1, explicit_name=True)
+    b = claripy.BVS('a', 32, min=-2, explicit_name=True)
+    nose.tools.assert_is_not(a, b)
+
+def test_signed_zero():
+    # 0.0 == -0.0, and they hash the same
+    n = claripy.FPV(-0.0, claripy.FSORT_DOUBLE)
+    p = claripy.FPV(0.0, claripy.FSORT_DOUBLE)
+    nose.tools.assert_is_not(n, p)
+    nose.tools.assert_equal(str(p.args[0]), '0.0')
+    nose.tools.assert_equal(claripy.backends.concrete.eval(1.0 / p, 1), (float('inf'),))
+    nose.tools.assert_equal(claripy.backends.concrete.eval(1.0 / n, 1), (float('-inf'),))
+
+    # the folded operations keep the sign
+    nose.tools.assert_is(-p, n)
+    nose.tools.assert_is(n + n, n)
+    nose.tools.assert_is(claripy.FPV(float('nan'), claripy.FSORT_DOUBLE), claripy.FPV(float('nan'), claripy.FSORT_DOUBLE))
+
+def test_hash_collision():
+    old_calc_hash = Base._calc_hash
+    Base._calc_hash = staticmethod(lambda op, args, keywords: 0x1337)
+    try:
+        x = claripy.BVS('collision_x', 32)
+        y = claripy.BVS('collision_y', 32)
+        z = claripy.BVS('collision_z', 32)
+        nose.tools.assert_is_not(x, y)
+        nose.tools.assert_is_not(y, z)
+        nose.tools.assert_equal(len({ hash(x), hash(y), hash(z) }), 3)
+        nose.tools.assert_greater_equal(_hash_collisions[0x1337], 2)
+
+        # ASTs further down the probe chain are still found after the head of the chain goes away
+        y_args = y.args
+        del x
+        nose.tools.assert_is(claripy.BVS(y_args[0], 32, explicit_name=True), y)
+        nose.tools.assert_is(z + y, z + y)
+    finally:
+        Base._calc_hash = old_calc_hash
+
+def test_pickle_identity():
+    x = claripy.BVS('pickle_x', 32)
+    e = x + 5
+    nose.tools.assert_is(pickle.loads(pickle.dumps(e)), e)
+
+    # the slot that an AST had may hold another one when it is loaded: hash(-1) == hash(-2)
+    data = pickle.dumps(claripy.BVS('c', 32, min=-2, explicit_name=True))
+    gc.collect()
+    a = claripy.BVS('c', 32, min=-1, explicit_name=True)
+    b = pickle.loads(data)
+    nose.tools.assert_is_not(b, a)
+    nose.tools.assert_is(b, claripy.BVS('c', 32, min=-2, explicit_name=True))
+
+    # the hashes of another process are salted differently
+    code = "import pickle, sys, claripy; sys.stdout.buffer.write(pickle.dumps(claripy.BVS('f', 32) + 5))"
+    env = dict(os.environ, PYTHONHASHSEED='1337')
+    f = pickle.loads(subprocess.check_output([ sys.executable, '-c', code ], env=env))
+    nose.tools.assert_is(f.args[1], claripy.BVV(5, 32))
+    nose.tools.assert_is(f, f.args[0] + 5)
+
+def test_pickle_annotated():
+    # the unpickled annotations are the live ones, so that the ASTs are found by hash-consing
+    x = claripy.BVS('annotated_x', 32).annotate(claripy.SimplificationAvoidanceAnnotation())
+    e = x + 1
+    nose.tools.assert_is(pickle.loads(pickle.dumps(e)), e)
+    nose.tools.assert_is(copy.deepcopy(e), e)
+
+    # in another process, they are new ones
+    code = (
+        "import pickle, sys, claripy; "
+        "sys.stdout.buffer.write(pickle.dumps(claripy.BVS('y', 32).annotate(claripy.SimplificationAvoidanceAnnotation())))"
+    )
+    y = pickle.loads(subprocess.check_output([ sys.executable, '-c', code ]))
+    nose.tools.assert_equal(y.op, 'BVS')
+    nose.tools.assert_equal(len(y.annotations), 1)
+    nose.tools.assert_is_instance(y.annotations[0], claripy.SimplificationAvoidanceAnnotation)
+
+def test_hash_mode():
+    nose.tools.assert_raises(claripy.ClaripyValueError, claripy.set_hash_mode, 'sha3')
+
+def test_intern_stats():
+    before = claripy.intern_stats()
+    x = claripy.BVS('stats_x', 32)
+    y = x + 1
+    z = x + 1
+    after = claripy.intern_stats(by_class=True, by_op=True)
+
+    nose.tools.assert_is(y, z)
+    nose.tools.assert_greater(after['hits'], before['hits'])
+    nose.tools.assert_greater(after['inserts'], before['inserts'])
+    nose.tools.assert_greater_equal(after['by_class']['BV'], 2)
+    nose.tools.assert_greater_equal(after['by_op']['BVS'], 1)
+    nose.tools.assert_greater_equal(after['by_op']['__add__'], 1)
+
+def test_intern_generations():
+    table = Base._hash_cache
+    try:
+        claripy.set_intern_generations(2)
+        x = claripy.BVS('generational_x', 32)
+        h = x._hash
+        del x
+        gc.collect()
+        nose.tools.assert_in(h, table)
+
+        # the AST is still alive one generation later...
+        claripy.advance_intern_generation()
+        gc.collect()
+        nose.tools.assert_in(h, table)
+
+        # ...and looking it up keeps it around longer
+        nose.tools.assert_is_not(table.get(h), None)
+        claripy.advance_intern_generation()
+        claripy.advance_intern_generation()
+        gc.collect()
+        nose.tools.assert_not_in(h, table)
+
+        y = claripy.BVS('generational_y', 32)
+        h = y._hash
+        del y
+        claripy.downsize()
+        gc.collect()
+        nose.tools.assert_not_in(h, table)
+    finally:
+        claripy.set_intern_generations(None)
+
+    nose.tools.assert_equal(table.stats()['pinned'], 0)
+
+def test_variable_sets():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    z = claripy.BVS('z', 32)
+
+    xy = (x + y).variables
+    nose.tools.assert_is(xy, (y * x).variables)
+    nose.tools.assert_is(xy, pickle.loads(pickle.dumps(xy)))
+    nose.tools.assert_equal(xy, { x.args[0], y.args[0] })
+    nose.tools.assert_equal(xy | { 'w' }, { x.args[0], y.args[0], 'w' })
+    nose.tools.assert_is(xy | x.variables, xy)
+    nose.tools.assert_is(xy & x.variables, x.variables)
+    nose.tools.assert_true(xy >= x.variables)
+    nose.tools.assert_true(xy.isdisjoint(z.variables))
+    nose.tools.assert_false(xy.isdisjoint((x + z).variables))
+    nose.tools.assert_equal(len(xy - x.variables), 1)
+    nose.tools.assert_equal(claripy.BVV(1, 32).variables, frozenset())
+
+def test_reclaim_variable_ids():
+    from claripy.ast import variable_set
+    from claripy.ast.variable_set import reclaim_variable_ids, variable_id
+
+    x = claripy.BVS('reclaim_x', 32)
+    y = claripy.BVS('reclaim_y', 32)
+    s = claripy.Solver()
+    s.add(y > 3)
+    dead = variable_id(next(iter(x.variables)))
+    del x
+    gc.collect()
+
+    nose.tools.assert_greater_equal(reclaim_variable_ids(), 1)
+    nose.tools.assert_is(variable_set._variable_names[dead], None)
+    # the smallest free id is reused
+    z = claripy.BVS('reclaim_z', 32)
+    nose.tools.assert_less_equal(variable_id(next(iter(z.variables))), dead)
+    nose.tools.assert_equal(z.variables, { next(iter(z.variables)) })
+
+    # the ids of the variables of a live solver are kept
+    nose.tools.assert_false(s._variables_mask & z.variables.mask)
+    nose.tools.assert_equal((y + z).variables, { next(iter(y.variables)), next(iter(z.variables)) })
+
+def test_split_constraints():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    z = claripy.BVS('z', 32)
+    w = claripy.BVS('w', 32)
+
+    split = claripy.frontend.Frontend._split_constraints([ x > 1, z == w, y < x, claripy.BVV(1, 32) == 1 ])
+    groups = sorted((sorted(names), [ c.op for c in cs ]) for names, cs in split)
+    nose.tools.assert_equal(groups, [
+        (['CONCRETE'], ['BoolV']),
+        (sorted([ w.args[0], z.args[0] ]), ['__eq__']),
+        (sorted([ x.args[0], y.args[0] ]), ['__gt__', '__lt__']),
+    ])
+
+def test_node_layout():
+    x = claripy.BVS('x', 32)
+    e = (x + 1) * 3
+
+    # no per-instance dicts, and no per-instance allocations for the common empty sets
+    for a in (x, e, e == 1, claripy.FPV(1.0, claripy.FSORT_DOUBLE), claripy.StringV('abc')):
+        nose.tools.assert_false(hasattr(a, '__dict__'))
+    nose.tools.assert_is(x._errored, e._errored)
+    nose.tools.assert_is(x._uneliminatable_annotations, e._uneliminatable_annotations)
+
+    # cache keys are created on demand, and stay the same afterwards
+    nose.tools.assert_is(e.cache_key, e.cache_key)
+    nose.tools.assert_is(e.cache_key.ast, e)
+    nose.tools.assert_equal({ e.cache_key: 1 }[(e + 0).cache_key], 1)
+
+if __name__ == '__main__':
+    test_hash_identity()
+    test_signed_zero()
+    test_hash_collision()
+    test_pickle_identity()
+    test_pickle_annotated()
+    test_hash_mode()
+    test_intern_stats()
+    test_intern_generations()
+    test_variable_sets()
+    test_reclaim_variable_ids()
+    test_split_constraints()
+    test_node_layout()
@@ -0,0 +1,49 @@
+import claripy
+
+def test_incremental_simplify():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    s = claripy.Solver()
+
+    s.add([ x == 5, y != 3 ])
+    prefix = list(s.simplify())
+    assert len(prefix) == 2
+
+    # only the new constraints are simplified, with x pinned by the old ones
+    before = claripy.simplification_cache_stats()['by_kind'].get('z3', { 'misses': 0 })['misses']
+    s.add([ x + y == 7 ])
+    constraints = s.simplify()
+    assert all(a is b for a, b in zip(constraints, prefix))
+    assert len(constraints) == 3
+    assert constraints[2].variables == y.variables
+    assert claripy.simplification_cache_stats()['by_kind']['z3']['misses'] == before + 1
+    assert s.eval(y, 2) == (2,)
+
+    # nothing new, nothing to do
+    assert s.simplify() is s.constraints
+    assert claripy.simplification_cache_stats()['by_kind']['z3']['misses'] == before + 1
+
+    # branches carry the watermark along
+    b = s.branch()
+    b.add([ y != 2 ])
+    assert all(a is b for a, b in zip(b.simplify(), constraints))
+    assert not b.satisfiable()
+    assert s.satisfiable()
+
+def test_simplify_skipping():
+    # the frontends skip simplify() until constraints are added
+    x = claripy.BVS('x', 32)
+    for cls in (claripy.Solver, claripy.SolverHybrid, claripy.SolverComposite):
+        s = cls()
+        s.add([ x == 5, x + 1 > 2 ])
+        assert not s._simplified
+        s.simplify()
+        assert s._simplified
+        s.add([ x != 3 ])
+        assert not s._simplified
+        s.simplify()
+        assert s._simplified
+
+if __name__ == '__main__':
+    test_incremental_simplify()
+    test_simplify_skipping()
@@ -0,0 +1,85 @@
+import claripy
+from claripy.backends import BackendZ3, BackendConcrete, BackendVSA
+from claripy.backends import backend_z3
+from claripy.frontends import full_frontend
+
+def _frontend(**kwargs):
+    backend = BackendZ3(**kwargs)
+    return backend, claripy.frontends.FullFrontend(backend)
+
+def _check_min_max(**kwargs):
+    x = claripy.BVS('x', 32)
+    backend, s = _frontend(**kwargs)
+    s.add([ claripy.UGT(x, 1000), claripy.ULT(x, 0x80000010), x != 1001 ])
+
+    assert s.min(x) == 1000 + 2
+    assert s.max(x) == 0x8000000f
+    assert s.min(x, signed=True) == -0x80000000
+    assert s.max(x, signed=True) == 0x7fffffff
+    assert s.min(x, extra_constraints=(claripy.ULT(x, 0x80000000),), signed=True) == 1002
+    assert s.max(x, extra_constraints=(claripy.UGE(x, 0x80000000),), signed=True) == -0x80000000 + 0xf
+
+    y = claripy.BVS('y', 8)
+    s.add([ claripy.SLT(y, -3) ])
+    assert s.min(y, signed=True) == -128
+    assert s.max(y, signed=True) == -4
+    assert s.min(y) == 0x80
+    assert s.max(y) == 0xfc
+
+def test_min_max():
+    _check_min_max()
+
+def test_min_max_optimize():
+    _check_min_max(optimize_min_max=True)
+
+def test_min_max_seeds():
+    x = claripy.BVS('x', 64)
+    backend, s = _frontend()
+    s.add([ claripy.UGE(x, 0x1000), claripy.ULE(x, 0x2000), x & 7 == 0 ])
+    solver = s._get_solver()
+
+    # starting from a known value, and from bounds on the values
+    assert backend.min(x, solver=solver, candidates=(0x1800,)) == 0x1000
+    assert backend.max(x, solver=solver, candidates=(0x1800, 0x1008)) == 0x2000
+    assert backend.min(x, solver=solver, bounds=(0x1000, 0x2000)) == 0x1000
+    assert backend.max(x, solver=solver, bounds=(0x1000, 0x2000), candidates=(0x2000,)) == 0x2000
+
+    # a known extremum only takes one check to confirm
+    count = backend_z3.solve_count
+    assert backend.min(x, solver=solver, candidates=(0x1000,)) == 0x1000
+    assert backend_z3.solve_count == count + 1
+
+    # the value-set analysis bounds the values of masked expressions
+    masked = x & 0xff0
+    assert s._value_bounds(masked, False) == (0, 0xff0)
+    assert s.min(masked) == 0
+    assert s.max(masked) == 0xff0
+
+    # and the expressions that it doesn't bound are only converted once
+    shifted = x + 0x10
+    assert s._value_bounds(shifted, False) is None
+    assert shifted.cache_key in full_frontend._unbounded
+    convert = claripy.backends.vsa.convert
+    claripy.backends.vsa.convert = None
+    try:
+        assert s._value_bounds(shifted, True) is None
+    finally:
+        claripy.backends.vsa.convert = convert
+
+def test_signed_min_max_other_backends():
+    concrete = BackendConcrete()
+    assert concrete.min(claripy.BVV(-5, 32), signed=True) == -5
+    assert concrete.max(claripy.BVV(-5, 32)) == 0xfffffffb
+
+    vsa = BackendVSA()
+    si = claripy.SI(bits=8, stride=1, lower_bound=-4, upper_bound=3)
+    assert vsa.min(si, signed=True) == -4
+    assert vsa.max(si, signed=True) == 3
+    assert vsa.min(si) == 0
+    assert vsa.max(si) == 0xff
+
+if __name__ == '__main__':
+    test_min_max()
+    test_min_max_optimize()
+    test_min_max_seeds()
+    test_signed_min_max_other_backends()
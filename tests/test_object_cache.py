@@ -0,0 +1,57 @@
+import threading
+
+import claripy
+from claripy.backends.object_cache import SharedObjectCache
+
+def _unfolded(n):
+    # built without the eager backends, so that they are converted by convert()
+    e = claripy.BVV(1, 32)
+    for i in range(n):
+        e = claripy.ast.BV('__add__', (e, claripy.BVV(i, 32)), length=32, eager_backends=[ ])
+    return e
+
+def test_shared_object_cache():
+    cache = SharedObjectCache(maxsize=8, stripes=4)
+    xs = [ claripy.BVS('x', 32) for _ in range(16) ]
+    for i, x in enumerate(xs):
+        cache[x._cache_key] = i
+    assert len(cache) <= 8
+    assert cache.get(xs[-1]._cache_key) == 15
+    assert cache.get(claripy.BVS('y', 32)._cache_key) is None
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['evictions'] == 16 - len(cache)
+    cache.clear()
+    assert len(cache) == 0
+
+def test_backend_shared_object_cache():
+    bc = claripy.backends.concrete
+    e = _unfolded(50)
+    expected = bc.convert(e)
+
+    bc.enable_shared_object_cache(maxsize=1000)
+    try:
+        results = [ ]
+        threads = [ threading.Thread(target=lambda: results.append(bc.convert(e))) for _ in range(4) ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [ expected ] * 4
+
+        # the other threads reused the objects converted by the first one
+        stats = bc.object_cache_stats()
+        assert stats['hits'] >= 3 and stats['size'] > 0
+    finally:
+        bc.disable_shared_object_cache()
+    assert bc.object_cache_stats() is None
+
+    # Z3 objects belong to the context of their thread
+    try:
+        claripy.backends.z3.enable_shared_object_cache()
+        assert False
+    except claripy.BackendError:
+        pass
+
+if __name__ == '__main__':
+    test_shared_object_cache()
+    test_backend_shared_object_cache()
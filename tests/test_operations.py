@@ -0,0 +1,44 @@
+import claripy
+
+def test_coercion():
+    x = claripy.BVS('x', 32)
+
+    # no coercion needed
+    assert (x + x).args == (x, x)
+    # coerced arguments
+    assert (x + 1).args == (x, claripy.BVV(1, 32))
+    assert (1 - x).args == (claripy.BVV(1, 32), x)
+    # implicit rounding mode
+    a = claripy.FPV(1.5, claripy.FSORT_DOUBLE)
+    assert claripy.fpAdd(a, a) is claripy.fpAdd(claripy.fp.RM.default(), a, a)
+    # unsupported arguments
+    assert x.__add__(object()) is NotImplemented
+    try:
+        claripy.Extract(7, x)
+        assert False
+    except claripy.ClaripyTypeError:
+        pass
+
+def test_op_profiling():
+    x = claripy.BVS('x', 32)
+    assert claripy.op_stats() == { }
+
+    claripy.set_op_profiling(True)
+    try:
+        _ = x + x
+        _ = x + 2
+        _ = claripy.Concat(x, x)
+        stats = claripy.op_stats()
+    finally:
+        claripy.set_op_profiling(False)
+
+    assert stats['__add__']['calls'] == 2
+    assert stats['__add__']['coerced'] == 1
+    assert stats['Concat']['calls'] == 1
+    assert stats['Concat']['coerced'] == 0
+    assert stats['__add__']['time'] > 0
+    assert claripy.op_stats() == { }
+
+if __name__ == '__main__':
+    test_coercion()
+    test_op_profiling()
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import claripy
+from claripy.backends import BackendZ3Parallel
+
+def _hard_constraints():
+    # factoring the product of two 31-bit primes
+    x = claripy.BVS('x', 64)
+    y = claripy.BVS('y', 64)
+    return [
+        x * y == 2147483647 * 2147483629,
+        claripy.UGT(x, 1), claripy.UGT(y, 1), claripy.ULT(x, 2**32), claripy.ULT(y, 2**32),
+    ]
+
+def test_parallel_frontend():
+    backend = BackendZ3Parallel(processes=2)
+    try:
+        x = claripy.BVS('x', 32)
+        y = claripy.BVS('y', 32)
+        s = claripy.frontends.FullFrontend(backend)
+        s.add([ claripy.ULT(x, 10), y == x + 1 ])
+
+        assert s.satisfiable()
+        assert not s.satisfiable(extra_constraints=(x == 20,))
+        assert sorted(s.eval(x, 100)) == list(range(10))
+        assert sorted(s.batch_eval([ x, y ], 100)) == [ (i, i + 1) for i in range(10) ]
+        assert s.min(y) == 1
+        assert s.max(y) == 10
+        assert s.max(x - 5, signed=True) == 4
+        assert s.solution(x, 3)
+        assert not s.solution(x, 11)
+
+        # branches only send the constraints that the workers don't have
+        b = s.branch()
+        b.add([ x != 3 ])
+        assert len(b.eval(x, 100)) == 9
+        stats = backend.pool.stats()
+        assert stats['sent'] == 3
+        assert stats['restarts'] == 0
+
+        t = claripy.frontends.FullFrontend(backend, track=True)
+        t.add([ x == 1, y == 2, x == 3 ])
+        assert not t.satisfiable()
+        assert set(c.cache_key for c in t.unsat_core()) == { (x == 1).cache_key, (x == 3).cache_key }
+    finally:
+        backend.shutdown()
+
+def test_parallel_submit():
+    backend = BackendZ3Parallel(processes=2, batch_size=4)
+    try:
+        x = claripy.BVS('x', 32)
+        solvers = [ ]
+        for i in range(16):
+            s = backend.solver()
+            backend.add(s, [ claripy.UGE(x, i), claripy.ULT(x, i + 3) ])
+            solvers.append(s)
+
+        requests = [ backend.submit('batch_eval', s, exprs=(x,), n=10) for s in solvers ]
+        assert [ sorted(r.result()) for r in requests ] == [ [ (i,), (i + 1,), (i + 2,) ] for i in range(16) ]
+        assert backend.pool.stats()['batches'] < 16
+
+        # the solves of different threads run at once
+        results = [ None ] * len(solvers)
+        def solve(i):
+            results[i] = backend.min(x, solver=solvers[i])
+        threads = [ threading.Thread(target=solve, args=(i,)) for i in range(len(solvers)) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == list(range(16))
+    finally:
+        backend.shutdown()
+
+def test_parallel_cancel_and_timeout():
+    backend = BackendZ3Parallel(processes=1)
+    try:
+        s = backend.solver()
+        backend.add(s, _hard_constraints())
+        x = claripy.BVS('x', 32)
+        easy = backend.solver()
+        backend.add(easy, [ x == 5 ])
+
+        # a running solve is interrupted, and the request queued behind it is solved by the new worker
+        hard = backend.submit('satisfiable', s)
+        queued = backend.submit('satisfiable', easy)
+        while not hard.running():
+            time.sleep(0.01)
+        assert hard.cancel()
+        try:
+            hard.result()
+            assert False
+        except claripy.ClaripySolverInterruptError:
+            pass
+        assert queued.result()
+        assert backend.pool.stats()['restarts'] == 1
+
+        # Z3 gives up when the solve times out
+        start = time.time()
+        timed = backend.solver(timeout=200)
+        backend.add(timed, _hard_constraints())
+        assert not backend.satisfiable(solver=timed)
+        assert time.time() - start < 10
+        assert backend.eval(x, 2, solver=easy) == [ 5 ]
+    finally:
+        backend.shutdown()
+
+    try:
+        backend.satisfiable(solver=easy)
+        assert False
+    except claripy.BackendError:
+        pass
+
+if __name__ == '__main__':
+    test_parallel_frontend()
+    test_parallel_submit()
+    test_parallel_cancel_and_timeout()
@@ -0,0 +1,70 @@
+import claripy
+from claripy.simplifications import SimplificationManager, simpleton, _must_be_eq, _must_be_ne
+
+def test_rule_index():
+    x = claripy.BVS('x', 32)
+    a = claripy.BoolS('a')
+
+    # only the rules whose argument ops match are candidates
+    names = [ r.name for r in simpleton.rules_for('Not', (x == 1,)) ]
+    assert names == [ 'not_eq' ]
+    names = [ r.name for r in simpleton.rules_for('Reverse', (x,)) ]
+    assert names == [ 'reverse_byte_simplifier' ]
+    names = [ r.name for r in simpleton.rules_for('Reverse', (x.reversed,)) ]
+    assert names == [ 'reverse_reverse_simplifier', 'reverse_byte_simplifier' ]
+    assert simpleton.rules_for('BVS', ('x', 32)) == ()
+
+    before = claripy.rule_stats()['not_not_simplifier']
+    assert claripy.Not(claripy.Not(a)) is a
+    after = claripy.rule_stats()['not_not_simplifier']
+    assert after['hits'] == before['hits'] + 1
+
+def test_custom_rules():
+    m = SimplificationManager()
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+
+    # x - (x - y) ==> y
+    rule = m.add_rule('__sub__', lambda a, b: b.args[1] if b.args[0] is a else None, (None, '__sub__'),
+                      name='sub_sub')
+    assert rule in m.rules_for('__sub__', (x, x - y))
+    assert rule not in m.rules_for('__sub__', (x, y))
+    assert m.simplify('__sub__', (x, x - y)) is y
+    assert m.rule_stats()['sub_sub'] == { 'tries': 1, 'hits': 1 }
+
+def test_rewrite():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+
+    # built without simplification, so nothing is rewritten yet
+    inner = x.make_like('Reverse', (x.make_like('Reverse', (x,), length=32),), length=32)
+    e = x.make_like('__add__', (inner, y.make_like('__xor__', (y, y), length=32)), length=32)
+    assert e.args[0].op == 'Reverse'
+
+    r = simpleton.rewrite(e)
+    assert r is x
+
+    # the normal forms are remembered
+    s = x + y
+    assert simpleton.rewrite(s) is s
+    assert simpleton._normal.get(s._hash) is s
+
+def test_predicates():
+    c = claripy.BVS('c', 8)
+    x = claripy.BVS('x', 32)
+    a = claripy.BoolS('a')
+    exprs = [ x, claripy.BVV(7, 32), claripy.BVV(0x700, 32), claripy.Concat(c, claripy.BVV(3, 24)),
+              claripy.Concat(claripy.BVV(1, 24), c), claripy.ZeroExt(24, c), claripy.SignExt(24, c), x.reversed,
+              claripy.If(a, claripy.BVV(7, 32), claripy.BVV(1, 32)), claripy.Concat(c, c, c, claripy.BVV(9, 8)) ]
+
+    # the predicates answer what the ASTs they avoid building would
+    for p in exprs:
+        for q in exprs:
+            assert _must_be_eq(p, q) == (p is q or (p == q).is_true())
+            assert _must_be_ne(p, q) == claripy.is_true(p != q)
+
+if __name__ == '__main__':
+    test_rule_index()
+    test_custom_rules()
+    test_rewrite()
+    test_predicates()
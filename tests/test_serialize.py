@@ -0,0 +1,67 @@
+import gc
+import io
+import pickle
+
+import nose
+
+import claripy
+from claripy.ast import serialize
+
+def _asts():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 64)
+    f = claripy.FPS('f', claripy.FSORT_DOUBLE)
+    s = claripy.StringS('s', 8)
+    shared = (x + 1) * (x - 2)
+    return [
+        shared,
+        claripy.If(shared == 3, claripy.ZeroExt(32, shared) + y, -y),
+        f + claripy.FPV(1.5, claripy.FSORT_DOUBLE),
+        claripy.StrConcat(s, claripy.StringV('ab')),
+        claripy.And(claripy.BoolS('b'), claripy.Not(claripy.BoolS('c'))),
+        claripy.BVV(-5, 8),
+        claripy.BVV(1 << 100, 128),
+        claripy.Extract(7, 0, x),
+    ]
+
+def test_roundtrip():
+    asts = _asts()
+
+    data = serialize.dumps(asts)
+    loaded = serialize.loads(data)
+    assert len(loaded) == len(asts)
+    assert all(a is b for a, b in zip(asts, loaded))
+    assert len(data) < len(pickle.dumps(asts, pickle.HIGHEST_PROTOCOL))
+
+    # a single AST, through a file
+    f = io.BytesIO()
+    assert serialize.dump(asts[1], f) == len(list(asts[1].children_asts())) + 1
+    f.seek(0)
+    assert serialize.load(f) is asts[1]
+
+def test_hash_collision():
+    # the builtin hash() maps -1 and -2 to the same value, so the node that is loaded may collide with a live one
+    data = serialize.dumps(claripy.BVS('c', 32, min=-2, explicit_name=True))
+    gc.collect()
+    a = claripy.BVS('c', 32, min=-1, explicit_name=True)
+    b = serialize.loads(data)
+    assert b is not a
+    assert b is claripy.BVS('c', 32, min=-2, explicit_name=True)
+
+def test_annotations():
+    x = claripy.BVS('x', 32).annotate(claripy.SimplificationAvoidanceAnnotation())
+    e = x + 1
+    loaded = serialize.loads(serialize.dumps(e))
+    assert loaded is e
+    assert len(loaded.args[0].annotations) == 1
+
+def test_corrupt():
+    data = serialize.dumps(_asts())
+    nose.tools.assert_raises(claripy.ClaripySerializationError, serialize.loads, b'garbage')
+    nose.tools.assert_raises(claripy.ClaripySerializationError, serialize.loads, data[:len(data) // 2])
+
+if __name__ == '__main__':
+    test_roundtrip()
+    test_hash_collision()
+    test_annotations()
+    test_corrupt()
@@ -0,0 +1,55 @@
+import claripy
+
+def _frontend(**kwargs):
+    return claripy.frontends.FullFrontend(claripy.backends.z3, share_solver=True, **kwargs)
+
+def _same(l1, l2):
+    return len(l1) == len(l2) and all(p is q for p, q in zip(l1, l2))
+
+def test_shared_solver():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+
+    s = _frontend()
+    s.add([ claripy.UGT(x, 10), claripy.ULT(y, 100) ])
+    assert s.satisfiable()
+    shared = s._tls.shared_solver
+
+    a = s.branch()
+    b = s.branch()
+    a.add([ claripy.ULT(x, 12) ])
+    b.add([ x == 5 ])
+
+    # every branch sees exactly its own constraints, whichever used the solver before
+    for _ in range(2):
+        assert a.satisfiable()
+        assert not b.satisfiable()
+        assert s.satisfiable(extra_constraints=(x == 1000,))
+        assert not a.satisfiable(extra_constraints=(x == 1000,))
+    assert a._tls.shared_solver is shared and b._tls.shared_solver is shared
+
+    # the common constraints were asserted once, and then only the constraint of the branch that took the solver over
+    assert shared.asserted == 2 + 5
+    assert _same(shared.constraints, a.constraints)
+    assert shared.solver.num_scopes() == len(shared.scopes)
+
+    # a branch that diverges from the middle of a scope only reasserts what it needs
+    c = a.branch()
+    c.constraints = c.constraints[:1]
+    c.add([ y == 200 ])
+    assert c.satisfiable()
+    assert not c.satisfiable(extra_constraints=(claripy.ULT(y, 100),))
+    assert _same(shared.constraints, c.constraints)
+
+def test_shared_solver_disabled():
+    x = claripy.BVS('x', 32)
+
+    # tracked constraints are only asserted once per solver, so they can't be popped and asserted again
+    s = _frontend(track=True)
+    s.add([ x == 1 ])
+    assert s.satisfiable()
+    assert getattr(s._tls, 'shared_solver', None) is None
+
+if __name__ == '__main__':
+    test_shared_solver()
+    test_shared_solver_disabled()
@@ -0,0 +1,71 @@
+import gc
+
+import claripy
+from claripy.simplification_cache import SimplificationCache, simplification_cache
+from claripy.simplifications import simpleton
+
+def test_z3_simplify_cache():
+    x = claripy.BVS('x', 32)
+    e = claripy.And(x + 1 == 10, claripy.ULT(x, 100))
+
+    before = claripy.simplification_cache_stats()['by_kind'].get('z3', { 'hits': 0, 'misses': 0 })
+    s = claripy.simplify(e)
+    assert claripy.simplify(e) is s
+    after = claripy.simplification_cache_stats()['by_kind']['z3']
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
+
+    # an annotated AST has a result of its own
+    annotated = e.annotate(claripy.SimplificationAvoidanceAnnotation())
+    assert simplification_cache.lookup('z3', annotated) is None
+
+def test_rewrite_cache():
+    x = claripy.BVS('x', 32)
+    e = x.make_like('Reverse', (x.make_like('Reverse', (x,), length=32),), length=32)
+    assert simpleton.rewrite(e) is x
+    assert simplification_cache.lookup('rewrite', e, variant=(simpleton._version, 16)) is x
+
+def test_eviction():
+    c = SimplificationCache(maxsize=2)
+    a, b, d = claripy.BVS('a', 8), claripy.BVS('b', 8), claripy.BVS('d', 8)
+    c.store('z3', a, b)
+    c.store('z3', b, d)
+    assert c.lookup('z3', a) is b
+    c.store('z3', d, a)
+    # b was the least recently used one
+    assert c.lookup('z3', b) is None
+    assert c.lookup('z3', a) is b
+    assert c.lookup('z3', d) is a
+    stats = c.stats()
+    assert stats['evictions'] == 1
+    assert stats['size'] == 2
+    assert stats['hits'] == 3 and stats['misses'] == 1
+
+    c.resize(1)
+    assert c.stats()['size'] == 1
+    c.resize(0)
+    c.store('z3', a, b)
+    assert c.lookup('z3', a) is None
+    assert c.stats()['maxsize'] == 0
+
+def test_weak_entries():
+    c = SimplificationCache(maxsize=10)
+    x = claripy.BVS('weak_x', 32)
+    e = x + 1
+    f = x - 1
+    c.store('z3', e, x)
+    c.store('z3', f, f)
+    assert c.lookup('z3', e) is x
+    assert c.lookup('z3', f) is f
+    assert c.stats()['size'] == 2
+
+    # the entries don't keep the simplified ASTs alive
+    del e, f
+    gc.collect()
+    assert c.stats()['size'] == 0
+
+if __name__ == '__main__':
+    test_z3_simplify_cache()
+    test_rewrite_cache()
+    test_eviction()
+    test_weak_entries()
@@ -0,0 +1,105 @@
+import gc
+import threading
+
+import claripy
+from claripy.ast.base import Base
+from claripy.ast.store import ASTStore
+
+def _chain(x, i, depth=8):
+    e = x
+    for j in range(depth):
+        e = (e * (i + 3)) ^ (e >> j)
+    return e == i
+
+def test_swap_out():
+    x = claripy.BVS('x', 32)
+    roots = [ _chain(x, i) for i in range(20) ]
+    hashes = [ r._hash for r in roots ]
+    reprs = [ repr(r) for r in roots ]
+
+    with ASTStore() as store:
+        assert store.swap_out_many(roots) == 20
+        assert not store.swap_out(roots[0])
+        assert not store.swap_out(x)
+        assert all(ASTStore.is_swapped_out(r) for r in roots)
+
+        # the subtrees are released, but the swapped-out ASTs keep their hashes and metadata
+        gc.collect()
+        assert Base._hash_cache.get(hashes[0]) is roots[0]
+        assert roots[0].variables == x.variables and roots[0].depth == 18
+
+        # accessing the arguments faults them back in
+        assert repr(roots[1]) == reprs[1]
+        assert not ASTStore.is_swapped_out(roots[1])
+
+        # so does hash-consing an identical AST
+        assert _chain(x, 2) is roots[2]
+        assert not ASTStore.is_swapped_out(roots[2])
+
+        assert store.stats()['faulted_in'] == 2
+        assert store.stats()['on_disk'] == 18
+
+        # nested swap-outs
+        outer = claripy.Or(roots[3], roots[4])
+        assert store.swap_out(outer)
+        assert repr(outer.args[0]) == reprs[3]
+
+    # closing the store faults everything back in
+    assert not any(ASTStore.is_swapped_out(r) for r in roots)
+    assert [ repr(r) for r in roots ] == reprs
+    assert claripy.backends.concrete.convert(roots[5].replace(x, claripy.BVV(1, 32))) in (True, False)
+
+def test_fault_in_threads():
+    x = claripy.BVS('x', 32)
+    roots = [ _chain(x, i) for i in range(20) ]
+    args = [ r.args for r in roots ]
+
+    with ASTStore() as store:
+        store.swap_out_many(roots)
+        gc.collect()
+
+        # every AST is faulted in once, however many threads get to it at the same time
+        results = [ ]
+        def _read():
+            results.append([ r.args for r in roots ])
+        threads = [ threading.Thread(target=_read) for _ in range(8) ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(results) == 8
+        assert all(all(a == b for a, b in zip(r, args)) for r in results)
+        assert store.stats()['faulted_in'] == 20
+        assert store.stats()['on_disk'] == 0
+
+class _ValueAnnotation(claripy.Annotation):
+    # an annotation that is pickled by value, so that loading it makes a new one
+    def __init__(self, value):
+        self.value = value
+
+    def __reduce_ex__(self, protocol):
+        return _ValueAnnotation, (self.value,)
+
+def test_annotated_children():
+    x = claripy.BVS('x', 32)
+    child = (x + 1).annotate(claripy.SimplificationAvoidanceAnnotation())
+    other = (x + 2).annotate(_ValueAnnotation(2))
+    e = claripy.Concat(child, other * 3)
+
+    with ASTStore() as store:
+        assert store.swap_out(e)
+        gc.collect()
+        assert e.args[0] is child
+        assert e.args[1].args[0] is other
+
+        # the annotated children that died are loaded again
+        e2 = claripy.Concat(x + 3, (x + 4).annotate(_ValueAnnotation(4)))
+        assert store.swap_out(e2)
+        gc.collect()
+        assert e2.args[1].annotations[0].value == 4
+
+if __name__ == '__main__':
+    test_swap_out()
+    test_fault_in_threads()
+    test_annotated_children()
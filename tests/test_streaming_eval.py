@@ -0,0 +1,103 @@
+import itertools
+
+import claripy
+from claripy.backends import BackendZ3
+from claripy.backends import backend_z3
+
+def _frontend():
+    backend = BackendZ3()
+    return backend, claripy.frontends.FullFrontend(backend)
+
+def test_iter_eval():
+    x = claripy.BVS('x', 32)
+    _, s = _frontend()
+    s.add([ claripy.ULT(x, 1000) ])
+
+    # stopping early only pays for the solutions that were asked for
+    count = backend_z3.solve_count
+    first = list(itertools.islice(s.iter_eval(x, 1000), 3))
+    assert len(first) == 3 and all(v < 1000 for v in first)
+    assert backend_z3.solve_count - count < 10
+
+    assert sorted(s.iter_eval(x, 5, extra_constraints=(claripy.ULT(x, 5),))) == list(range(5))
+    assert sorted(s.iter_batch_eval([ x, x + 1 ], 10, extra_constraints=(claripy.ULT(x, 3),))) == [
+        (0, 1), (1, 2), (2, 3)
+    ]
+
+    try:
+        next(s.iter_eval(x, 10, extra_constraints=(claripy.UGE(x, 1000),)))
+        assert False
+    except claripy.UnsatError:
+        pass
+
+def test_iter_eval_scope():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    _, s = _frontend()
+    s.add([ claripy.ULT(x, 10) ])
+
+    # the frontend keeps working while a generator holds its solver
+    g = s.iter_eval(x, 10)
+    next(g)
+    assert s._tls.solver is None
+    assert s.satisfiable(extra_constraints=(x == 3,))
+    assert len(s.eval(x, 20)) == 10
+    s.add([ claripy.ULT(y, 2) ])
+    assert sorted(s.eval(y, 5)) == [ 0, 1 ]
+    assert len(list(g)) == 9
+
+    g = s.iter_batch_eval([ x, y ], 100)
+    next(g)
+    g.close()
+    assert s._tls.solver is not None
+    assert s._tls.solver.num_scopes() == 0
+    assert len(s.batch_eval([ x, y ], 100)) == 20
+
+def test_iter_eval_mixins():
+    x = claripy.BVS('x', 32)
+    s = claripy.Solver()
+    s.add(claripy.ULT(x, 4))
+
+    # the answers of the cached models come first
+    s.eval(x, 2)
+    cached = set(s._get_solutions(x))
+    count = backend_z3.solve_count
+    g = s.iter_eval(x, 10)
+    assert { next(g), next(g) } == cached
+    assert backend_z3.solve_count == count
+    assert sorted(cached | set(g)) == list(range(4))
+
+    # exhausting the solutions constrains the values, as eval() does
+    assert x.cache_key in s._eval_exhausted
+    assert any(c.op == 'Or' for c in s.constraints)
+    assert list(s.iter_eval(claripy.BVV(3, 32), 5)) == [ 3 ]
+
+def test_iter_eval_stale():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+
+    # the models of a generator that was started before constraints were added don't go into the model cache
+    s = claripy.Solver()
+    s.add(claripy.ULT(x, 10))
+    g = s.iter_eval(x, 10)
+    next(g)
+    s.add(x == 7)
+    assert len(list(g)) == 9
+    assert s.eval(x, 3) == (7,)
+
+    # and the merged solver of a composite doesn't replace the children that got constraints in the meantime
+    c = claripy.SolverComposite()
+    c.add(claripy.ULT(x, 10))
+    c.add(claripy.ULT(y, 10))
+    g = c.iter_batch_eval([ x, y ], 10)
+    next(g)
+    c.add(x == 7)
+    g.close()
+    assert not c.satisfiable(extra_constraints=(x != 7,))
+    assert c.eval(x, 5) == (7,)
+
+if __name__ == '__main__':
+    test_iter_eval()
+    test_iter_eval_scope()
+    test_iter_eval_mixins()
+    test_iter_eval_stale()
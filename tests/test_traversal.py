@@ -0,0 +1,124 @@
+import claripy
+from claripy.ast import traversal
+
+def shared_dag(depth):
+    x = claripy.BVS('x', 32)
+    d = x
+    for _ in range(depth):
+        d = (d - 1) * (d - 2)
+    return x, d
+
+def test_walk():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    e = (x + 1) * (x - y)
+
+    pre = list(traversal.walk(e))
+    assert pre[0] is e
+    assert len(pre) == len(set(id(a) for a in pre))
+    assert set(id(a) for a in pre) >= { id(x), id(y) }
+
+    post = list(traversal.walk(e, post_order=True))
+    assert post[-1] is e
+    assert set(id(a) for a in post) == set(id(a) for a in pre)
+    position = { id(a): i for i, a in enumerate(post) }
+    for a in post:
+        for c in a.args:
+            if isinstance(c, claripy.ast.Base):
+                assert position[id(c)] < position[id(a)]
+
+    # pruning
+    pruned = list(traversal.walk(e, descend=lambda a: not a.variables.isdisjoint(y.variables)))
+    assert any(a is (x + 1) for a in pruned)
+    assert not any(a.op == 'BVV' for a in pruned)
+
+def test_shared_dag():
+    x, d = shared_dag(64)
+
+    children = list(d.children_asts())
+    assert len(children) == len(set(id(a) for a in children))
+    assert [ a for a in d.leaf_asts() if a.op == 'BVS' ] == [ x ]
+
+    calls = [ ]
+    def _depth(a, args):
+        calls.append(a)
+        return 1 + max(args)
+    assert traversal.fold(d, _depth, pre=lambda a: 1 if a.depth == 1 else traversal.DESCEND) == d.depth
+    assert len(calls) == len(set(id(a) for a in calls))
+
+    y = claripy.BVS('y', 32)
+    r = d.replace(x, y)
+    assert r.variables == y.variables
+    assert r is shared_dag_with(y, 64)
+
+def shared_dag_with(v, depth):
+    d = v
+    for _ in range(depth):
+        d = (d - 1) * (d - 2)
+    return d
+
+def test_fold_memo_and_unwind():
+    x = claripy.BVS('x', 32)
+    y = claripy.BVS('y', 32)
+    e = (x + y) * (x - y)
+
+    memo = { }
+    count = lambda a, args: sum(v for v in args if type(v) is int)
+    n = traversal.fold(e, count, pre=lambda a: 1 if a.op == 'BVS' else traversal.DESCEND, memo=memo)
+    assert n == 4
+    assert memo[id(x)] == 1 and memo[id(e)] == 4
+
+    def _boom(a, args):
+        if a.op == '__sub__':
+            raise ValueError("boom")
+        return a
+
+    unwound = [ ]
+    try:
+        traversal.fold(e, _boom, unwind=unwound.append)
+        assert False
+    except ValueError:
+        pass
+    unwound = set(id(a) for a in unwound)
+    assert id(e) in unwound and id(x - y) in unwound and id(x + y) not in unwound
+
+def test_convert_errored():
+    x = claripy.BVS('x', 32)
+    e = (x + 1) * 2
+    try:
+        claripy.backends.concrete.convert(e)
+        assert False
+    except claripy.BackendError:
+        pass
+    assert claripy.backends.concrete in e._errored
+    assert claripy.backends.concrete in (x + 1)._errored
+
+    # shared subexpressions are only converted once
+    x, d = shared_dag(64)
+    assert claripy.backends.z3.convert(d) is not None
+
+def test_replace_dict_many():
+    x = claripy.BVS('x', 32)
+    ys = [ claripy.BVS('y', 32) for _ in range(4) ]
+    chain = shared_dag_with(x, 16)
+    asts = [ chain + y for y in ys ] + [ 5, chain ]
+
+    replacements = { y.cache_key: claripy.BVV(i, 32) for i, y in enumerate(ys) }
+    many = claripy.replace_dict_many(asts, dict(replacements))
+    assert many[4] == 5 and many[5] is chain
+    for a, r in zip(asts, many[:4]):
+        assert r is a.replace_dict(dict(replacements))
+        assert r.variables == x.variables
+
+    # the replacements apply to every root, and are recorded
+    replacements[x.cache_key] = ys[0]
+    many = claripy.replace_dict_many(asts[:2], replacements)
+    assert all(r.variables == ys[0].variables for r in many)
+    assert replacements[chain.cache_key] is shared_dag_with(ys[0], 16)
+
+if __name__ == '__main__':
+    test_walk()
+    test_shared_dag()
+    test_fold_memo_and_unwind()
+    test_convert_errored()
+    test_replace_dict_many()
@@ -0,0 +1,46 @@
+import claripy
+from claripy.ast import vectorized
+from claripy.frontend_mixins.model_cache_mixin import ModelCache
+
+def test_model_table():
+    if not vectorized.available:
+        return
+
+    x = claripy.BVS('x', 32, explicit_name=True)
+    y = claripy.BVS('y', 32, explicit_name=True)
+    w = claripy.BVS('w', 96, explicit_name=True)
+    a = claripy.BoolS('a', explicit_name=True)
+    models = [ { 'x': 0, 'y': 1, 'w': 2**95, 'a': False }, { 'x': 0xffffffff, 'y': 31 }, { 'y': 40, 'w': 5 } ]
+    exprs = [
+        x + y * 3, x - y, -x, ~y, x >> y, x << y, claripy.LShR(x, y), claripy.SLT(x, y), claripy.ULT(x, y),
+        claripy.Concat(x[7:0], y[31:8]), claripy.SignExt(32, x[15:0]), claripy.ZeroExt(64, x) + w, w[95:64],
+        claripy.If(claripy.And(a, x == 0), x, y), claripy.Or(claripy.Not(a), x != y), x.reversed, w >> 1,
+    ]
+
+    table = vectorized.ModelTable(models)
+    for e, values in zip(exprs, table.eval_list(exprs)):
+        assert values == [ ModelCache(m).eval_ast(e) for m in models ], e
+    assert table.satisfied([ claripy.ULT(x, 10), y != 40 ]) == [ True, False, False ]
+
+    # the cases that the concrete backend refuses fall back to it
+    for e in (y // x, y % x, x << (y - 2)):
+        try:
+            table.eval(e)
+            assert False, e
+        except claripy.BackendError:
+            pass
+
+def test_model_cache_filtering():
+    x = claripy.BVS('x', 32, explicit_name=True)
+    s = claripy.Solver()
+    s._models = { ModelCache({ 'x': i }) for i in range(100) }
+
+    assert sorted(m.model['x'] for m in s._get_models([ claripy.ULT(x, 10) ])) == list(range(10))
+    assert s._get_batch_solutions([ x % 7 ], extra_constraints=[ x // 0 == 1 ]) == set()
+    assert s._get_batch_solutions([ x % 7, x == 3 ], extra_constraints=[ claripy.UGE(x, 90) ]) == {
+        (i % 7, i == 3) for i in range(90, 100)
+    }
+
+if __name__ == '__main__':
+    test_model_table()
+    test_model_cache_filtering()